@@ -1,22 +1,30 @@
 # Description: This file contains the API endpoints for ChatWeb3
 # Path: api/api_endpoints.py
-from fastapi import FastAPI, Request, HTTPException
+import hashlib
+import json
+import secrets
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Header, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 from config.logging_config import get_logger
 from dotenv import load_dotenv
 
 from api.routers.well_known import get_ai_plugin, get_host, well_known
-from config.config import Config
+from config.config import Config, agent_config
 
 
 # Importing the required tools from tool_custom.py
 from chatweb3.tools.snowflake_database.tool_custom import (
     CheckTableSummaryTool,
     CheckTableMetadataTool,
+    FindJoinPathsTool,
     QueryDatabaseTool,
+    SearchTableSummaryTool,
 )
+from chatweb3.catalog.render_formats import RENDER_FORMATS
 from chatweb3.create_agent import get_snowflake_container
 
 
@@ -27,6 +35,10 @@ logger.debug(f"Set Config.PLUGIN_MODE={Config.PLUGIN_MODE}")
 
 
 db = get_snowflake_container()
+if agent_config.get("metadata.reload_poll_interval"):
+    db.start_metadata_watcher(
+        poll_interval=agent_config.get("metadata.reload_poll_interval")
+    )
 
 ai_plugin = get_ai_plugin()
 
@@ -69,35 +81,147 @@ async def general_exception_handler(request: Request, exc: Exception):
     )
 
 
+# The metadata endpoints return an ETag computed from the content hash of the metadata their result is
+# derived from, see SnowflakeContainer.metadata_content_hash, and 304 Not Modified if the client sends it
+# back in If-None-Match and the metadata did not change.
+# The tool settings change the results as well, so they are part of the ETags
+_TOOL_CONFIG = json.dumps(agent_config.get("tool"), sort_keys=True, default=str)
+
+
+def _etag(content_hash: Optional[str], *request_params) -> Optional[str]:
+    """Return the ETag of a result derived from metadata with the given content hash and the request parameters,
+    or None if the metadata has no content hash."""
+    if content_hash is None:
+        return None
+    digest = hashlib.sha256(
+        json.dumps([content_hash, _TOOL_CONFIG, *request_params]).encode("utf-8")
+    ).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(etag: Optional[str], if_none_match: Optional[str]) -> bool:
+    if etag is None or if_none_match is None:
+        return False
+    return any(
+        tag.strip() in ("*", etag, f"W/{etag}") for tag in if_none_match.split(",")
+    )
+
+
+def _not_modified(etag: Optional[str]) -> Response:
+    return Response(
+        status_code=304, headers={"ETag": etag} if etag is not None else None
+    )
+
+
+def _result_response(result: str, etag: Optional[str]) -> JSONResponse:
+    return JSONResponse(
+        content={"result": result},
+        headers={"ETag": etag} if etag is not None else None,
+    )
+
+
 # Endpoint: Get List of Available Tables
 @app.get("/get_list_of_available_tables")
-async def get_list_of_available_tables(table_list: str = ""):
+async def get_list_of_available_tables(
+    table_list: str = "", if_none_match: Optional[str] = Header(None)
+):
     try:
+        etag = _etag(
+            db.metadata_content_hash(), "get_list_of_available_tables", table_list
+        )
+        if _etag_matches(etag, if_none_match):
+            return _not_modified(etag)
         logger.debug(f"tool_input={table_list} Fetching list of available tables...")
         tool = CheckTableSummaryTool(db=db)
         result = tool.run(tool_input=table_list)
         logger.debug(
             f"tool_input={table_list} Fetched list of available tables {result=}"
         )
-        return {"result": result}
+        return _result_response(result, etag)
     except Exception as e:
         logger.error(f"Error fetching list of available tables: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Endpoint: Search Tables Relevant to a Question
+@app.get("/search_relevant_tables")
+async def search_relevant_tables(
+    question: str,
+    top_k: int = agent_config.get("tool.table_search_tool_top_k"),
+    if_none_match: Optional[str] = Header(None),
+):
+    try:
+        etag = _etag(
+            db.metadata_content_hash(), "search_relevant_tables", question, top_k
+        )
+        if _etag_matches(etag, if_none_match):
+            return _not_modified(etag)
+        tool = SearchTableSummaryTool(db=db)
+        result = tool.run({"tool_input": question, "top_k": top_k})
+        logger.debug(f"Fetched tables relevant to {question=}: {result=}")
+        return _result_response(result, etag)
+    except Exception as e:
+        logger.error(f"Error searching tables relevant to {question=}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Endpoint: Get Detailed Metadata for Tables
 @app.get("/get_detailed_metadata_for_tables")
-async def get_detailed_metadata_for_tables(table_names: str):
+async def get_detailed_metadata_for_tables(
+    table_names: str,
+    render_format: Optional[str] = None,
+    include_column_domains: Optional[bool] = None,
+    if_none_match: Optional[str] = Header(None),
+):
+    if render_format is not None and render_format not in RENDER_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown render_format {render_format!r}, expected one of {', '.join(RENDER_FORMATS)}",
+        )
+    tool_kwargs: Dict[str, Any] = {}
+    if render_format is not None:
+        tool_kwargs["render_format"] = render_format
+    if include_column_domains is not None:
+        tool_kwargs["include_column_domains"] = include_column_domains
     try:
-        tool = CheckTableMetadataTool(db=db)
+        # tables missing from the catalog are looked up in Snowflake, their results have no ETag
+        etag = _etag(
+            db.metadata_content_hash(table_names),
+            "get_detailed_metadata_for_tables",
+            table_names,
+            tool_kwargs,
+        )
+        if _etag_matches(etag, if_none_match):
+            return _not_modified(etag)
+        tool = CheckTableMetadataTool(db=db, **tool_kwargs)
         result = tool.run(table_names)
         logger.debug(f"Fetched metadata for table(s): {table_names}.")
-        return {"result": result}
+        return _result_response(result, etag)
     except Exception as e:
         logger.debug(f"Error fetching metadata for table(s) {table_names}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Endpoint: Find Join Paths between Tables
+@app.get("/find_join_paths_between_tables")
+async def find_join_paths_between_tables(
+    table_names: str, if_none_match: Optional[str] = Header(None)
+):
+    try:
+        etag = _etag(
+            db.metadata_content_hash(), "find_join_paths_between_tables", table_names
+        )
+        if _etag_matches(etag, if_none_match):
+            return _not_modified(etag)
+        tool = FindJoinPathsTool(db=db)
+        result = tool.run(table_names)
+        logger.debug(f"Fetched join paths between table(s): {table_names}.")
+        return _result_response(result, etag)
+    except Exception as e:
+        logger.error(f"Error finding join paths between table(s) {table_names}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 class SnowflakeQuery(BaseModel):
     query: str = Field(
         ...,
@@ -118,6 +242,34 @@ async def query_snowflake_sql_database(query: SnowflakeQuery):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _check_admin_token(x_admin_token: Optional[str]):
+    admin_token = agent_config.get("admin_params.admin_token")
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+# Endpoint: Reload the metadata catalog from the metadata files
+# Defined without async so that the catalog is rebuilt in the threadpool, not on the event loop
+@app.post("/admin/reload_metadata", include_in_schema=False)
+def reload_metadata(x_admin_token: Optional[str] = Header(None)):
+    _check_admin_token(x_admin_token)
+    try:
+        result = db.reload_metadata()
+        return {"result": result}
+    except Exception as e:
+        logger.error(f"Error reloading metadata: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Endpoint: Statistics of the cache of the tables and schemas missing from Snowflake
+@app.get("/admin/metadata_miss_cache", include_in_schema=False)
+def metadata_miss_cache_info(x_admin_token: Optional[str] = Header(None)):
+    _check_admin_token(x_admin_token)
+    return {"result": db.metadata_miss_cache.info()}
+
+
 def start():
     import uvicorn
 
@@ -2,6 +2,7 @@ import argparse
 
 from dotenv import load_dotenv
 
+from chatweb3.catalog.builder import add_build_catalog_arguments, run_build_catalog
 from config.logging_config import initialize_root_logger
 
 load_dotenv()
@@ -16,9 +17,18 @@ def main():
         help="Choose the interface to run (default: gradio)",
     )
 
+    subparsers = parser.add_subparsers(dest="command")
+    build_catalog_parser = subparsers.add_parser(
+        "build-catalog",
+        help="Build a metadata context file by crawling Snowflake schemas",
+    )
+    add_build_catalog_arguments(build_catalog_parser)
+
     args = parser.parse_args()
 
-    if args.interface == "gradio":
+    if args.command == "build-catalog":
+        run_build_catalog(args)
+    elif args.interface == "gradio":
         from api.gradio.gradio_app import start as gradio_start
 
         gradio_start()
@@ -0,0 +1,2 @@
+"""Benchmarks for the metadata catalog, run them from the repository root, e.g.
+python -m benchmarks.bench_ddl_tokenizer"""
@@ -0,0 +1,111 @@
+"""
+bench_ddl_tokenizer.py
+This file benchmarks the single-pass DDL tokenizer against the per-column regexes it replaced,
+on the real context files and on a synthetic catalog.
+
+    python -m benchmarks.bench_ddl_tokenizer [--num-tables 5000] [--num-columns 20]
+"""
+import argparse
+import json
+import re
+import time
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.synthetic_catalog import generate_catalog_dict
+from chatweb3.catalog.ddl_tokenizer import parse_column_definitions
+
+REAL_CONTEXT_FILES = [
+    "data/metadata/context_ethereum_core.json",
+    "data/metadata/context_ethereum_core_defi_nft_price.json",
+]
+
+
+def _legacy_parse_data_type(column_name, create_table_stmt):
+    # the regex previously used by Column._parse_data_type_from_create_table_stmt
+    pattern = rf"{column_name}\s+(?P<data_type>.+?(\([^\)]+\))?(?=\s*(,|\n\s*\))))"
+    match = re.search(pattern, create_table_stmt, re.IGNORECASE)
+    return match.group("data_type") if match else None
+
+
+def _legacy_parse_comment(column_name, get_ddl_create_table):
+    # the regex previously used by Column._parse_comment_from_ddl
+    pattern = rf"{column_name}\s+([\w\(\),]*)?\s*COMMENT\s+'(?P<comment>.*?)'"
+    match = re.search(pattern, get_ddl_create_table, re.IGNORECASE | re.DOTALL)
+    return match.group("comment") if match else None
+
+
+def _iter_tables(catalog_dict: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        table
+        for database in catalog_dict["root_schema_obj"]["databases"].values()
+        for schema in database["schemas"].values()
+        for table in schema["tables"].values()
+    ]
+
+
+def _run_legacy(tables: List[Dict[str, Any]]) -> int:
+    parsed = 0
+    for table in tables:
+        for column_name in table["column_names"] or []:
+            column_name = column_name.lower()
+            if table.get("create_table_stmt"):
+                _legacy_parse_data_type(column_name, table["create_table_stmt"])
+            if table.get("get_ddl_create_table"):
+                _legacy_parse_comment(column_name, table["get_ddl_create_table"])
+            parsed += 1
+    return parsed
+
+
+def _run_tokenizer(tables: List[Dict[str, Any]]) -> int:
+    parsed = 0
+    for table in tables:
+        data_types = parse_column_definitions(table.get("create_table_stmt"))
+        comments = parse_column_definitions(table.get("get_ddl_create_table"))
+        for column_name in table["column_names"] or []:
+            column_name = column_name.lower()
+            data_types.get(column_name)
+            comments.get(column_name)
+            parsed += 1
+    return parsed
+
+
+def _time(func, tables, repeat: int) -> Tuple[float, int]:
+    best = float("inf")
+    parsed = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parsed = func(tables)
+        best = min(best, time.perf_counter() - start)
+    return best, parsed
+
+
+def bench(label: str, tables: List[Dict[str, Any]], repeat: int) -> None:
+    legacy_seconds, num_columns = _time(_run_legacy, tables, repeat)
+    tokenizer_seconds, _ = _time(_run_tokenizer, tables, repeat)
+    print(
+        f"{label}: {len(tables)} tables, {num_columns} columns | "
+        f"legacy regex {legacy_seconds * 1000:.1f} ms | "
+        f"tokenizer {tokenizer_seconds * 1000:.1f} ms | "
+        f"speedup {legacy_seconds / tokenizer_seconds:.1f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--num-tables", type=int, default=5000)
+    parser.add_argument("--num-columns", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for file_path in REAL_CONTEXT_FILES:
+        with open(file_path) as f:
+            bench(file_path, _iter_tables(json.load(f)), args.repeat)
+
+    catalog_dict = generate_catalog_dict(
+        num_tables=args.num_tables, num_columns=args.num_columns
+    )
+    bench("synthetic catalog", _iter_tables(catalog_dict), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
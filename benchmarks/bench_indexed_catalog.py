@@ -0,0 +1,92 @@
+"""
+bench_indexed_catalog.py
+This file benchmarks the startup time and memory of MetadataParser when the catalog is parsed from the
+context JSON file, loaded from a snapshot, or loaded lazily from an indexed catalog, for synthetic catalogs
+of increasing size. It also times the first lookup of 3 tables, which hydrates them from the indexed catalog.
+
+    python -m benchmarks.bench_indexed_catalog [--num-tables 1000 5000 20000]
+"""
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic_catalog import write_synthetic_context_file
+from chatweb3.catalog.indexed_catalog import write_indexed_catalog
+from chatweb3.metadata_parser import MetadataParser
+
+
+def measure(label, num_tables, lookup, **kwargs):
+    gc.collect()
+    start = time.perf_counter()
+    metadata_parser = MetadataParser(**kwargs)
+    startup_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    metadata_parser.get_metadata_by_table_long_names(lookup)
+    lookup_seconds = time.perf_counter() - start
+    del metadata_parser
+
+    # measure the memory in a separate run, tracemalloc slows the parsing down
+    gc.collect()
+    tracemalloc.start()
+    metadata_parser = MetadataParser(**kwargs)
+    gc.collect()
+    startup_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del metadata_parser
+
+    print(
+        f"{num_tables} tables, {label}: startup {startup_seconds * 1000:.1f} ms, "
+        f"{startup_bytes / 1024 / 1024:.1f} MiB | "
+        f"first lookup of 3 tables {lookup_seconds * 1000:.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument(
+        "--num-tables", type=int, nargs="+", default=[1000, 5000, 20000]
+    )
+    parser.add_argument("--num-columns", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for num_tables in args.num_tables:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            context_file_path = write_synthetic_context_file(
+                os.path.join(tmp_dir, "context.json"),
+                num_tables=num_tables,
+                num_columns=args.num_columns,
+            )
+            snapshot_file_path = os.path.join(tmp_dir, "snapshot.pickle")
+            catalog_file_path = os.path.join(tmp_dir, "catalog.idx")
+            metadata_parser = MetadataParser(file_path=context_file_path)
+            metadata_parser.save_catalog_snapshot(snapshot_file_path)
+            write_indexed_catalog(
+                metadata_parser.root_schema_obj, catalog_file_path, [context_file_path]
+            )
+            lookup = ", ".join(rng.sample(sorted(metadata_parser._table_index), 3))
+            del metadata_parser
+
+            measure("context JSON", num_tables, lookup, file_path=context_file_path)
+            measure(
+                "snapshot",
+                num_tables,
+                lookup,
+                file_path=context_file_path,
+                snapshot_file_path=snapshot_file_path,
+            )
+            measure(
+                "indexed catalog",
+                num_tables,
+                lookup,
+                file_path=context_file_path,
+                indexed_catalog_file_path=catalog_file_path,
+            )
+
+
+if __name__ == "__main__":
+    main()
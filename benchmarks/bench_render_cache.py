@@ -0,0 +1,96 @@
+"""
+bench_render_cache.py
+This file benchmarks the render cache of MetadataParser, replaying the calls of CheckTableSummaryTool
+(the listing of all enabled tables) and CheckTableMetadataTool (the metadata of a few tables)
+with and without the cache, on the real context file and on a synthetic catalog.
+
+    python -m benchmarks.bench_render_cache [--num-tables 1000] [--num-calls 1000]
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.synthetic_catalog import write_synthetic_context_file
+from chatweb3.catalog.chain_registry import chain_catalog_from_config
+from chatweb3.metadata_parser import MetadataParser
+from config.config import agent_config
+
+
+def run_tool_calls(metadata_parser, listing, lookups, use_cache):
+    start = time.perf_counter()
+    for lookup in lookups:
+        if not use_cache:
+            metadata_parser.clear_render_cache()
+        metadata_parser.get_metadata_by_table_long_names(
+            listing, include_column_names=False, include_column_info=False
+        )
+        metadata_parser.get_metadata_by_table_long_names(lookup)
+    return time.perf_counter() - start
+
+
+def bench(label, metadata_parser, num_calls, rng):
+    table_long_names = [
+        table.long_name
+        for database in metadata_parser.root_schema_obj.databases.values()
+        for schema in database.schemas.values()
+        for table in schema.tables.values()
+    ]
+    listing = ", ".join(table_long_names)
+    # the metadata tool is called with the handful of tables picked from the listing
+    popular_tables = rng.sample(table_long_names, min(20, len(table_long_names)))
+    lookups = [", ".join(rng.sample(popular_tables, 3)) for _ in range(num_calls)]
+
+    uncached_seconds = run_tool_calls(metadata_parser, listing, lookups, False)
+    metadata_parser.clear_render_cache()
+    uncached_info = metadata_parser.render_cache_info()
+    cached_seconds = run_tool_calls(metadata_parser, listing, lookups, True)
+    cached_info = metadata_parser.render_cache_info()
+    print(
+        f"{label}: {num_calls} listing + metadata calls over {len(table_long_names)} tables | "
+        f"uncached {uncached_seconds * 1e3 / num_calls:.3f} ms per call | "
+        f"cached {cached_seconds * 1e3 / num_calls:.3f} ms per call | "
+        f"speedup {uncached_seconds / cached_seconds:.1f}x"
+    )
+    hits, misses, listing_hits, listing_misses = (
+        cached_info[key] - uncached_info[key]
+        for key in ["hits", "misses", "listing_hits", "listing_misses"]
+    )
+    print(
+        f"  cached run: hit rate {hits / (hits + misses):.1%}, "
+        f"listing hit rate {listing_hits / (listing_hits + listing_misses):.1%}, "
+        f"{uncached_info['avg_render_ms']:.3f} ms per table render"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--num-tables", type=int, default=1000)
+    parser.add_argument("--num-calls", type=int, default=1000)
+    args = parser.parse_args()
+    # the cache statistics are printed below
+    logging.getLogger("chatweb3.metadata_parser").setLevel(logging.WARNING)
+    rng = random.Random(0)
+
+    chain_catalog = chain_catalog_from_config(
+        agent_config, agent_config.get("database.default_database")
+    )
+    metadata_parser = MetadataParser(
+        file_path=chain_catalog.context_file,
+        annotation_file_path=chain_catalog.annotation_file,
+    )
+    bench("context file", metadata_parser, args.num_calls, rng)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = write_synthetic_context_file(
+            os.path.join(tmp_dir, "context_synthetic.json"),
+            num_tables=args.num_tables,
+        )
+        metadata_parser = MetadataParser(file_path=file_path)
+    bench("synthetic catalog", metadata_parser, args.num_calls, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+bench_render_formats.py
+This file compares the render formats of the table metadata (see chatweb3/catalog/render_formats.py)
+so that the cheapest format the agent still answers correctly with can be picked:
+    - the tokens per table of the full metadata of each enabled table in the context file, with the
+      local estimate of chatweb3.catalog.token_budget and, if tiktoken is installed, with the
+      tokenizer of the OpenAI chat models
+    - with --agent, the agent success rate on QUESTIONS and the mean OpenAI tokens per question:
+      a question succeeds if a query on one of its expected tables ran without error. This runs the
+      agent against OpenAI and Flipside and needs their API keys.
+
+    python -m benchmarks.bench_render_formats [--formats markdown csv jsonl ddl] [--agent]
+"""
+import argparse
+import logging
+import statistics
+
+from chatweb3.catalog.chain_registry import chain_catalog_from_config
+from chatweb3.catalog.render_formats import RENDER_FORMATS
+from chatweb3.catalog.token_budget import estimate_tokens
+from chatweb3.metadata_parser import MetadataParser
+from chatweb3.tools.snowflake_database.constants import QUERY_DATABASE_TOOL_NAME
+from config.config import agent_config
+
+# questions and the tables a correct answer queries
+QUESTIONS = [
+    (
+        "How many transactions were there on Ethereum yesterday?",
+        ["ethereum.core.fact_transactions"],
+    ),
+    (
+        "What were the 5 largest ETH transfers in the last 24 hours?",
+        ["ethereum.core.ez_eth_transfers"],
+    ),
+    (
+        "What was the average gas used per block over the last 100 blocks?",
+        ["ethereum.core.fact_blocks"],
+    ),
+    (
+        "Which were the top 5 NFT collections by sales volume in USD last week?",
+        ["ethereum.nft.ez_nft_sales"],
+    ),
+    (
+        "Which 5 DEX pools had the most swaps in the last day?",
+        ["ethereum.defi.ez_dex_swaps"],
+    ),
+    (
+        "What was the price of WETH in USD an hour ago?",
+        [
+            "ethereum.price.ez_hourly_token_prices",
+            "ethereum.price.fact_hourly_token_prices",
+        ],
+    ),
+]
+
+
+def _tiktoken_counter():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    encoding = tiktoken.encoding_for_model(agent_config.get("model.llm_name"))
+    return lambda text: len(encoding.encode(text))
+
+
+def bench_tokens(metadata_parser, table_long_names, render_formats):
+    count_tokens = _tiktoken_counter()
+    if count_tokens is None:
+        print("tiktoken is not installed, only the local token estimate is reported")
+    print(f"full metadata of {len(table_long_names)} tables:")
+    for render_format in render_formats:
+        rendered = [
+            metadata_parser.get_metadata_by_table_long_names(
+                table_long_name, render_format=render_format
+            )
+            for table_long_name in table_long_names
+        ]
+        estimated = [estimate_tokens(text) for text in rendered]
+        line = (
+            f"  {render_format:>8}: {statistics.mean(len(text) for text in rendered):8.0f} chars | "
+            f"estimated {statistics.mean(estimated):6.0f} tokens per table "
+            f"(p50 {statistics.median(estimated):.0f}, max {max(estimated)})"
+        )
+        if count_tokens is not None:
+            tokens = [count_tokens(text) for text in rendered]
+            line += f" | tiktoken {statistics.mean(tokens):6.0f} tokens per table"
+        print(line)
+
+
+def _question_succeeded(intermediate_steps, expected_tables) -> bool:
+    for action, observation in intermediate_steps:
+        if action.tool != QUERY_DATABASE_TOOL_NAME:
+            continue
+        query = str(action.tool_input).lower()
+        if any(table in query for table in expected_tables) and not str(
+            observation
+        ).startswith("Error"):
+            return True
+    return False
+
+
+def bench_agent(render_formats):
+    # the agent is only created with --agent, it needs the OpenAI and Flipside API keys
+    from langchain.callbacks import get_openai_callback
+
+    from chatweb3.create_agent import create_agent_executor
+    from chatweb3.tools.snowflake_database.tool import (
+        GetSnowflakeDatabaseTableMetadataTool,
+    )
+
+    agent_executor = create_agent_executor()
+    metadata_tools = [
+        tool
+        for tool in agent_executor.tools
+        if isinstance(tool, GetSnowflakeDatabaseTableMetadataTool)
+    ]
+    print(f"agent on {len(QUESTIONS)} questions:")
+    for render_format in render_formats:
+        for tool in metadata_tools:
+            tool.render_format = render_format
+        successes = 0
+        total_tokens = []
+        for question, expected_tables in QUESTIONS:
+            with get_openai_callback() as callback:
+                try:
+                    result = agent_executor({"input": question})
+                    succeeded = _question_succeeded(
+                        result["intermediate_steps"], expected_tables
+                    )
+                except Exception as e:
+                    logging.warning(f"{render_format}: {question!r} failed: {e}")
+                    succeeded = False
+            successes += succeeded
+            total_tokens.append(callback.total_tokens)
+        print(
+            f"  {render_format:>8}: {successes}/{len(QUESTIONS)} succeeded | "
+            f"{statistics.mean(total_tokens):.0f} OpenAI tokens per question"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=list(RENDER_FORMATS),
+        default=list(RENDER_FORMATS),
+    )
+    parser.add_argument(
+        "--agent",
+        action="store_true",
+        help="also run the agent on the question set, needs the OpenAI and Flipside API keys",
+    )
+    args = parser.parse_args()
+    logging.getLogger("chatweb3.metadata_parser").setLevel(logging.WARNING)
+
+    chain_catalog = chain_catalog_from_config(
+        agent_config, agent_config.get("database.default_database")
+    )
+    metadata_parser = MetadataParser(
+        file_path=chain_catalog.context_file,
+        annotation_file_path=chain_catalog.annotation_file,
+    )
+    table_long_names = [
+        table.long_name
+        for database in metadata_parser.root_schema_obj.databases.values()
+        for schema in database.schemas.values()
+        for table in schema.tables.values()
+    ]
+    bench_tokens(metadata_parser, table_long_names, args.formats)
+    if args.agent:
+        bench_agent(args.formats)
+
+
+if __name__ == "__main__":
+    main()
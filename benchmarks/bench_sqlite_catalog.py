@@ -0,0 +1,172 @@
+"""
+bench_sqlite_catalog.py
+This file benchmarks the SQLite catalog against the in-memory MetadataParser under a multi-worker
+deployment: it starts --num-workers processes which each load the catalog, like the uvicorn workers,
+and reports per worker
+    - load_ms: the time to load the catalog
+    - rss_mib: the resident memory added by loading the catalog and serving the lookups, and pss_mib:
+      the same with the pages shared between the workers divided among them (Linux only)
+    - lookup_us: the median and p95 latency of the metadata of 3 random tables, and of the same lookup
+      within the token budget of the table metadata tool
+
+    python -m benchmarks.bench_sqlite_catalog [--num-tables 1000 5000] [--num-workers 4]
+"""
+import argparse
+import contextlib
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.synthetic_catalog import write_synthetic_catalog_files
+from chatweb3.catalog.sqlite_catalog import SqliteCatalog, write_sqlite_catalog
+from chatweb3.metadata_parser import MetadataParser
+
+# a token budget of the table metadata tool, see tool.check_table_metadata_tool_max_tokens
+MAX_TOKENS = 2000
+
+
+def _memory_mib() -> Dict[str, float]:
+    """Return the resident and proportional set size of the current process, 0 where not available."""
+    memory = {"rss": 0.0, "pss": 0.0}
+    with contextlib.suppress(OSError):
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    memory[key.lower()] = int(value.split()[0]) / 1024
+    return memory
+
+
+def _percentiles(timings: List[float]) -> Dict[str, float]:
+    return {
+        "p50": statistics.median(timings),
+        "p95": statistics.quantiles(timings, n=20)[18],
+    }
+
+
+def _time_lookups(catalog, lookups, **kwargs) -> Dict[str, float]:
+    timings = []
+    for lookup in lookups:
+        start = time.perf_counter()
+        catalog.get_metadata_by_table_long_names(lookup, **kwargs)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return _percentiles(timings)
+
+
+def _worker(backend, file_paths, lookups, barrier, results):
+    logging.disable(logging.INFO)
+    memory_before_load = _memory_mib()
+    start = time.perf_counter()
+    if backend == "sqlite":
+        catalog = SqliteCatalog(file_paths["sqlite"])
+    else:
+        catalog = MetadataParser(
+            file_path=file_paths["context"],
+            annotation_file_path=file_paths["annotation"],
+            compact=True,
+        )
+    load_ms = (time.perf_counter() - start) * 1000
+    lookup = _time_lookups(catalog, lookups)
+    budget_lookup = _time_lookups(catalog, lookups, max_tokens=MAX_TOKENS)
+    # measure once all workers have loaded the catalog, so that the shared pages are divided among them
+    barrier.wait()
+    memory = _memory_mib()
+    barrier.wait()
+    results.put(
+        {
+            "load_ms": load_ms,
+            "rss_mib": memory["rss"] - memory_before_load["rss"],
+            "pss_mib": memory["pss"] - memory_before_load["pss"],
+            "lookup_us_p50": lookup["p50"],
+            "lookup_us_p95": lookup["p95"],
+            "budget_lookup_us_p50": budget_lookup["p50"],
+            "budget_lookup_us_p95": budget_lookup["p95"],
+        }
+    )
+
+
+def run_workers(backend, file_paths, lookups, num_workers) -> Dict[str, float]:
+    """Run the workers of a backend at the same time and return the mean of their measurements."""
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(num_workers)
+    results = context.Queue()
+    workers = [
+        context.Process(
+            target=_worker, args=(backend, file_paths, lookups, barrier, results)
+        )
+        for _ in range(num_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    measurements = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    return {
+        key: statistics.mean(measurement[key] for measurement in measurements)
+        for key in measurements[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--num-tables", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--num-columns", type=int, default=20)
+    parser.add_argument("--num-workers", type=int, default=4)
+    parser.add_argument("--num-lookups", type=int, default=200)
+    args = parser.parse_args()
+    # the render cache statistics are logged every few renders
+    logging.disable(logging.INFO)
+
+    rng = random.Random(0)
+    print(
+        f"{'tables':>8} | {'backend':>9} | {'load':>9} | {'RSS/worker':>10} | {'PSS/worker':>10} | "
+        f"{'lookup p50/p95':>18} | {'budget lookup p50/p95':>22}"
+    )
+    for num_tables in args.num_tables:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            context_file_path, annotation_file_path = write_synthetic_catalog_files(
+                os.path.join(tmp_dir, "context.json"),
+                os.path.join(tmp_dir, "annotation.json"),
+                num_tables=num_tables,
+                num_columns=args.num_columns,
+                num_databases=max(1, num_tables // 400),
+                num_schemas=4,
+            )
+            file_paths = {
+                "context": context_file_path,
+                "annotation": annotation_file_path,
+                "sqlite": os.path.join(tmp_dir, "catalog.sqlite"),
+            }
+            metadata_parser = MetadataParser(
+                file_path=context_file_path,
+                annotation_file_path=annotation_file_path,
+            )
+            write_sqlite_catalog(
+                metadata_parser,
+                file_paths["sqlite"],
+                [context_file_path, annotation_file_path],
+            )
+            table_long_names = sorted(metadata_parser._table_index)
+            del metadata_parser
+            lookups = [
+                ", ".join(rng.sample(table_long_names, 3))
+                for _ in range(args.num_lookups)
+            ]
+
+            for backend in ["in-memory", "sqlite"]:
+                metrics = run_workers(backend, file_paths, lookups, args.num_workers)
+                print(
+                    f"{num_tables:>8} | {backend:>9} | {metrics['load_ms']:>7.0f}ms | "
+                    f"{metrics['rss_mib']:>6.1f} MiB | {metrics['pss_mib']:>6.1f} MiB | "
+                    f"{metrics['lookup_us_p50']:>7.1f}/{metrics['lookup_us_p95']:>7.1f} us | "
+                    f"{metrics['budget_lookup_us_p50']:>8.1f}/{metrics['budget_lookup_us_p95']:>8.1f} us"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+bench_streaming_load.py
+This file benchmarks the streaming load of the context files (MetadataParser(streaming_load=True))
+against json.load() followed by RootSchema.from_dict, on the shipped metadata files and on a synthetic
+multi-chain context file. Every load runs in a fresh process, which reports
+    - peak_mib: the peak resident memory added by the load, the high-water mark of the RSS (reset before
+      the load where /proc/self/clear_refs allows it) minus the RSS before the load
+    - retained_mib: the resident memory the loaded catalog still holds. The allocator of Python keeps most
+      of the memory freed during the load, so it is close to the peak
+    - heap_peak_mib and heap_retained_mib: the same for the memory allocated by Python, traced with
+      tracemalloc in a separate load
+    - load_ms: the time to load the catalog
+
+    python -m benchmarks.bench_streaming_load [--num-tables 5000] [--num-chains 5]
+"""
+import argparse
+import contextlib
+import logging
+import multiprocessing
+import os
+import re
+import resource
+import tempfile
+import time
+import tracemalloc
+from typing import Dict
+
+from benchmarks.memory_report import SHIPPED_METADATA_FILES
+from benchmarks.synthetic_catalog import write_synthetic_catalog_files
+from chatweb3.metadata_parser import MetadataParser
+
+LOAD_MODES = {
+    "json": {},
+    "json compact": {"compact": True},
+    "streaming": {"streaming_load": True},
+    "streaming compact": {"streaming_load": True, "compact": True},
+}
+
+
+def _rss_mib() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def _reset_peak_rss():
+    """Reset the high-water mark of the RSS, so that the peak of the imports is not counted."""
+    with contextlib.suppress(OSError):
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+
+
+def _peak_rss_mib() -> float:
+    with contextlib.suppress(OSError):
+        with open("/proc/self/status") as f:
+            match = re.search(r"VmHWM:\s+(\d+) kB", f.read())
+        if match:
+            return int(match.group(1)) / 1024
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _load_metadata_parser(file_path, annotation_file_path, kwargs) -> MetadataParser:
+    return MetadataParser(
+        file_path=file_path, annotation_file_path=annotation_file_path, **kwargs
+    )
+
+
+def _load(file_path, annotation_file_path, kwargs, results):
+    logging.disable(logging.INFO)
+    _reset_peak_rss()
+    rss_before_load = _rss_mib()
+    start = time.perf_counter()
+    metadata_parser = _load_metadata_parser(file_path, annotation_file_path, kwargs)
+    load_ms = (time.perf_counter() - start) * 1000
+    results.put(
+        {
+            "peak_mib": _peak_rss_mib() - rss_before_load,
+            "retained_mib": _rss_mib() - rss_before_load,
+            "load_ms": load_ms,
+        }
+    )
+    del metadata_parser
+
+
+def _trace_load(file_path, annotation_file_path, kwargs, results):
+    logging.disable(logging.INFO)
+    tracemalloc.start()
+    metadata_parser = _load_metadata_parser(file_path, annotation_file_path, kwargs)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results.put(
+        {"heap_peak_mib": peak / 2**20, "heap_retained_mib": retained / 2**20}
+    )
+    del metadata_parser
+
+
+def _run_in_new_process(target, *args) -> Dict[str, float]:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=target, args=args + (results,))
+    process.start()
+    measurements: Dict[str, float] = results.get()
+    process.join()
+    return measurements
+
+
+def measure_load(file_path, annotation_file_path, kwargs) -> Dict[str, float]:
+    """Load the files in new processes and return their measurements."""
+    return {
+        **_run_in_new_process(_load, file_path, annotation_file_path, kwargs),
+        **_run_in_new_process(_trace_load, file_path, annotation_file_path, kwargs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--num-tables", type=int, default=5000)
+    parser.add_argument("--num-columns", type=int, default=20)
+    parser.add_argument("--num-chains", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'context file':>45} | {'size':>8} | {'mode':>17} | {'RSS peak/retained':>19} | "
+        f"{'heap peak/retained':>19} | {'load':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        synthetic_files = write_synthetic_catalog_files(
+            os.path.join(tmp_dir, "context_multi_chain.json"),
+            os.path.join(tmp_dir, "annotation_multi_chain.json"),
+            num_tables=args.num_tables,
+            num_columns=args.num_columns,
+            num_databases=args.num_chains,
+            num_schemas=4,
+        )
+        for file_path, annotation_file_path in SHIPPED_METADATA_FILES + [
+            synthetic_files
+        ]:
+            size_mib = os.path.getsize(file_path) / 2**20
+            for mode, kwargs in LOAD_MODES.items():
+                metrics = measure_load(file_path, annotation_file_path, kwargs)
+                print(
+                    f"{os.path.basename(file_path):>45} | {size_mib:>4.1f} MiB | {mode:>17} | "
+                    f"{metrics['peak_mib']:>6.1f}/{metrics['retained_mib']:>6.1f} MiB | "
+                    f"{metrics['heap_peak_mib']:>6.1f}/{metrics['heap_retained_mib']:>6.1f} MiB | "
+                    f"{metrics['load_ms']:>6.0f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
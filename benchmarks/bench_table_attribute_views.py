@@ -0,0 +1,99 @@
+"""
+bench_table_attribute_views.py
+This file benchmarks the read-only table attribute views of MetadataParser against the nine nested
+dictionaries that used to mirror the raw table payloads, on the real context files and on a synthetic catalog.
+
+    python -m benchmarks.bench_table_attribute_views [--num-tables 5000] [--num-columns 20]
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+import psutil
+
+from benchmarks.synthetic_catalog import write_synthetic_context_file
+from chatweb3.metadata_parser import MetadataParser, nested_dict
+
+REAL_CONTEXT_FILES = [
+    "data/metadata/context_ethereum_core.json",
+    "data/metadata/context_ethereum_core_defi_nft_price.json",
+]
+
+# nested dictionary name -> Table attribute, as previously built by MetadataParser._populate_nested_dicts
+LEGACY_NESTED_DICTS = {
+    "create_table_stmt": "create_table_stmt",
+    "select_sample_rows_stmt": "select_sample_rows_stmt",
+    "table_sample_rows": "sample_rows",
+    "table_sample_row_column_names": "sample_row_column_names",
+    "select_get_ddl_table_stmt": "select_get_ddl_table_stmt",
+    "get_ddl_create_table": "get_ddl_create_table",
+    "select_information_schema_columns_stmt": "select_information_schema_columns_stmt",
+    "information_schema_columns_names": "information_schema_columns_names",
+    "information_schema_columns_values": "information_schema_columns_values",
+}
+
+
+def build_legacy_nested_dicts(metadata_parser):
+    nested_dicts = {name: nested_dict() for name in LEGACY_NESTED_DICTS}
+    for database_name, database in metadata_parser.root_schema_obj.databases.items():
+        for schema_name, schema in database.schemas.items():
+            for table_name, table in schema.tables.items():
+                for name, attribute in LEGACY_NESTED_DICTS.items():
+                    nested_dicts[name][database_name][schema_name][table_name] = (
+                        getattr(table, attribute) or None
+                    )
+    return nested_dicts
+
+
+def bench(file_path: str) -> None:
+    process = psutil.Process()
+    gc.collect()
+    start = time.perf_counter()
+    metadata_parser = MetadataParser(file_path=file_path)
+    load_seconds = time.perf_counter() - start
+
+    gc.collect()
+    rss_before = process.memory_info().rss
+    tracemalloc.start()
+    start = time.perf_counter()
+    nested_dicts = build_legacy_nested_dicts(metadata_parser)
+    legacy_seconds = time.perf_counter() - start
+    legacy_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = process.memory_info().rss
+
+    # reading through the views gives the same data as the nested dictionaries
+    assert metadata_parser.get_ddl_create_table == nested_dicts["get_ddl_create_table"]
+
+    print(
+        f"{os.path.basename(file_path)}: load with views {load_seconds * 1000:.1f} ms | "
+        f"legacy nested dicts +{legacy_seconds * 1000:.1f} ms, "
+        f"+{legacy_bytes / 1024:.0f} KiB allocated, "
+        f"+{(rss_after - rss_before) / 1024:.0f} KiB RSS"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--num-tables", type=int, default=5000)
+    parser.add_argument("--num-columns", type=int, default=20)
+    args = parser.parse_args()
+
+    for file_path in REAL_CONTEXT_FILES:
+        bench(file_path)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bench(
+            write_synthetic_context_file(
+                os.path.join(tmp_dir, "context_synthetic.json"),
+                num_tables=args.num_tables,
+                num_columns=args.num_columns,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
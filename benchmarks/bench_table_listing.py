@@ -0,0 +1,130 @@
+"""
+bench_table_listing.py
+This file benchmarks the calls of ListSnowflakeDatabaseTableNamesTool (the listing of all available
+tables with their summaries) on the configured chains and on a synthetic multi-chain catalog, per call:
+    - uncached: the table long names are joined and the listing is rendered from the catalog
+    - listing cache: the table long names are joined, then split and looked up in the listing cache of
+      each MetadataParser, as the tool did before the listings were precomputed
+    - precomputed: the listing precomputed by ChainRegistry.table_listing
+
+    python -m benchmarks.bench_table_listing [--num-tables 1000] [--num-chains 2] [--num-calls 1000]
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic_catalog import generate_catalog_dict
+from chatweb3.catalog.chain_registry import (
+    ChainCatalog,
+    ChainRegistry,
+    chain_catalogs_from_config,
+)
+from config.config import agent_config
+
+
+def _list_with_listing_cache(chain_registry, full, clear_render_cache=False):
+    if clear_render_cache:
+        for chain in chain_registry.loaded_chains:
+            chain_registry.get_metadata_parser(chain).clear_render_cache()
+    table_long_names = ", ".join(chain_registry.table_long_names(full=full))
+    return chain_registry.get_metadata_by_table_long_names(
+        table_long_names, include_column_names=False, include_column_info=False
+    )
+
+
+def time_calls(call, num_calls: int) -> float:
+    """Return the time per call in microseconds."""
+    start = time.perf_counter()
+    for _ in range(num_calls):
+        call()
+    return (time.perf_counter() - start) * 1e6 / num_calls
+
+
+def load_chains(chain_registry):
+    for chain in chain_registry.chains:
+        chain_registry.get_metadata_parser(chain)
+
+
+def bench(label, chain_registry, num_calls):
+    for full in (False, True):
+        chain_registry.precompute_table_listings()
+        listing = chain_registry.table_listing(full=full)
+        assert _list_with_listing_cache(chain_registry, full) == listing
+        timings = {
+            "uncached": time_calls(
+                lambda: _list_with_listing_cache(chain_registry, full, True),
+                max(num_calls // 100, 1),
+            ),
+            "listing cache": time_calls(
+                lambda: _list_with_listing_cache(chain_registry, full), num_calls
+            ),
+            "precomputed": time_calls(
+                lambda: chain_registry.table_listing(full=full), num_calls
+            ),
+        }
+        num_tables = len(chain_registry.table_long_names(full=full))
+        print(
+            f"{label} ({'plugin' if full else 'UI'} mode, {num_tables} tables): "
+            + " | ".join(f"{name} {us:.1f} us" for name, us in timings.items())
+            + f" | speedup over the listing cache {timings['listing cache'] / timings['precomputed']:.0f}x"
+        )
+
+
+def write_synthetic_chain_catalogs(tmp_dir, num_tables, num_chains):
+    """Write a context file for each chain of a synthetic catalog and return their shards, with half of the tables enabled."""
+    catalog = generate_catalog_dict(
+        num_tables=num_tables, num_databases=num_chains, num_schemas=2
+    )
+    chain_catalogs = []
+    for chain, database in catalog["root_schema_obj"]["databases"].items():
+        context_file_path = os.path.join(tmp_dir, f"context_{chain}.json")
+        with open(context_file_path, "w") as f:
+            json.dump({"root_schema_obj": {"databases": {chain: database}}}, f)
+        table_long_names = [
+            table["long_name"]
+            for schema in database["schemas"].values()
+            for table in schema["tables"].values()
+        ]
+        chain_catalogs.append(
+            ChainCatalog(
+                chain=chain,
+                context_file=context_file_path,
+                enabled_list=table_long_names[: len(table_long_names) // 2],
+                full_list=table_long_names,
+            )
+        )
+    return chain_catalogs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--num-tables", type=int, default=1000)
+    parser.add_argument("--num-chains", type=int, default=2)
+    parser.add_argument("--num-calls", type=int, default=1000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    chain_registry = ChainRegistry(
+        chain_catalogs_from_config(agent_config),
+        default_chain=agent_config.get("database.default_database"),
+        compact=True,
+    )
+    load_chains(chain_registry)
+    bench("configured chains", chain_registry, args.num_calls)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        chain_catalogs = write_synthetic_chain_catalogs(
+            tmp_dir, args.num_tables, args.num_chains
+        )
+        chain_registry = ChainRegistry(
+            chain_catalogs, default_chain=chain_catalogs[0].chain, compact=True
+        )
+        load_chains(chain_registry)
+        bench("synthetic catalog", chain_registry, args.num_calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+bench_table_lookup.py
+This file benchmarks the table lookups behind CheckTableMetadataTool, comparing the long-name index of
+MetadataParser with the scan over every database, schema and table it replaced, on a synthetic catalog.
+
+    python -m benchmarks.bench_table_lookup [--num-tables 5000] [--num-databases 25] [--num-schemas 12]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.synthetic_catalog import write_synthetic_context_file
+from chatweb3.metadata_parser import MetadataParser
+
+
+def legacy_find_target_tables(metadata_parser, database=None, schema=None, tables=None):
+    # the scan previously done by MetadataParser._find_target_tables
+    matched_tables = []
+    for db_name, db in metadata_parser.root_schema_obj.databases.items():
+        if database is None or db_name == database:
+            for sch_name, sch in db.schemas.items():
+                if schema is None or sch_name == schema:
+                    if tables is None:
+                        matched_tables.extend(list(sch.tables.values()))
+                    else:
+                        for table_name in tables:
+                            if table_name in sch.tables:
+                                matched_tables.append(sch.tables[table_name])
+    return matched_tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--num-tables", type=int, default=5000)
+    # roughly the number of chains and schemas once all chains are loaded
+    parser.add_argument("--num-databases", type=int, default=25)
+    parser.add_argument("--num-schemas", type=int, default=12)
+    parser.add_argument("--num-lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = write_synthetic_context_file(
+            os.path.join(tmp_dir, "context_synthetic.json"),
+            num_tables=args.num_tables,
+            num_columns=5,
+            num_databases=args.num_databases,
+            num_schemas=args.num_schemas,
+        )
+        metadata_parser = MetadataParser(file_path=file_path)
+
+    rng = random.Random(0)
+    table_long_names = [
+        table.long_name
+        for database in metadata_parser.root_schema_obj.databases.values()
+        for schema in database.schemas.values()
+        for table in schema.tables.values()
+    ]
+    lookups = [sorted(rng.sample(table_long_names, 3)) for _ in range(args.num_lookups)]
+
+    for label, find_target_tables in [
+        ("legacy scan", lambda *a: legacy_find_target_tables(metadata_parser, *a)),
+        ("long-name index", metadata_parser._find_target_tables),
+    ]:
+        start = time.perf_counter()
+        for lookup in lookups:
+            for table_long_name in lookup:
+                database, schema, table = table_long_name.split(".")
+                assert find_target_tables(database, schema, [table])
+        seconds = time.perf_counter() - start
+        print(
+            f"{label}: {args.num_lookups} lookups of 3 tables in a catalog of {args.num_tables} tables, "
+            f"{args.num_databases} databases x {args.num_schemas} schemas, "
+            f"{seconds * 1e6 / args.num_lookups:.1f} us per lookup"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+memory_report.py
+This file reports the memory retained by the parsed metadata catalog for the shipped metadata files,
+with the full catalog and with the compact catalog (raw DDL and sample payloads dropped after parsing).
+
+    python -m benchmarks.memory_report
+"""
+import gc
+import tracemalloc
+
+from chatweb3.metadata_parser import MetadataParser
+
+SHIPPED_METADATA_FILES = [
+    (
+        "data/metadata/context_ethereum_core.json",
+        "data/metadata/annotation_ethereum_core_v1.json",
+    ),
+    (
+        "data/metadata/context_ethereum_core_defi_nft_price.json",
+        "data/metadata/annotation_ethereum_core_defi_nft_price.json",
+    ),
+]
+
+
+def measure_catalog_memory(file_path: str, annotation_file_path: str, **kwargs) -> int:
+    """Return the number of bytes still allocated by a MetadataParser after loading the files."""
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    metadata_parser = MetadataParser(
+        file_path=file_path, annotation_file_path=annotation_file_path, **kwargs
+    )
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del metadata_parser
+    return current - baseline
+
+
+def main():
+    for file_path, annotation_file_path in SHIPPED_METADATA_FILES:
+        full = measure_catalog_memory(file_path, annotation_file_path)
+        compact = measure_catalog_memory(file_path, annotation_file_path, compact=True)
+        print(
+            f"{file_path}: full catalog {full / 1024:.0f} KiB | "
+            f"compact catalog {compact / 1024:.0f} KiB "
+            f"({100 * (1 - compact / full):.0f}% less)"
+        )
+
+
+if __name__ == "__main__":
+    main()
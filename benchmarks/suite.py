@@ -0,0 +1,252 @@
+"""
+suite.py
+This file contains the metadata benchmark suite. For each catalog size it generates a synthetic
+context and annotation file and measures, in a fresh process:
+    - load_s: the time MetadataParser takes to load and parse the files
+    - peak_rss_mib: the peak resident memory of the process after loading, and load_rss_mib: the part
+      of it added by loading (the rest is the imported modules)
+    - lookup_us: the median and p95 latency of a table lookup by database, schema and table name
+    - render_us: the median and p95 latency of Table._get_metadata
+    - tool_call_us: the median and p95 latency of get_metadata_by_table_long_names for 3 tables,
+      with the render cache cleared before each call
+    - search_index_s: the time to build the table search index, and search_us: the median and p95
+      latency of a top 5 table search for the words of a table name
+
+    python -m benchmarks.suite [--sizes 100 1000 10000] [--output results.json] [--baseline results.json]
+
+With --baseline, the run fails if any metric is more than --tolerance slower or larger than in the
+baseline results, so that regressions of the metadata hot path are caught before they ship.
+"""
+import argparse
+import gc
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List
+
+from benchmarks.synthetic_catalog import write_synthetic_catalog_files
+from chatweb3.metadata_parser import MetadataParser
+
+DEFAULT_SIZES = [100, 1000, 10000]
+
+# metrics that are compared against the baseline, lower is better for all of them
+COMPARED_METRICS = [
+    "load_s",
+    "load_rss_mib",
+    "lookup_us_p50",
+    "render_us_p50",
+    "tool_call_us_p50",
+    "search_us_p50",
+]
+
+
+def _peak_rss_mib() -> float:
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def _percentiles(timings: List[float]) -> Dict[str, float]:
+    quantiles = statistics.quantiles(timings, n=20)
+    return {"p50": statistics.median(timings), "p95": quantiles[18]}
+
+
+def _time_calls(calls: List[Callable[[], object]]) -> Dict[str, float]:
+    """Return the p50 and p95 latency of the calls in microseconds."""
+    timings = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return _percentiles(timings)
+
+
+def measure_catalog(
+    context_file_path: str,
+    annotation_file_path: str,
+    num_lookups: int = 1000,
+    seed: int = 0,
+) -> Dict[str, float]:
+    """Measure loading, looking up and rendering the tables of a catalog in the current process."""
+    gc.collect()
+    rss_before_load = _peak_rss_mib()
+    start = time.perf_counter()
+    metadata_parser = MetadataParser(
+        file_path=context_file_path, annotation_file_path=annotation_file_path
+    )
+    load_s = time.perf_counter() - start
+    peak_rss_mib = _peak_rss_mib()
+
+    rng = random.Random(seed)
+    tables = [
+        table
+        for database in metadata_parser.root_schema_obj.databases.values()
+        for schema in database.schemas.values()
+        for table in schema.tables.values()
+    ]
+    sampled_tables = [rng.choice(tables) for _ in range(num_lookups)]
+
+    lookup = _time_calls(
+        [
+            partial(
+                metadata_parser.get_tables_from_database_schema_table_names,
+                table.database_name,
+                table.schema_name,
+                table.name,
+            )
+            for table in sampled_tables
+        ]
+    )
+    render = _time_calls([table._get_metadata for table in sampled_tables])
+
+    def tool_call(table_long_names):
+        metadata_parser.clear_render_cache()
+        metadata_parser.get_metadata_by_table_long_names(table_long_names)
+
+    tool_call_inputs = [
+        ", ".join(table.long_name for table in rng.sample(tables, min(3, len(tables))))
+        for _ in range(num_lookups)
+    ]
+    tool_calls = _time_calls(
+        [partial(tool_call, table_long_names) for table_long_names in tool_call_inputs]
+    )
+
+    start = time.perf_counter()
+    search_index = metadata_parser.search_index
+    search_index_s = time.perf_counter() - start
+    search = _time_calls(
+        [
+            partial(search_index.search, table.name.replace("_", " "), 5)
+            for table in sampled_tables
+        ]
+    )
+
+    return {
+        "num_tables": len(tables),
+        "load_s": load_s,
+        "peak_rss_mib": peak_rss_mib,
+        "load_rss_mib": peak_rss_mib - rss_before_load,
+        "lookup_us_p50": lookup["p50"],
+        "lookup_us_p95": lookup["p95"],
+        "render_us_p50": render["p50"],
+        "render_us_p95": render["p95"],
+        "tool_call_us_p50": tool_calls["p50"],
+        "tool_call_us_p95": tool_calls["p95"],
+        "search_index_s": search_index_s,
+        "search_us_p50": search["p50"],
+        "search_us_p95": search["p95"],
+    }
+
+
+def _initialize_worker():
+    # the render cache statistics are logged every few lookups
+    logging.getLogger("chatweb3.metadata_parser").setLevel(logging.WARNING)
+
+
+def run_suite(
+    sizes: List[int], num_columns: int = 20, num_lookups: int = 1000
+) -> Dict[str, Dict[str, float]]:
+    """Run the benchmarks for each catalog size, each in a fresh process so that the peak RSS is per size."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_tables in sizes:
+            context_file_path, annotation_file_path = write_synthetic_catalog_files(
+                os.path.join(tmp_dir, f"context_{num_tables}.json"),
+                os.path.join(tmp_dir, f"annotation_{num_tables}.json"),
+                num_tables=num_tables,
+                num_columns=num_columns,
+                # roughly 2-3 schemas per chain like the shipped files, with more chains for larger catalogs
+                num_databases=max(1, num_tables // 400),
+                num_schemas=4,
+            )
+            with ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initialize_worker,
+            ) as executor:
+                results[str(num_tables)] = executor.submit(
+                    measure_catalog,
+                    context_file_path,
+                    annotation_file_path,
+                    num_lookups,
+                ).result()
+            os.remove(context_file_path)
+            os.remove(annotation_file_path)
+    return results
+
+
+def compare_results(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> List[str]:
+    """Return a description of each metric that regressed by more than tolerance against the baseline."""
+    regressions = []
+    for size, metrics in results.items():
+        if size not in baseline:
+            continue
+        for metric in COMPARED_METRICS:
+            baseline_value = baseline[size].get(metric)
+            if baseline_value and metrics[metric] > baseline_value * (1 + tolerance):
+                regressions.append(
+                    f"{size} tables: {metric} {metrics[metric]:.2f} vs baseline {baseline_value:.2f} "
+                    f"(+{100 * (metrics[metric] / baseline_value - 1):.0f}%)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the metadata benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--num-columns", type=int, default=20)
+    parser.add_argument("--num-lookups", type=int, default=1000)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare the results with this JSON file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="Allowed relative regression against the baseline (default: 0.5)",
+    )
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.num_columns, args.num_lookups)
+    print(
+        f"{'tables':>8} | {'load':>9} | {'peak RSS (load)':>18} | {'lookup p50/p95':>16} | "
+        f"{'render p50/p95':>16} | {'tool call p50/p95':>18} | {'search p50/p95':>16}"
+    )
+    for size, metrics in results.items():
+        print(
+            f"{size:>8} | {metrics['load_s']:>8.2f}s | "
+            f"{metrics['peak_rss_mib']:>5.0f} MiB ({metrics['load_rss_mib']:>4.0f} MiB) | "
+            f"{metrics['lookup_us_p50']:>6.1f}/{metrics['lookup_us_p95']:>6.1f} us | "
+            f"{metrics['render_us_p50']:>6.1f}/{metrics['render_us_p95']:>6.1f} us | "
+            f"{metrics['tool_call_us_p50']:>7.1f}/{metrics['tool_call_us_p95']:>7.1f} us | "
+            f"{metrics['search_us_p50']:>6.1f}/{metrics['search_us_p95']:>6.1f} us"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+synthetic_catalog.py
+This file contains helpers to generate a synthetic metadata catalog in the same format as the
+context and annotation files under data/metadata, so that the catalog code can be benchmarked at a
+larger scale. Like the real files, the tables have a CREATE TABLE statement, a GET_DDL view
+definition with column and table comments (including unescaped quotes), and typed sample rows.
+"""
+import json
+import random
+from typing import Any, Dict, List, Optional
+
+_DATA_TYPES = [
+    "VARCHAR(16777216)",
+    "NUMBER(38,0)",
+    "FLOAT",
+    "TIMESTAMP_NTZ(9)",
+    "BOOLEAN",
+    "OBJECT",
+    "ARRAY",
+]
+
+_COLUMN_WORDS = [
+    "block",
+    "number",
+    "timestamp",
+    "tx",
+    "hash",
+    "from",
+    "to",
+    "address",
+    "amount",
+    "usd",
+    "token",
+    "symbol",
+    "event",
+    "index",
+    "contract",
+    "origin",
+    "fee",
+    "gas",
+]
+
+
+def _sample_value(rng: random.Random, data_type: str) -> Any:
+    """Return a sample value that looks like the sample rows of the real context files."""
+    if data_type.startswith("VARCHAR"):
+        return "0x" + "".join(rng.choice("0123456789abcdef") for _ in range(40))
+    if data_type.startswith("NUMBER"):
+        return rng.randint(0, 20_000_000)
+    if data_type == "FLOAT":
+        return rng.random() * 10 ** rng.randint(0, 22)
+    if data_type.startswith("TIMESTAMP"):
+        return f"2023-05-{rng.randint(10, 28)}T{rng.randint(10, 23)}:21:59.000Z"
+    if data_type == "BOOLEAN":
+        return rng.random() < 0.5
+    if data_type == "OBJECT":
+        return {"nonce": rng.randint(0, 100), "miner": "0x95222290dd7278aa3ddd"}
+    return [rng.randint(0, 100) for _ in range(rng.randint(0, 3))]
+
+
+def _column_name(rng: random.Random, index: int) -> str:
+    # share prefixes on purpose, e.g. block_number and block_number_hash
+    return "_".join(rng.sample(_COLUMN_WORDS, rng.randint(1, 3))) + f"_{index}"
+
+
+def generate_table_dict(
+    rng: random.Random,
+    database_name: str,
+    schema_name: str,
+    table_name: str,
+    num_columns: int,
+) -> Dict[str, Any]:
+    """Generate the dictionary of a single table, with both a CREATE TABLE and a GET_DDL statement."""
+    columns = [
+        (
+            _column_name(rng, index),
+            rng.choice(_DATA_TYPES),
+            f"The {index}th column, it can't be empty.",
+        )
+        for index in range(num_columns)
+    ]
+    long_name = f"{database_name}.{schema_name}.{table_name}"
+    create_table_stmt = (
+        f"\nCREATE TABLE {long_name.upper()} (\n\t"
+        + ", ".join(
+            f"{name.upper()}\n\t{data_type}\n\tCOMMENT '{comment}'"
+            for name, data_type, comment in columns
+        )
+        + "\n)\n\n"
+    )
+    get_ddl_create_table = (
+        f"create or replace view {long_name.upper()}(\n\t"
+        + ",\n\t".join(
+            f"{name.upper()} COMMENT '{comment.replace(chr(39), chr(39) * 2)}'"
+            for name, _, comment in columns
+        )
+        + f"\n) COMMENT='This table contains the {table_name} data of the {schema_name} schema. "
+        + "It's refreshed every hour.'"
+        + f"\n as (\n  SELECT * FROM {long_name}\n);"
+    )
+    column_names = [name for name, _, _ in columns]
+    return {
+        "name": table_name,
+        "database_name": database_name,
+        "schema_name": schema_name,
+        "long_name": long_name,
+        "column_names": column_names,
+        "columns": {},
+        "create_table_stmt": create_table_stmt,
+        "select_sample_rows_stmt": f"select * from {long_name.upper()} limit 3",
+        "sample_row_column_names": column_names,
+        "sample_rows": [
+            [_sample_value(rng, data_type) for _, data_type, _ in columns]
+            for _ in range(3)
+        ],
+        "select_get_ddl_table_stmt": f"SELECT GET_DDL('VIEW', '{long_name.upper()}')",
+        "get_ddl_create_table": get_ddl_create_table,
+        "select_information_schema_columns_stmt": None,
+        "information_schema_columns_names": None,
+        "information_schema_columns_values": None,
+    }
+
+
+def generate_catalog_dict(
+    num_tables: int = 5000,
+    num_columns: int = 20,
+    num_databases: int = 5,
+    num_schemas: int = 4,
+    seed: Optional[int] = 0,
+) -> Dict[str, Any]:
+    """Generate a catalog dictionary in the format of MetadataParser.save_metadata_to_json."""
+    rng = random.Random(seed)
+    databases: Dict[str, Any] = {}
+    for index in range(num_tables):
+        database_name = f"chain_{index % num_databases}"
+        schema_name = f"schema_{(index // num_databases) % num_schemas}"
+        table_name = f"table_{index}"
+        database = databases.setdefault(
+            database_name, {"name": database_name, "schemas": {}}
+        )
+        schema = database["schemas"].setdefault(
+            schema_name,
+            {"name": schema_name, "database_name": database_name, "tables": {}},
+        )
+        schema["tables"][table_name] = generate_table_dict(
+            rng, database_name, schema_name, table_name, num_columns
+        )
+    return {"root_schema_obj": {"databases": databases}}
+
+
+def write_synthetic_context_file(file_path: str, **kwargs: Any) -> str:
+    """Write a synthetic catalog to file_path, keyword arguments are passed to generate_catalog_dict."""
+    with open(file_path, "w") as f:
+        json.dump(generate_catalog_dict(**kwargs), f)
+    return file_path
+
+
+def generate_annotation_dict(catalog_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate the annotation dictionary, with a summary for every table of a synthetic catalog."""
+    table_summary = {}
+    for database in catalog_dict["root_schema_obj"]["databases"].values():
+        for schema in database["schemas"].values():
+            for table in schema["tables"].values():
+                table_summary[table["long_name"]] = (
+                    f"This table contains the {table['name']} data of the {schema['name']} schema "
+                    f"on {database['name']}, with {len(table['column_names'])} columns."
+                )
+    return {"table_summary": table_summary}
+
+
+def write_synthetic_catalog_files(
+    context_file_path: str, annotation_file_path: str, **kwargs: Any
+) -> List[str]:
+    """Write a synthetic catalog and its annotation file, keyword arguments are passed to generate_catalog_dict."""
+    catalog_dict = generate_catalog_dict(**kwargs)
+    with open(context_file_path, "w") as f:
+        json.dump(catalog_dict, f)
+    with open(annotation_file_path, "w") as f:
+        json.dump(generate_annotation_dict(catalog_dict), f)
+    return [context_file_path, annotation_file_path]
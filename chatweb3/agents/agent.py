@@ -26,6 +26,8 @@ from openai.error import InvalidRequestError
 # from chatweb3.agents.conversational_chat.output_parser import (
 #    ChatWeb3ChatConvoOutputParser,
 # )
+from chatweb3.tools.base import agent_question
+
 # from config.config import agent_config
 from config.logging_config import get_logger
 
@@ -63,12 +65,30 @@ class ChatWeb3AgentExecutor(AgentExecutor):
             **kwargs,
         )
 
+    def _get_question(self, inputs: Dict[str, str]) -> Optional[str]:
+        """Return the user question of the inputs, passed to the tools through agent_question."""
+        question = inputs.get("input")
+        if question is None and len(self.input_keys) == 1:
+            question = inputs.get(self.input_keys[0])
+        return question
+
     def _call(
         self,
         inputs: Dict[str, str],
         run_manager: Optional[CallbackManagerForChainRun] = None,
     ) -> Dict[str, Any]:
         """Run text through and get agent response."""
+        token = agent_question.set(self._get_question(inputs))
+        try:
+            return self._run_agent_loop(inputs, run_manager=run_manager)
+        finally:
+            agent_question.reset(token)
+
+    def _run_agent_loop(
+        self,
+        inputs: Dict[str, str],
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> Dict[str, Any]:
         # Construct a mapping of tool name to tool for easy lookup
         name_to_tool_map = {tool.name: tool for tool in self.tools}
         # We construct a mapping from each tool to a color, used for logging.
@@ -153,6 +173,17 @@ class ChatWeb3AgentExecutor(AgentExecutor):
         run_manager: Optional[AsyncCallbackManagerForChainRun] = None,
     ) -> Dict[str, str]:
         """Run text through and get agent response."""
+        token = agent_question.set(self._get_question(inputs))
+        try:
+            return await self._arun_agent_loop(inputs, run_manager=run_manager)
+        finally:
+            agent_question.reset(token)
+
+    async def _arun_agent_loop(
+        self,
+        inputs: Dict[str, str],
+        run_manager: Optional[AsyncCallbackManagerForChainRun] = None,
+    ) -> Dict[str, str]:
         # Construct a mapping of tool name to tool for easy lookup
         name_to_tool_map = {tool.name: tool for tool in self.tools}
         # We construct a mapping from each tool to a color, used for logging.
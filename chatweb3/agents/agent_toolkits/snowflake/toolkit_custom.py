@@ -25,7 +25,9 @@ from chatweb3.tools.snowflake_database.tool_custom import (
     CheckQuerySyntaxTool,
     CheckTableMetadataTool,
     CheckTableSummaryTool,
+    FindJoinPathsTool,
     QueryDatabaseTool,
+    SearchTableSummaryTool,
 )
 from config.config import agent_config
 from config.logging_config import get_logger
@@ -82,8 +84,15 @@ class CustomSnowflakeDatabaseToolkit(SnowflakeDatabaseToolkit):
         )
         # logger.debug(f"{query_database_tool_return_direct=}")
 
-        return [
-            CheckTableSummaryTool(
+        # search the tables relevant to the question instead of listing the summaries of all tables
+        table_summary_tool_class = (
+            SearchTableSummaryTool
+            if agent_config.get("tool.table_search_tool_enabled")
+            else CheckTableSummaryTool
+        )
+
+        tools: List[BaseTool] = [
+            table_summary_tool_class(
                 # db=self.db, callback_manager=callback_manager, verbose=verbose  # type: ignore[call-arg, arg-type]
                 db=self.db,
                 callbacks=callbacks,
@@ -117,3 +126,9 @@ class CustomSnowflakeDatabaseToolkit(SnowflakeDatabaseToolkit):
                 # handle_tool_error=handle_tool_error,
             ),
         ]
+        if agent_config.get("tool.join_paths_tool_enabled"):
+            # the join keys between tables, looked up in the join graph of the catalog
+            tools.insert(
+                2, FindJoinPathsTool(db=self.db, callbacks=callbacks, verbose=verbose)
+            )
+        return tools
@@ -0,0 +1 @@
+"""Tools for building, storing and loading the metadata catalog."""
@@ -0,0 +1,365 @@
+"""
+builder.py
+This file contains the catalog builder, which crawls the tables of Snowflake schemas and writes the
+context file read by MetadataParser.load_metadata_from_json, e.g. data/metadata/context_*.json.
+
+For every table it collects the CREATE TABLE statement, the GET_DDL statement, a few sample rows
+and the information_schema.columns rows, querying several tables concurrently. With --column-domains
+it also computes the value domains of the columns from a sample of the rows, see column_domains.py.
+Every finished table is appended to a progress file next to the output file, so that a build that
+failed or was interrupted resumes with the remaining tables when it is run again.
+
+Build the context file of a schema with:
+    chatweb3 build-catalog --database ethereum --schemas core defi --output data/metadata/context_ethereum.json
+or
+    python -m chatweb3.catalog.builder --database ethereum --schemas core defi --output ...
+"""
+import argparse
+import base64
+import datetime
+import decimal
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+from chatweb3.catalog.column_domains import DOMAIN_SAMPLE_ROWS, build_column_domains
+from chatweb3.catalog.ddl_tokenizer import parse_column_definitions
+from chatweb3.catalog.snapshot import atomic_write_file
+from chatweb3.metadata_parser import Database, RootSchema, Schema, Table
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# suffix of the progress file written next to the output file while a build is running
+PROGRESS_FILE_SUFFIX = ".progress.jsonl"
+
+
+def _to_json_value(value: Any) -> Any:
+    """Convert a value of a sample row to a JSON serializable value."""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    if isinstance(value, (list, tuple)):
+        return [_to_json_value(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _to_json_value(v) for k, v in value.items()}
+    return value
+
+
+def build_table(
+    snowflake_database: Any,
+    database_name: str,
+    schema_name: str,
+    table_name: str,
+    sample_rows_limit: int = 3,
+    is_view: bool = False,
+    column_domains_sample_rows: Optional[int] = None,
+) -> Table:
+    """Query the metadata of a table and return it as a Table object, without parsing it.
+    If column_domains_sample_rows is given, the value domains of the columns are computed from that many rows.
+    """
+    is_snowflake = snowflake_database.dialect == "snowflake"
+    if is_snowflake:
+        qualified_name = f"{database_name}.{schema_name}.{table_name}".upper()
+    else:
+        qualified_name = f"{schema_name}.{table_name}"
+
+    table = Table(table_name, schema_name, database_name)
+    table.create_table_stmt = snowflake_database.get_create_table_statement(table_name)
+
+    table.select_sample_rows_stmt = (
+        f"select * from {qualified_name} limit {sample_rows_limit}"
+    )
+    column_names, rows = snowflake_database.fetch_rows(table.select_sample_rows_stmt)
+    table.sample_row_column_names = [name.lower() for name in column_names]
+    table.sample_rows = [[_to_json_value(value) for value in row] for row in rows]
+    table.column_names = list(table.sample_row_column_names)
+
+    if is_snowflake:
+        table.select_get_ddl_table_stmt = (
+            f"SELECT GET_DDL('{'VIEW' if is_view else 'TABLE'}', '{qualified_name}')"
+        )
+        _, rows = snowflake_database.fetch_rows(table.select_get_ddl_table_stmt)
+        table.get_ddl_create_table = rows[0][0] if rows else None
+
+    if snowflake_database.dialect != "sqlite":
+        information_schema = (
+            f"{database_name.upper()}.INFORMATION_SCHEMA"
+            if is_snowflake
+            else "information_schema"
+        )
+        schema_filter, table_filter = (
+            (schema_name.upper(), table_name.upper())
+            if is_snowflake
+            else (schema_name, table_name)
+        )
+        table.select_information_schema_columns_stmt = (
+            f"SELECT * FROM {information_schema}.COLUMNS "
+            f"WHERE TABLE_SCHEMA = '{schema_filter}' AND TABLE_NAME = '{table_filter}'"
+        )
+        column_names, rows = snowflake_database.fetch_rows(
+            table.select_information_schema_columns_stmt
+        )
+        table.information_schema_columns_names = [name.lower() for name in column_names]
+        table.information_schema_columns_values = [
+            [_to_json_value(value) for value in row] for row in rows
+        ]
+
+    if column_domains_sample_rows:
+        _build_column_domains(
+            snowflake_database, table, qualified_name, column_domains_sample_rows
+        )
+    return table
+
+
+def _build_column_domains(
+    snowflake_database: Any, table: Table, qualified_name: str, sample_rows: int
+) -> None:
+    """Compute the value domains of the columns of a table, the table is built without them if this fails."""
+    if snowflake_database.dialect == "snowflake":
+        sampled_rows_stmt = (
+            f"select * from {qualified_name} sample ({sample_rows} rows)"
+        )
+    else:
+        sampled_rows_stmt = f"select * from {qualified_name} limit {sample_rows}"
+    column_definitions = parse_column_definitions(table.create_table_stmt)
+    columns = [
+        (name, column_definitions.get(name, (None, None))[0])
+        for name in table.column_names
+    ]
+    try:
+        statements, column_domains = build_column_domains(
+            snowflake_database.fetch_rows, sampled_rows_stmt, columns
+        )
+    except Exception as e:
+        logger.warning(
+            f"Unable to compute the column domains of {table.long_name}: {e}"
+        )
+        return
+    table.select_column_domains_stmt = ";\n".join(statements)
+    table.column_domains = _to_json_value(column_domains)
+
+
+def _read_progress_file(progress_file_path: str) -> Dict[str, Table]:
+    """Return the tables recorded in a progress file, by long name."""
+    tables: Dict[str, Table] = {}
+    if not os.path.exists(progress_file_path):
+        return tables
+    with open(progress_file_path) as f:
+        for line in f:
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                # the last line of an interrupted build may be incomplete
+                logger.warning(f"Skipping incomplete line in {progress_file_path}")
+                continue
+            data.setdefault("column_names", [])
+            table = Table.from_dict(data)
+            tables[table.long_name] = table
+    return tables
+
+
+def _read_context_file(context_file_path: str) -> RootSchema:
+    if not os.path.exists(context_file_path):
+        return RootSchema()
+    with open(context_file_path) as f:
+        root_schema_obj: RootSchema = RootSchema.from_dict(
+            json.load(f)["root_schema_obj"]
+        )
+    return root_schema_obj
+
+
+def _add_table(root_schema_obj: RootSchema, table: Table) -> None:
+    database = root_schema_obj.databases.get(table.database_name)
+    if database is None:
+        database = root_schema_obj.databases[table.database_name] = Database(
+            table.database_name
+        )
+    schema = database.schemas.get(table.schema_name)
+    if schema is None:
+        schema = database.schemas[table.schema_name] = Schema(
+            table.schema_name, table.database_name
+        )
+    schema.tables[table.name] = table
+
+
+def build_catalog(
+    get_database: Callable[[str, str], Any],
+    database_name: str,
+    schema_names: List[str],
+    output_file_path: str,
+    table_names: Optional[List[str]] = None,
+    max_workers: int = 8,
+    sample_rows_limit: int = 3,
+    resume: bool = True,
+    column_domains_sample_rows: Optional[int] = None,
+) -> Dict[str, List[str]]:
+    """Build the context file of the given schemas and write it to output_file_path.
+
+    get_database(database_name, schema_name) returns the SnowflakeDatabase of a schema, e.g.
+    SnowflakeContainer.get_database. If table_names is given, only these tables are built.
+    Tables of other schemas already in the output file are kept.
+    Tables recorded in the progress file of a previous run are not queried again if resume is True.
+    If column_domains_sample_rows is given, the value domains of the columns are computed, see build_table.
+
+    Returns the long names of the tables that were built, resumed and failed.
+    """
+    progress_file_path = output_file_path + PROGRESS_FILE_SUFFIX
+    if not resume and os.path.exists(progress_file_path):
+        os.remove(progress_file_path)
+    finished_tables = _read_progress_file(progress_file_path)
+    resumed = sorted(finished_tables)
+    if resumed:
+        logger.info(f"Resuming catalog build with {len(resumed)} finished tables")
+
+    # list the tables in the main thread, get_database creates the engine of each schema
+    tasks = []
+    for schema_name in schema_names:
+        snowflake_database = get_database(database_name, schema_name)
+        view_names = set(snowflake_database.get_view_names())
+        for table_name in snowflake_database.get_usable_table_names():
+            if table_names is not None and table_name not in table_names:
+                continue
+            table_long_name = f"{database_name}.{schema_name}.{table_name}".lower()
+            if table_long_name not in finished_tables:
+                tasks.append(
+                    (
+                        snowflake_database,
+                        schema_name,
+                        table_name,
+                        table_name in view_names,
+                    )
+                )
+
+    built: List[str] = []
+    failed: List[str] = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, open(
+        progress_file_path, "a"
+    ) as progress_file:
+        futures = {
+            executor.submit(
+                build_table,
+                snowflake_database,
+                database_name,
+                schema_name,
+                table_name,
+                sample_rows_limit,
+                is_view,
+                column_domains_sample_rows,
+            ): f"{database_name}.{schema_name}.{table_name}".lower()
+            for snowflake_database, schema_name, table_name, is_view in tasks
+        }
+        for future in as_completed(futures):
+            table_long_name = futures[future]
+            try:
+                table = future.result()
+            except Exception as e:
+                logger.error(f"Unable to build {table_long_name}: {e}")
+                failed.append(table_long_name)
+                continue
+            # only this thread writes to the progress file
+            progress_file.write(json.dumps(table.to_dict()) + "\n")
+            progress_file.flush()
+            finished_tables[table_long_name] = table
+            built.append(table_long_name)
+            logger.debug(f"Built {table_long_name}")
+
+    root_schema_obj = _read_context_file(output_file_path)
+    for table in finished_tables.values():
+        _add_table(root_schema_obj, table)
+
+    def write(f):
+        f.write(json.dumps({"root_schema_obj": root_schema_obj.to_dict()}).encode())
+
+    atomic_write_file(output_file_path, write)
+    if failed:
+        logger.warning(
+            f"Failed to build {len(failed)} tables: {failed}, run the build again to retry them"
+        )
+    else:
+        os.remove(progress_file_path)
+    logger.info(
+        f"Wrote {len(finished_tables)} tables to {output_file_path} ({len(built)} built, "
+        f"{len(resumed)} resumed, {len(failed)} failed)"
+    )
+    return {"built": sorted(built), "resumed": resumed, "failed": sorted(failed)}
+
+
+def add_build_catalog_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--database", required=True, help="Database to crawl")
+    parser.add_argument(
+        "--schemas", nargs="+", required=True, help="Schemas of the database to crawl"
+    )
+    parser.add_argument(
+        "--output", required=True, help="Path of the context JSON file to write"
+    )
+    parser.add_argument(
+        "--tables", nargs="+", help="Only build these tables (default: all tables)"
+    )
+    parser.add_argument(
+        "--max-workers", type=int, default=8, help="Number of tables queried at once"
+    )
+    parser.add_argument(
+        "--sample-rows", type=int, default=3, help="Number of sample rows per table"
+    )
+    parser.add_argument(
+        "--column-domains",
+        action="store_true",
+        help="Compute the null ratios, ranges and low-cardinality values of the columns",
+    )
+    parser.add_argument(
+        "--domain-sample-rows",
+        type=int,
+        default=DOMAIN_SAMPLE_ROWS,
+        help="Number of rows per table the column domains are computed from",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Discard the progress of a previous failed build",
+    )
+
+
+def run_build_catalog(args: argparse.Namespace) -> None:
+    # delay imports so that the builder does not pull in the Snowflake clients when it is imported
+    from chatweb3.snowflake_database import SnowflakeContainer
+    from config.config import agent_config
+
+    container = SnowflakeContainer(
+        **agent_config.get("flipside_params"),
+        **agent_config.get("snowflake_params"),
+        **agent_config.get("shroomdk_params"),
+    )
+    result = build_catalog(
+        container.get_database,
+        args.database.lower(),
+        [schema_name.lower() for schema_name in args.schemas],
+        args.output,
+        table_names=[table_name.lower() for table_name in args.tables]
+        if args.tables
+        else None,
+        max_workers=args.max_workers,
+        sample_rows_limit=args.sample_rows,
+        resume=not args.no_resume,
+        column_domains_sample_rows=args.domain_sample_rows
+        if args.column_domains
+        else None,
+    )
+    if result["failed"]:
+        raise SystemExit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build a metadata context file by crawling Snowflake schemas"
+    )
+    add_build_catalog_arguments(parser)
+    run_build_catalog(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
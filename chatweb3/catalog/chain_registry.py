@@ -0,0 +1,399 @@
+"""
+chain_registry.py
+This file contains the registry of the catalog shards of the chains, e.g. ethereum or polygon: the
+metadata files of each chain and the tables of it available to the agent, configured in the chains
+section of config.yaml.
+
+The shard of the default chain is loaded at startup, the shard of any other chain the first time
+one of its tables is referenced, e.g. by the table metadata tool or a search question naming the
+chain, so that registering more chains does not add to the startup time and memory of deployments
+that rarely query them. The table long names are routed to the shard of their database, names of
+an unknown database to the default chain.
+"""
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from chatweb3.catalog.content_hash import combine_hashes
+from chatweb3.catalog.join_graph import MAX_JOIN_PATHS, join_paths_need_two_tables
+from chatweb3.catalog.reloader import get_file_mtimes
+from chatweb3.catalog.sqlite_catalog import load_sqlite_catalog
+from chatweb3.metadata_parser import MetadataParser
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CHAIN = "ethereum"
+
+# the metadata files of a chain in the chains section of config.yaml
+_CHAIN_FILE_KEYS = [
+    "context_file",
+    "annotation_file",
+    "snapshot_file",
+    "indexed_catalog_file",
+    "sqlite_catalog_file",
+]
+
+
+class ChainCatalog(NamedTuple):
+    """The catalog shard of a chain: its metadata files and the long names of its available tables."""
+
+    # the database of the tables of the chain
+    chain: str
+    context_file: Optional[str] = None
+    annotation_file: Optional[str] = None
+    snapshot_file: Optional[str] = None
+    indexed_catalog_file: Optional[str] = None
+    sqlite_catalog_file: Optional[str] = None
+    enabled_list: Sequence[str] = ()
+    full_list: Sequence[str] = ()
+
+    @property
+    def file_paths(self) -> List[Optional[str]]:
+        return [
+            self.context_file,
+            self.annotation_file,
+            self.snapshot_file,
+            self.indexed_catalog_file,
+            self.sqlite_catalog_file,
+        ]
+
+
+def chain_catalog_from_config(config, chain: str) -> ChainCatalog:
+    """Return the catalog shard of a chain of the chains section of the config, with the paths of its
+    files under the project root and the table long names of its table_lists."""
+    chain_config = config.get(f"chains.{chain}")
+    if not chain_config:
+        raise ValueError(f"Chain {chain!r} is not configured in the chains section")
+    proj_root_dir = config.get("proj_root_dir")
+    file_paths = {
+        key: os.path.join(proj_root_dir, chain_config[key])
+        if chain_config.get(key)
+        else None
+        for key in _CHAIN_FILE_KEYS
+    }
+    enabled_list: List[str] = []
+    full_list: List[str] = []
+    for table_list in chain_config.get("table_lists") or []:
+        enabled_list.extend(config.get(f"{table_list}.enabled_list") or [])
+        full_list.extend(config.get(f"{table_list}.full_list") or [])
+    return ChainCatalog(
+        chain=chain, enabled_list=enabled_list, full_list=full_list, **file_paths
+    )
+
+
+def chain_catalogs_from_config(config) -> List[ChainCatalog]:
+    """Return the catalog shards of all chains of the chains section of the config."""
+    return [
+        chain_catalog_from_config(config, chain) for chain in config.get("chains") or {}
+    ]
+
+
+def _split_table_long_names(table_long_names: str) -> List[str]:
+    return [name.strip() for name in table_long_names.split(",") if name.strip()]
+
+
+class ChainRegistry:
+    """Registry of the catalog shards of the chains, each loaded into a MetadataParser on first reference."""
+
+    def __init__(
+        self,
+        chain_catalogs: Iterable[ChainCatalog],
+        default_chain: str = DEFAULT_CHAIN,
+        compact: bool = False,
+        parse_workers: int = 1,
+        streaming_load: bool = False,
+        verbose: bool = False,
+    ):
+        self._chain_catalogs: Dict[str, ChainCatalog] = {
+            chain_catalog.chain: chain_catalog for chain_catalog in chain_catalogs
+        }
+        if default_chain not in self._chain_catalogs:
+            raise ValueError(
+                f"The default chain {default_chain!r} is not one of the registered chains {list(self._chain_catalogs)}"
+            )
+        self.default_chain = default_chain
+        self.compact = compact
+        self.parse_workers = parse_workers
+        self.streaming_load = streaming_load
+        self.verbose = verbose
+        # chain -> the MetadataParser of its shard, once loaded
+        self._metadata_parsers: Dict[str, MetadataParser] = {}
+        # serializes the loading of the shards, the loaded parsers are read without locking
+        self._load_lock = threading.Lock()
+        # full -> the comma separated long names of the listing of the available tables and the chains of their shards
+        self._listing_table_long_names: Dict[bool, Tuple[str, List[str]]] = {}
+        for full in (False, True):
+            table_long_names = ", ".join(self.table_long_names(full=full))
+            self._listing_table_long_names[full] = (
+                table_long_names,
+                list(self.group_table_long_names(table_long_names)),
+            )
+        # full -> the content hashes of the shards the listing was rendered from and the listing
+        self._table_listings: Dict[bool, Tuple[Tuple[str, ...], str]] = {}
+        self._chain_pattern = re.compile(
+            r"\b("
+            + "|".join(re.escape(chain) for chain in self._chain_catalogs)
+            + r")\b",
+            re.IGNORECASE,
+        )
+
+    @classmethod
+    def from_metadata_parser(
+        cls, metadata_parser: MetadataParser, chain: str = DEFAULT_CHAIN
+    ) -> "ChainRegistry":
+        """Return a registry of a single chain whose catalog is already loaded."""
+        chain_registry = cls([ChainCatalog(chain)], default_chain=chain)
+        chain_registry.set_metadata_parser(chain, metadata_parser)
+        return chain_registry
+
+    def __contains__(self, chain):
+        return chain in self._chain_catalogs
+
+    @property
+    def chains(self) -> List[str]:
+        return list(self._chain_catalogs)
+
+    @property
+    def chain_catalogs(self) -> List[ChainCatalog]:
+        return list(self._chain_catalogs.values())
+
+    @property
+    def loaded_chains(self) -> List[str]:
+        return list(self._metadata_parsers)
+
+    def load_metadata_parser(self, chain: str) -> MetadataParser:
+        """Build a new MetadataParser from the files of the shard of a chain, without registering it.
+        The SQLite catalog of the chain is opened instead if it is up to date with its context and annotation files.
+        """
+        chain_catalog = self._chain_catalogs[chain]
+        if chain_catalog.sqlite_catalog_file is not None:
+            sqlite_catalog = load_sqlite_catalog(
+                chain_catalog.sqlite_catalog_file,
+                [chain_catalog.context_file, chain_catalog.annotation_file],
+                verbose=self.verbose,
+            )
+            if sqlite_catalog is not None:
+                return sqlite_catalog
+        return MetadataParser(
+            file_path=chain_catalog.context_file,
+            annotation_file_path=chain_catalog.annotation_file,
+            verbose=self.verbose,
+            snapshot_file_path=chain_catalog.snapshot_file,
+            compact=self.compact,
+            indexed_catalog_file_path=chain_catalog.indexed_catalog_file,
+            parse_workers=self.parse_workers,
+            streaming_load=self.streaming_load,
+        )
+
+    def get_metadata_parser(self, chain: Optional[str] = None) -> MetadataParser:
+        """Return the MetadataParser of the shard of a chain, the default chain if None, loading it on first access."""
+        chain = chain or self.default_chain
+        metadata_parser = self._metadata_parsers.get(chain)
+        if metadata_parser is not None:
+            return metadata_parser
+        if chain not in self._chain_catalogs:
+            raise ValueError(
+                f"Unknown chain {chain!r}, expected one of {', '.join(self._chain_catalogs)}"
+            )
+        with self._load_lock:
+            metadata_parser = self._metadata_parsers.get(chain)
+            if metadata_parser is None:
+                metadata_parser = self.load_metadata_parser(chain)
+                self._metadata_parsers[chain] = metadata_parser
+                logger.info(f"Loaded the catalog shard of {chain}")
+        return metadata_parser
+
+    def set_metadata_parser(self, chain: str, metadata_parser: MetadataParser):
+        """Swap in the MetadataParser of a chain, e.g. after a reload."""
+        self._metadata_parsers[chain] = metadata_parser
+
+    def chain_of(self, table_long_name: str) -> str:
+        """Return the chain of a table long name, the default chain if its database is not registered."""
+        database = table_long_name.strip().split(".")[0].lower()
+        return database if database in self._chain_catalogs else self.default_chain
+
+    def group_table_long_names(self, table_long_names: str) -> Dict[str, str]:
+        """Group comma separated table long names by their chain, in the order the chains first appear."""
+        groups: Dict[str, List[str]] = {}
+        for name in _split_table_long_names(table_long_names):
+            groups.setdefault(self.chain_of(name), []).append(name)
+        return {chain: ", ".join(names) for chain, names in groups.items()}
+
+    def chains_mentioned(self, text: str) -> List[str]:
+        """Return the chains named in a text, e.g. a question, in the order they first appear."""
+        return list(
+            dict.fromkeys(match.lower() for match in self._chain_pattern.findall(text))
+        )
+
+    def table_long_names(
+        self, full: bool = False, chains: Optional[Iterable[str]] = None
+    ) -> List[str]:
+        """Return the long names of the available tables of the chains, all chains if None.
+        The full lists are returned if full is True, e.g. in plugin mode, the enabled lists otherwise.
+        """
+        chains = self._chain_catalogs if chains is None else chains
+        table_long_names: List[str] = []
+        for chain in chains:
+            chain_catalog = self._chain_catalogs[chain]
+            table_long_names.extend(
+                chain_catalog.full_list if full else chain_catalog.enabled_list
+            )
+        return table_long_names
+
+    def table_listing(self, full: bool = False) -> str:
+        """Return the names and summaries of the available tables of all chains, the full lists if full is True,
+        see table_long_names. The listing is rendered once and served from memory until the content hash of
+        one of its shards changes, e.g. after a reload or a new table summary.
+        """
+        table_long_names, chains = self._listing_table_long_names[full]
+        version = tuple(
+            self.get_metadata_parser(chain).content_hash for chain in chains
+        )
+        cached = self._table_listings.get(full)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        listing = self.get_metadata_by_table_long_names(
+            table_long_names, include_column_names=False, include_column_info=False
+        )
+        self._table_listings[full] = (version, listing)
+        return listing
+
+    def precompute_table_listings(self):
+        """Render the non-empty listings of table_listing() whose shards are all loaded, e.g. at startup or after
+        a reload, without loading the shards of other chains."""
+        for full, (table_long_names, chains) in self._listing_table_long_names.items():
+            if table_long_names and all(
+                chain in self._metadata_parsers for chain in chains
+            ):
+                self.table_listing(full=full)
+
+    def content_hash(
+        self, chains: Optional[Iterable[str]] = None, load: bool = True
+    ) -> str:
+        """Return a hash of the content hashes of the catalogs of the chains, all chains if None,
+        see MetadataParser.content_hash. The shards are loaded if load is True. Otherwise a shard
+        not loaded yet counts with the modification times of its files, e.g. for an ETag.
+        """
+        chains = self._chain_catalogs if chains is None else chains
+        hashes = {}
+        for chain in chains:
+            if load or chain in self._metadata_parsers:
+                hashes[chain] = self.get_metadata_parser(chain).content_hash
+            else:
+                file_mtimes = get_file_mtimes(self._chain_catalogs[chain].file_paths)
+                hashes[chain] = f"not loaded {sorted(file_mtimes.items())}"
+        return combine_hashes(hashes)
+
+    def table_content_hashes(
+        self, table_long_names: str, load: bool = True
+    ) -> Dict[str, Optional[str]]:
+        """Return the content hash of each table in the shard of its chain, see
+        MetadataParser.table_content_hash. It is None for the tables not in the catalog, and
+        for the tables of the shards not loaded yet if load is False.
+        """
+        table_hashes: Dict[str, Optional[str]] = {}
+        for name in _split_table_long_names(table_long_names):
+            chain = self.chain_of(name)
+            if load or chain in self._metadata_parsers:
+                table_hash = self.get_metadata_parser(chain).table_content_hash(name)
+            else:
+                table_hash = None
+            table_hashes[name.lower()] = table_hash
+        return table_hashes
+
+    def get_metadata_by_table_long_names(self, table_long_names: str, **kwargs) -> str:
+        """Return the metadata of the tables, each rendered by the shard of its chain, see
+        MetadataParser.get_metadata_by_table_long_names. A token budget is shared by the chains.
+        """
+        groups = self.group_table_long_names(table_long_names)
+        if len(groups) <= 1:
+            return self.get_metadata_parser(
+                next(iter(groups), None)
+            ).get_metadata_by_table_long_names(table_long_names, **kwargs)
+        if kwargs.get("max_tokens"):
+            kwargs["max_tokens"] = kwargs["max_tokens"] // len(groups)
+        results = (
+            self.get_metadata_parser(chain).get_metadata_by_table_long_names(
+                names, **kwargs
+            )
+            for chain, names in groups.items()
+        )
+        return "\n\n".join(result for result in results if result)
+
+    def resolve_table_long_names(self, table_long_names: str):
+        """Resolve each table long name against the shard of its chain, see MetadataParser.resolve_table_long_names."""
+        return [
+            resolution
+            for name in _split_table_long_names(table_long_names)
+            for resolution in self.get_metadata_parser(
+                self.chain_of(name)
+            ).resolve_table_long_names(name)
+        ]
+
+    def search_tables(
+        self,
+        query: str,
+        top_k: int = 5,
+        table_long_names: Optional[str] = None,
+        **kwargs,
+    ) -> str:
+        """Search the tables relevant to the query in the shards of the chains it names and of the default chain,
+        see MetadataParser.search_tables."""
+        chains = dict.fromkeys(self.chains_mentioned(query) + [self.default_chain])
+        groups = (
+            self.group_table_long_names(table_long_names)
+            if table_long_names is not None
+            else {}
+        )
+        results = []
+        for chain in chains:
+            if table_long_names is not None and chain not in groups:
+                continue
+            results.append(
+                self.get_metadata_parser(chain).search_tables(
+                    query, top_k=top_k, table_long_names=groups.get(chain), **kwargs
+                )
+            )
+        return "\n\n".join(result for result in results if result)
+
+    def find_join_paths(
+        self,
+        table_long_names: str,
+        max_paths: int = MAX_JOIN_PATHS,
+        allowed_table_long_names: Optional[str] = None,
+    ) -> str:
+        """Find the join paths between the tables of each chain in the join graph of its shard,
+        see MetadataParser.find_join_paths."""
+        allowed_groups = (
+            self.group_table_long_names(allowed_table_long_names)
+            if allowed_table_long_names is not None
+            else {}
+        )
+        if len(_split_table_long_names(table_long_names)) < 2:
+            return join_paths_need_two_tables(_split_table_long_names(table_long_names))
+        groups = self.group_table_long_names(table_long_names)
+        results = []
+        for chain, names in groups.items():
+            if len(_split_table_long_names(names)) < 2:
+                continue
+            results.append(
+                self.get_metadata_parser(chain).find_join_paths(
+                    names,
+                    max_paths=max_paths,
+                    allowed_table_long_names=allowed_groups.get(chain, "")
+                    if allowed_table_long_names is not None
+                    else None,
+                )
+            )
+        # the tables of different chains are in different databases, they are not joined
+        chains = list(groups)
+        for i, chain in enumerate(chains):
+            for other_chain in chains[i + 1 :]:
+                results.extend(
+                    f"No join path found between {name} and {other_name}."
+                    for name in _split_table_long_names(groups[chain])
+                    for other_name in _split_table_long_names(groups[other_chain])
+                )
+        return "\n\n".join(result for result in results if result)
@@ -0,0 +1,154 @@
+"""
+column_domains.py
+This file contains the value domains of the columns: the share of null values, the range of numeric,
+date and timestamp columns, and the values of low-cardinality columns such as event_type, platform
+or symbol, so that the agent does not need to run SELECT DISTINCT queries before the real query.
+
+The domains are optional. The catalog builder computes them from a sample of the rows of each table
+when it is run with --column-domains (see build_column_domains), they are stored with the table in
+the context file and set on the columns by MetadataParser. They are rendered with the "domain"
+column info, e.g.
+    values: sale, bid_won, redeem; nulls: 2%
+    range: 2015-07-30T15:26:28 to 2023-06-12T08:10:47
+"""
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from chatweb3.catalog.sample_values import normalize_sample_value
+
+# columns with at most this many distinct values in the sample have their values listed
+DOMAIN_MAX_VALUES = 20
+# number of rows of a table the domains are computed from
+DOMAIN_SAMPLE_ROWS = 10000
+# characters of a listed value
+DOMAIN_VALUE_MAX_CHARS = 50
+
+_RANGE_DATA_TYPE_PATTERN = re.compile(
+    r"^(number|numeric|decimal|int|integer|bigint|smallint|tinyint|byteint|float|double|real|date|time|timestamp)",
+    re.IGNORECASE,
+)
+# only the null ratio is computed for these
+_SEMI_STRUCTURED_DATA_TYPE_PATTERN = re.compile(
+    r"^(variant|object|array|geography|geometry|binary|varbinary)", re.IGNORECASE
+)
+
+ColumnDomains = Dict[str, Dict[str, Any]]
+
+
+def _has_range(data_type: Optional[str]) -> bool:
+    return bool(data_type and _RANGE_DATA_TYPE_PATTERN.match(data_type))
+
+
+def _is_semi_structured(data_type: Optional[str]) -> bool:
+    return bool(data_type and _SEMI_STRUCTURED_DATA_TYPE_PATTERN.match(data_type))
+
+
+def select_column_domains_stmt(
+    sampled_rows_stmt: str, columns: Sequence[Tuple[str, Optional[str]]]
+) -> str:
+    """Return the query of the row count, and the non-null count, distinct count and range of each
+    (name, data_type) column over the rows of sampled_rows_stmt. The results are aliased by column index.
+    """
+    aggregates = ["count(*) as row_count"]
+    for i, (name, data_type) in enumerate(columns):
+        aggregates.append(f"count({name}) as c{i}_non_null")
+        if _is_semi_structured(data_type):
+            continue
+        aggregates.append(f"count(distinct {name}) as c{i}_distinct")
+        if _has_range(data_type):
+            aggregates.append(f"min({name}) as c{i}_min")
+            aggregates.append(f"max({name}) as c{i}_max")
+    return (
+        f"with sampled_rows as ({sampled_rows_stmt}) "
+        f"select {', '.join(aggregates)} from sampled_rows"
+    )
+
+
+def select_column_values_stmt(
+    sampled_rows_stmt: str, column_names: Sequence[str]
+) -> str:
+    """Return the query of the counts of the values of the columns over the rows of sampled_rows_stmt,
+    as (column name, value as a string, count) rows.
+    """
+    selects = [
+        f"select '{name}' as column_name, cast({name} as varchar) as value, count(*) as value_count "
+        f"from sampled_rows where {name} is not null group by {name}"
+        for name in column_names
+    ]
+    return f"with sampled_rows as ({sampled_rows_stmt}) " + " union all ".join(selects)
+
+
+def build_column_domains(
+    fetch_rows: Callable[[str], Tuple[List[str], List[Sequence[Any]]]],
+    sampled_rows_stmt: str,
+    columns: Sequence[Tuple[str, Optional[str]]],
+    max_values: int = DOMAIN_MAX_VALUES,
+) -> Tuple[List[str], ColumnDomains]:
+    """Compute the domains of the (name, data_type) columns over the rows of sampled_rows_stmt.
+
+    fetch_rows(statement) returns the column names and rows of a query, e.g. SnowflakeDatabase.fetch_rows.
+    Returns the statements that were run and the domain of each column by name, with the keys:
+        - null_ratio: the share of null values
+        - distinct_count: the number of distinct values, except for semi-structured columns
+        - min, max: the range of numeric, date and timestamp columns
+        - values: the values of columns with at most max_values distinct values, the most frequent first
+    """
+    statements = [select_column_domains_stmt(sampled_rows_stmt, columns)]
+    result_names, rows = fetch_rows(statements[0])
+    result = dict(zip([name.lower() for name in result_names], rows[0]))
+    row_count = result["row_count"]
+    if not row_count:
+        return statements, {}
+
+    domains: ColumnDomains = {}
+    for i, (name, data_type) in enumerate(columns):
+        domain: Dict[str, Any] = {
+            "null_ratio": round(1 - result[f"c{i}_non_null"] / row_count, 4)
+        }
+        if f"c{i}_distinct" in result:
+            domain["distinct_count"] = result[f"c{i}_distinct"]
+        if f"c{i}_min" in result:
+            domain["min"] = result[f"c{i}_min"]
+            domain["max"] = result[f"c{i}_max"]
+        domains[name] = domain
+
+    low_cardinality_columns = [
+        name
+        for name, domain in domains.items()
+        if 0 < domain.get("distinct_count", 0) <= max_values
+    ]
+    if low_cardinality_columns:
+        statements.append(
+            select_column_values_stmt(sampled_rows_stmt, low_cardinality_columns)
+        )
+        _, rows = fetch_rows(statements[-1])
+        value_counts: Dict[str, List[Tuple[int, str]]] = {}
+        for column_name, value, value_count in rows:
+            value_counts.setdefault(column_name.lower(), []).append(
+                (value_count, value)
+            )
+        for column_name, counts in value_counts.items():
+            counts.sort(key=lambda count_value: (-count_value[0], count_value[1]))
+            domains[column_name]["values"] = [value for _, value in counts][:max_values]
+    return statements, domains
+
+
+def describe_domain(domain: Optional[Dict[str, Any]]) -> str:
+    """Describe the domain of a column in one line, an empty string if it has none."""
+    if not domain:
+        return ""
+    parts = []
+    if domain.get("values"):
+        parts.append(
+            "values: "
+            + ", ".join(
+                str(normalize_sample_value(value, DOMAIN_VALUE_MAX_CHARS))
+                for value in domain["values"]
+            )
+        )
+    elif domain.get("min") is not None:
+        parts.append(f"range: {domain['min']} to {domain['max']}")
+    null_ratio = domain.get("null_ratio")
+    if null_ratio:
+        parts.append(f"nulls: {null_ratio:.0%}" if null_ratio >= 0.01 else "nulls: <1%")
+    return "; ".join(parts)
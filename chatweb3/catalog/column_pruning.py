@@ -0,0 +1,70 @@
+"""
+column_pruning.py
+This file contains the column pruning of wide tables: instead of rendering every column of a table
+into the metadata observation, only the columns most relevant to the question are rendered, along
+with the key columns (timestamps, dates, hashes and addresses) that most queries join or filter on.
+
+The columns are ranked with a BM25 index over their names and comments, see search_index.py.
+"""
+import re
+from typing import List, Optional
+
+from chatweb3.catalog.search_index import BM25Index, tokenize
+
+# weight of a term occurrence in the name and comment of a column
+COLUMN_FIELD_WEIGHTS = {
+    "name": 2.0,
+    "comment": 1.0,
+}
+
+_KEY_COLUMN_NAME_PATTERN = re.compile(r"(^|_)(timestamp|time|date|hash|address)$")
+_KEY_COLUMN_DATA_TYPE_PATTERN = re.compile(r"^(timestamp|date)", re.IGNORECASE)
+
+
+def is_key_column(column) -> bool:
+    """Whether a column is a timestamp, date, hash or address column, which is always rendered."""
+    return bool(
+        _KEY_COLUMN_NAME_PATTERN.search(column.name)
+        or (
+            column.data_type
+            and _KEY_COLUMN_DATA_TYPE_PATTERN.match(str(column.data_type))
+        )
+    )
+
+
+def build_column_index(table) -> BM25Index:
+    """Build the BM25 index of the columns of a table, keyed by column name."""
+    return BM25Index(
+        (
+            (
+                column.name,
+                {
+                    "name": tokenize(column.name),
+                    "comment": tokenize(column.comment),
+                },
+            )
+            for column in table.columns.values()
+        ),
+        COLUMN_FIELD_WEIGHTS,
+    )
+
+
+def select_relevant_columns(
+    table,
+    question: str,
+    max_columns: int,
+    column_index: Optional[BM25Index] = None,
+) -> Optional[List[str]]:
+    """Return the names of the columns of the table to render for the question, in table order:
+    the max_columns columns most relevant to the question and the key columns.
+    Returns None if the table has no more than max_columns columns, i.e. nothing is pruned.
+    """
+    if len(table.columns) <= max_columns:
+        return None
+    if column_index is None:
+        column_index = build_column_index(table)
+    selected = {name for name, _ in column_index.search(question, max_columns)}
+    selected.update(
+        column.name for column in table.columns.values() if is_key_column(column)
+    )
+    return [name for name in table.columns if name in selected]
@@ -0,0 +1,57 @@
+"""
+content_hash.py
+This file contains the content hashes of the catalog: a sha256 hash of the parsed metadata of each table,
+and of the whole catalog, which change exactly when the metadata they cover changes.
+
+Caches of anything derived from the metadata, e.g. the rendered metadata of a table or a response of the
+API, can key on them instead of being flushed whenever the catalog is reloaded or annotated.
+
+The hash of a table is built from the hash of its columns, which the indexed and SQLite catalogs store
+at build time, so that the hashes of their lazily loaded tables are known without loading them.
+"""
+import hashlib
+import json
+from typing import Any, Iterable, Mapping, Optional, Sequence
+
+
+def _sha256_json(value: Any) -> str:
+    return hashlib.sha256(
+        json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode(
+            "utf-8"
+        )
+    ).hexdigest()
+
+
+def hash_columns(columns: Iterable[Any]) -> str:
+    """Return the hash of the parsed name, data type, comment, sample values and value domain of the columns."""
+    return _sha256_json(
+        [
+            [
+                column.name,
+                column.data_type,
+                column.comment,
+                column.sample_values_list,
+                column.domain,
+            ]
+            for column in columns
+        ]
+    )
+
+
+def hash_table(
+    long_name: str,
+    comment: Optional[str],
+    summary: Optional[str],
+    column_names: Sequence[str],
+    columns_hash: str,
+) -> str:
+    """Return the content hash of a table from its header and the hash of its columns, see hash_columns."""
+    return _sha256_json([long_name, comment, summary, list(column_names), columns_hash])
+
+
+def combine_hashes(hashes: Mapping[str, str]) -> str:
+    """Return a hash of the content hashes of named items, e.g. the tables of a catalog, in any order."""
+    sha256 = hashlib.sha256()
+    for name in sorted(hashes):
+        sha256.update(f"{name}\0{hashes[name]}\n".encode("utf-8"))
+    return sha256.hexdigest()
@@ -0,0 +1,223 @@
+"""
+ddl_tokenizer.py
+This file contains a single-pass tokenizer for the column list of CREATE TABLE / GET_DDL statements.
+
+Instead of searching the whole statement once per column, the column list is scanned once
+and turned into a {column_name: (data_type, comment)} dictionary, e.g.
+
+    CREATE TABLE ETHEREUM.CORE.FACT_BLOCKS (
+        BLOCKCHAIN
+        VARCHAR(8)
+        COMMENT 'The blockchain on which transactions are being confirmed.', BLOCK_NUMBER
+        NUMBER(38,0)
+        COMMENT 'Also known as block height.'
+    )
+
+is parsed into
+    {
+        "blockchain": ("VARCHAR(8)", "The blockchain on which transactions are being confirmed."),
+        "block_number": ("NUMBER(38,0)", "Also known as block height."),
+    }
+
+Views returned by GET_DDL have no data types, in which case the data type is None.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+# keywords that end the data type part of a column definition
+_TYPE_TERMINATING_KEYWORDS = {
+    "autoincrement",
+    "check",
+    "collate",
+    "comment",
+    "constraint",
+    "default",
+    "identity",
+    "masking",
+    "not",
+    "null",
+    "primary",
+    "references",
+    "tag",
+    "unique",
+    "with",
+}
+
+# keywords that start an out-of-line constraint instead of a column definition
+_TABLE_CONSTRAINT_KEYWORDS = {"check", "constraint", "foreign", "primary", "unique"}
+
+_WORD_DELIMITERS = set(" \t\r\n,()'\"")
+
+_AS_KEYWORD_PATTERN = re.compile(r"\bas\b", re.IGNORECASE)
+
+# token kinds
+_WORD = "word"
+_STRING = "string"
+_GROUP = "group"
+
+ColumnDefinitions = Dict[str, Tuple[Optional[str], Optional[str]]]
+
+
+def _is_string_end(ddl: str, index: int) -> bool:
+    """Whether the quote at ddl[index] closes a string literal.
+    The CREATE TABLE statements in the context files do not escape quotes inside comments,
+    e.g. 'Block size, which is determined by a given block's gas limit.', so a quote only
+    closes a string when it is followed by the end of the column definition."""
+    n = len(ddl)
+    i = index + 1
+    while i < n and ddl[i] in " \t\r\n":
+        i += 1
+    return i == n or ddl[i] in ",)"
+
+
+def _read_string(ddl: str, start: int) -> Tuple[str, int]:
+    """Read a single-quoted string literal starting at ddl[start] == "'".
+    Doubled quotes ('') are unescaped, backslash escapes are kept as they are.
+    Returns the string content and the index right after the closing quote."""
+    chunks = []
+    i = start + 1
+    n = len(ddl)
+    chunk_start = i
+    while i < n:
+        ch = ddl[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "'":
+            if i + 1 < n and ddl[i + 1] == "'":
+                chunks.append(ddl[chunk_start : i + 1])
+                i += 2
+                chunk_start = i
+                continue
+            if _is_string_end(ddl, i):
+                chunks.append(ddl[chunk_start:i])
+                return "".join(chunks), i + 1
+        i += 1
+    chunks.append(ddl[chunk_start:n])
+    return "".join(chunks), n
+
+
+def _read_group(ddl: str, start: int) -> Tuple[str, int]:
+    """Read a parenthesized group such as (38,0) starting at ddl[start] == "(".
+    Returns the group text with whitespace removed and the index right after it."""
+    depth = 0
+    i = start
+    n = len(ddl)
+    while i < n:
+        ch = ddl[i]
+        if ch == "'":
+            _, i = _read_string(ddl, i)
+            continue
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                return "".join(ddl[start : i + 1].split()), i + 1
+        i += 1
+    return "".join(ddl[start:n].split()), n
+
+
+def _build_column_definition(
+    tokens: List[Tuple[str, str]]
+) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+    """Turn the tokens of one column definition into (name, data_type, comment)."""
+    if not tokens or tokens[0][0] != _WORD:
+        return None
+    name = tokens[0][1]
+    if name.lower() in _TABLE_CONSTRAINT_KEYWORDS:
+        return None
+
+    data_type_parts: List[str] = []
+    comment = None
+    in_data_type = True
+    for index in range(1, len(tokens)):
+        kind, text = tokens[index]
+        if kind == _WORD and text.lower() in _TYPE_TERMINATING_KEYWORDS:
+            in_data_type = False
+            if (
+                text.lower() == "comment"
+                and index + 1 < len(tokens)
+                and tokens[index + 1][0] == _STRING
+            ):
+                comment = tokens[index + 1][1]
+            continue
+        if not in_data_type:
+            continue
+        if kind == _GROUP and data_type_parts:
+            # attach type parameters to the type name, e.g. NUMBER(38,0)
+            data_type_parts[-1] += text
+        elif kind != _STRING:
+            data_type_parts.append(text)
+
+    data_type = " ".join(data_type_parts) if data_type_parts else None
+    return name.lower(), data_type, comment
+
+
+def _find_column_list_start(ddl: str) -> int:
+    """Return the index of the parenthesis opening the column list, or -1 if there is none.
+    Groups belonging to a clause, e.g. "cluster by (block_timestamp::DATE)", are skipped.
+    """
+    start = ddl.find("(")
+    while start != -1:
+        # statements without a column list, e.g. "create view X as (select ...)"
+        if _AS_KEYWORD_PATTERN.search(ddl, 0, start):
+            return -1
+        preceding_words = ddl[:start].split()
+        if not preceding_words or preceding_words[-1].lower() != "by":
+            return start
+        _, end = _read_group(ddl, start)
+        start = ddl.find("(", end)
+    return start
+
+
+def parse_column_definitions(ddl: Optional[str]) -> ColumnDefinitions:
+    """Parse the column list of a CREATE TABLE or GET_DDL statement in a single pass.
+
+    Returns a dictionary mapping the lower-cased column names to (data_type, comment) tuples.
+    Either element is None when it is not present in the statement.
+    """
+    column_definitions: ColumnDefinitions = {}
+    if not ddl:
+        return column_definitions
+
+    start = _find_column_list_start(ddl)
+    if start == -1:
+        return column_definitions
+
+    tokens: List[Tuple[str, str]] = []
+    i = start + 1
+    n = len(ddl)
+    while i < n:
+        ch = ddl[i]
+        if ch in " \t\r\n":
+            i += 1
+        elif ch == "," or ch == ")":
+            column_definition = _build_column_definition(tokens)
+            if column_definition is not None:
+                name, data_type, comment = column_definition
+                column_definitions[name] = (data_type, comment)
+            tokens = []
+            i += 1
+            if ch == ")":
+                # end of the column list
+                break
+        elif ch == "'":
+            text, i = _read_string(ddl, i)
+            tokens.append((_STRING, text))
+        elif ch == '"':
+            end = ddl.find('"', i + 1)
+            end = n if end == -1 else end
+            tokens.append((_WORD, ddl[i + 1 : end]))
+            i = end + 1
+        elif ch == "(":
+            text, i = _read_group(ddl, i)
+            tokens.append((_GROUP, text))
+        else:
+            j = i
+            while j < n and ddl[j] not in _WORD_DELIMITERS:
+                j += 1
+            tokens.append((_WORD, ddl[i:j]))
+            i = j
+
+    return column_definitions
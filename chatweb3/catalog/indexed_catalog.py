@@ -0,0 +1,211 @@
+"""
+indexed_catalog.py
+This file contains the offset-indexed catalog file, which lets MetadataParser start with only the
+table names, comments and column names, and load the full metadata of a table on first access.
+
+The file is laid out as
+    CHATWEB3-CATALOG <version>\\n
+    <header length in bytes>\\n
+    <header>: JSON object with the fingerprint of the size and modification time of the context
+              file, so that checking it at startup does not read the file, and, for each table long name,
+              the table names, comment, summary, column names, the hash of its parsed columns (see
+              chatweb3.catalog.content_hash) and the offset/length of its entry
+    <entries>: one JSON object per table, in the format of Table.to_dict()
+
+The entries are read through a memory map, so that only the tables which are actually requested
+are read and parsed.
+
+Build the catalog for the configured context file with:
+    python -m chatweb3.catalog.indexed_catalog
+"""
+import argparse
+import json
+import mmap
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from chatweb3.catalog.snapshot import (
+    atomic_write_file,
+    compute_source_stat_fingerprint,
+)
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+INDEXED_CATALOG_MAGIC = b"CHATWEB3-CATALOG"
+
+# Bump this whenever the layout of the header or of the table entries changes
+INDEXED_CATALOG_VERSION = 2
+
+
+def write_indexed_catalog(
+    root_schema_obj: Any,
+    catalog_file_path: str,
+    source_file_paths: Optional[List[Optional[str]]] = None,
+) -> None:
+    """Write the tables of a parsed root schema object to an offset-indexed catalog file.
+    source_file_paths are the context files the catalog is built from, see load_indexed_catalog.
+    """
+    header: Dict[str, Any] = {
+        "version": INDEXED_CATALOG_VERSION,
+        "fingerprint": compute_source_stat_fingerprint(source_file_paths)
+        if source_file_paths is not None
+        else None,
+        "tables": {},
+    }
+    entries = []
+    offset = 0
+    for database in root_schema_obj.databases.values():
+        for schema in database.schemas.values():
+            for table in schema.tables.values():
+                entry = json.dumps(table.to_dict()).encode("utf-8")
+                header["tables"][table.long_name] = {
+                    "database_name": table.database_name,
+                    "schema_name": table.schema_name,
+                    "name": table.name,
+                    "comment": table.comment,
+                    "summary": table.summary,
+                    "column_names": table.column_names,
+                    "columns_hash": table.columns_hash,
+                    "offset": offset,
+                    "length": len(entry),
+                }
+                entries.append(entry)
+                offset += len(entry)
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    def write(f):
+        f.write(INDEXED_CATALOG_MAGIC + f" {INDEXED_CATALOG_VERSION}\n".encode())
+        f.write(f"{len(header_bytes)}\n".encode())
+        f.write(header_bytes)
+        for entry in entries:
+            f.write(entry)
+
+    atomic_write_file(catalog_file_path, write)
+    logger.info(
+        f"Saved indexed catalog with {len(entries)} tables to {catalog_file_path}"
+    )
+
+
+class IndexedCatalog:
+    """Read-only access to an offset-indexed catalog file."""
+
+    def __init__(self, catalog_file_path: str):
+        self.catalog_file_path = catalog_file_path
+        with open(catalog_file_path, "rb") as f:
+            magic_line = f.readline().split()
+            if (
+                len(magic_line) != 2
+                or magic_line[0] != INDEXED_CATALOG_MAGIC
+                or int(magic_line[1]) != INDEXED_CATALOG_VERSION
+            ):
+                raise ValueError(
+                    f"{catalog_file_path} is not an indexed catalog of version {INDEXED_CATALOG_VERSION}"
+                )
+            header_length = int(f.readline())
+            header = json.loads(f.read(header_length))
+            self._entries_offset = f.tell()
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.fingerprint: Optional[str] = header["fingerprint"]
+        # table long name -> names, comment, summary, column names, columns hash, offset and length of the entry
+        table_headers: Dict[str, Dict[str, Any]] = header["tables"]
+        self._table_headers: Optional[Dict[str, Dict[str, Any]]] = table_headers
+        # table long name -> (offset, length) of the entry
+        self._entry_ranges: Dict[str, Tuple[int, int]] = {
+            table_long_name: (table_header["offset"], table_header["length"])
+            for table_long_name, table_header in table_headers.items()
+        }
+
+    def __len__(self):
+        return len(self._entry_ranges)
+
+    def __contains__(self, table_long_name):
+        return table_long_name in self._entry_ranges
+
+    def pop_table_headers(self) -> Dict[str, Dict[str, Any]]:
+        """Return the table headers and release them, they are only needed to create the lazily loaded tables."""
+        table_headers, self._table_headers = self._table_headers, None
+        if table_headers is None:
+            raise ValueError("The table headers were already popped")
+        return table_headers
+
+    def read_table(self, table_long_name: str) -> Dict[str, Any]:
+        """Return the entry of a table, in the format of Table.to_dict()."""
+        offset, length = self._entry_ranges[table_long_name]
+        start = self._entries_offset + offset
+        entry: Dict[str, Any] = json.loads(self._mmap[start : start + length])
+        return entry
+
+    def close(self):
+        self._mmap.close()
+
+
+def load_indexed_catalog(
+    catalog_file_path: str, source_file_paths: Optional[List[Optional[str]]] = None
+) -> Optional[IndexedCatalog]:
+    """Open an indexed catalog file.
+    Returns None if the file does not exist, was written by a different version, or was built from
+    other source files than source_file_paths (when given), so that the caller can fall back to the JSON path.
+    """
+    if not os.path.exists(catalog_file_path):
+        logger.debug(f"Indexed catalog {catalog_file_path} does not exist")
+        return None
+
+    try:
+        indexed_catalog = IndexedCatalog(catalog_file_path)
+    except Exception as e:
+        logger.warning(f"Unable to load indexed catalog {catalog_file_path}: {e}")
+        return None
+
+    if (
+        source_file_paths is not None
+        and indexed_catalog.fingerprint
+        != compute_source_stat_fingerprint(source_file_paths)
+    ):
+        logger.warning(
+            f"Indexed catalog {catalog_file_path} is stale, ignoring it. Rebuild it with `python -m chatweb3.catalog.indexed_catalog`"
+        )
+        indexed_catalog.close()
+        return None
+
+    logger.debug(
+        f"Loaded indexed catalog {catalog_file_path} with {len(indexed_catalog)} tables"
+    )
+    return indexed_catalog
+
+
+def main():
+    # delay imports so that loading the catalog does not pull in the config and parser
+    from chatweb3.catalog.chain_registry import chain_catalog_from_config
+    from chatweb3.metadata_parser import MetadataParser
+    from config.config import agent_config
+
+    parser = argparse.ArgumentParser(
+        description="Build the offset-indexed metadata catalog from a context file"
+    )
+    parser.add_argument(
+        "--chain",
+        default=agent_config.get("database.default_database"),
+        help="Chain of the chains section of config.yaml whose files are the defaults of the paths below",
+    )
+    parser.add_argument(
+        "--context-file",
+        help="Path of the context JSON file",
+    )
+    parser.add_argument(
+        "--output",
+        help="Path of the indexed catalog file to write",
+    )
+    args = parser.parse_args()
+    chain_catalog = chain_catalog_from_config(agent_config, args.chain)
+    args.context_file = args.context_file or chain_catalog.context_file
+    args.output = args.output or chain_catalog.indexed_catalog_file
+
+    metadata_parser = MetadataParser(file_path=args.context_file)
+    write_indexed_catalog(
+        metadata_parser.root_schema_obj, args.output, [args.context_file]
+    )
+
+
+if __name__ == "__main__":
+    main()
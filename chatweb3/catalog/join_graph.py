@@ -0,0 +1,365 @@
+"""
+join_graph.py
+This file contains the join graph of the metadata catalog, which links the tables that share join key
+columns, so that the agent gets the join keys of a multi-table question in one local lookup instead of
+checking the metadata of every table and guessing them.
+
+The join keys of a table are its identifier columns, found by their names:
+    - hashes, ids, addresses, indexes and numbers, e.g. tx_hash, contract_address, event_index,
+      block_number, but not the origin_* columns of the transaction nor the internal _* columns
+    - qualifiers, which narrow down the join on another key: the tokenid of an NFT collection, and
+      the hour or date of hourly or daily tables
+Two tables are linked by the key columns of the same name and compatible data types, and by the
+EQUIVALENT_JOIN_KEYS, e.g. the token_address of the prices and the contract_address of the transfers,
+or the token_in and token_out of the swaps.
+Lazily loaded tables of an indexed catalog are linked by their column names only, so that building
+the graph does not load every table.
+The graph only indexes the tables of each join key column, the join keys of two tables are found when
+they are looked up: most tables share keys such as block_number or tx_hash, so storing the links would
+take memory in the square of the number of tables.
+"""
+import heapq
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# rank of each kind of join key, the most selective first
+_JOIN_KEY_RANKS = {
+    "hash": 0,
+    "id": 1,
+    "address": 2,
+    "tokenid": 3,
+    "index": 4,
+    "number": 5,
+    "hour": 6,
+    "date": 6,
+}
+_QUALIFIER_KEYS = {"tokenid", "hour", "date"}
+_JOIN_KEY_PATTERN = re.compile(r"(^|_)(" + "|".join(_JOIN_KEY_RANKS) + r")$")
+# the origin_* columns are attributes of the transaction, joins go through its tx_hash;
+# the id columns of different tables are unrelated surrogate keys
+_EXCLUDED_JOIN_KEY_PATTERN = re.compile(r"^(_|origin_|id$)")
+
+# the tables whose contract_address is the token contract: the token transfers and balances,
+# and the event logs, emitted by the token for its transfers. Elsewhere it is e.g. the pool of a
+# swap or the lending protocol
+_TOKEN_CONTRACT_TABLE_PATTERN = re.compile(
+    r"(transfers|balances|balance_deltas|event_logs)$"
+)
+
+# (key, column of another name holding the same values, SQL expression of that column's side,
+# pattern of the names of the tables of that column it holds for, None for all tables)
+EQUIVALENT_JOIN_KEYS = [
+    ("token_address", "contract_address", "{}", _TOKEN_CONTRACT_TABLE_PATTERN),
+    # the tokens a swap sells and buys
+    ("token_address", "token_in", "{}", None),
+    ("token_address", "token_out", "{}", None),
+    ("address", "contract_address", "{}", None),
+    ("address", "nft_address", "{}", None),
+    ("hour", "block_timestamp", "date_trunc('hour', {})", None),
+]
+_EQUIVALENT_COLUMNS = {
+    column_name
+    for key, other_column, _, _ in EQUIVALENT_JOIN_KEYS
+    for column_name in (key, other_column)
+}
+
+_DATA_TYPE_FAMILIES = [
+    (
+        re.compile(r"^(number|numeric|decimal|int|bigint|smallint|float|double|real)"),
+        "number",
+    ),
+    (re.compile(r"^(varchar|char|string|text)"), "string"),
+    (re.compile(r"^(date|time|timestamp)"), "time"),
+]
+
+MAX_JOIN_PATHS = 3
+MAX_JOIN_PATH_HOPS = 2
+# pairs of tables whose join keys are kept, see JoinGraph.join_keys
+JOIN_KEYS_CACHE_SIZE = 4096
+
+
+class JoinKey(NamedTuple):
+    """A join condition between a column of a table and a column of another table."""
+
+    column: str
+    other_column: str
+    # SQL expressions of each side, with {} for the qualified column
+    expression: str = "{}"
+    other_expression: str = "{}"
+
+    @property
+    def kind(self) -> str:
+        """The kind of the key, e.g. hash or address, from the name of the side that matches one."""
+        match = _JOIN_KEY_PATTERN.search(self.column) or _JOIN_KEY_PATTERN.search(
+            self.other_column
+        )
+        return match.group(2) if match else ""
+
+    @property
+    def rank(self) -> int:
+        return _JOIN_KEY_RANKS.get(self.kind, len(_JOIN_KEY_RANKS))
+
+    @property
+    def is_qualifier(self) -> bool:
+        return self.kind in _QUALIFIER_KEYS
+
+    def reversed(self) -> "JoinKey":
+        return JoinKey(
+            self.other_column, self.column, self.other_expression, self.expression
+        )
+
+    def condition(self, table_name: str, other_table_name: str) -> str:
+        return (
+            f"{self.expression.format(f'{table_name}.{self.column}')} = "
+            f"{self.other_expression.format(f'{other_table_name}.{self.other_column}')}"
+        )
+
+
+def join_paths_need_two_tables(table_long_names: Sequence[str]) -> str:
+    """The answer of the join paths lookup for fewer than two tables."""
+    return (
+        "At least two tables are needed to find the join paths between them, got: "
+        f"{', '.join(table_long_names) or 'no table'}."
+    )
+
+
+def is_join_key(column_name: str) -> bool:
+    return bool(
+        _JOIN_KEY_PATTERN.search(column_name)
+        and not _EXCLUDED_JOIN_KEY_PATTERN.match(column_name)
+    )
+
+
+def _data_type_family(data_type: Optional[str]) -> Optional[str]:
+    """Return the family of a data type, None if it is unknown."""
+    if not data_type:
+        return None
+    for pattern, family in _DATA_TYPE_FAMILIES:
+        if pattern.match(data_type.lower()):
+            return family
+    return data_type.lower()
+
+
+def _compatible(family: Optional[str], other_family: Optional[str]) -> bool:
+    return family is None or other_family is None or family == other_family
+
+
+def _table_columns(table) -> Dict[str, Optional[str]]:
+    """Return the data type family of each column of a table, unknown for lazily loaded tables."""
+    if table._loader is not None:
+        # the columns of a lazily loaded table are only read when it is hydrated
+        return {name: None for name in table.column_names}
+    return {
+        column.name: _data_type_family(column.data_type)
+        for column in table.columns.values()
+    }
+
+
+class JoinGraph:
+    """Graph of the tables of a catalog, keyed by their long names, linked by their shared join keys.
+    Only the tables of each join key column are indexed; the join keys of two tables are found when
+    they are looked up, so that the graph grows with the tables rather than with the pairs of tables
+    sharing a common key such as block_number.
+    """
+
+    def __init__(self, tables: Iterable, max_cached_pairs: int = JOIN_KEYS_CACHE_SIZE):
+        # table long name -> its join key columns -> their data type families
+        self._columns: Dict[str, Dict[str, Optional[str]]] = {}
+        # join key column -> long names of the tables holding it
+        self._tables_by_column: Dict[str, List[str]] = defaultdict(list)
+        for table in tables:
+            columns = {
+                column_name: family
+                for column_name, family in _table_columns(table).items()
+                if is_join_key(column_name) or column_name in _EQUIVALENT_COLUMNS
+            }
+            if not columns:
+                continue
+            self._columns[table.long_name] = columns
+            for column_name in columns:
+                self._tables_by_column[column_name].append(table.long_name)
+        self._join_key_columns = {
+            column_name
+            for column_name in self._tables_by_column
+            if is_join_key(column_name)
+        }
+        self.max_cached_pairs = max_cached_pairs
+        # (table long name, other table long name) -> join keys, the oldest first
+        self._join_keys_cache: Dict[Tuple[str, str], List[JoinKey]] = {}
+        self._lock = threading.Lock()
+        logger.debug(
+            f"Built join graph with {len(self)} tables and {len(self._tables_by_column)} join key columns"
+        )
+
+    def __len__(self):
+        """The number of tables with join key columns."""
+        return len(self._columns)
+
+    def join_keys(
+        self, table_long_name: str, other_table_long_name: str
+    ) -> List[JoinKey]:
+        """Return the join keys between two tables, the most selective first."""
+        key = (table_long_name, other_table_long_name)
+        with self._lock:
+            join_keys = self._join_keys_cache.get(key)
+        if join_keys is None:
+            join_keys = self._find_join_keys(table_long_name, other_table_long_name)
+            with self._lock:
+                if len(self._join_keys_cache) >= self.max_cached_pairs:
+                    # evict the oldest entry
+                    del self._join_keys_cache[next(iter(self._join_keys_cache))]
+                self._join_keys_cache[key] = join_keys
+        return join_keys
+
+    def _find_join_keys(
+        self, table_long_name: str, other_table_long_name: str
+    ) -> List[JoinKey]:
+        if table_long_name == other_table_long_name:
+            return []
+        columns = self._columns.get(table_long_name, {})
+        other_columns = self._columns.get(other_table_long_name, {})
+        join_keys = [
+            JoinKey(column_name, column_name)
+            for column_name, family in columns.items()
+            if column_name in self._join_key_columns
+            and column_name in other_columns
+            and _compatible(family, other_columns[column_name])
+        ]
+        for key, other_column, other_expression, table_pattern in EQUIVALENT_JOIN_KEYS:
+            # the table holds the key, the other table the column of another name
+            if (
+                key in columns
+                and other_column in other_columns
+                and (
+                    table_pattern is None
+                    or table_pattern.search(other_table_long_name)
+                )
+                and _compatible(columns[key], other_columns[other_column])
+            ):
+                join_keys.append(JoinKey(key, other_column, "{}", other_expression))
+            # and the other way around
+            if (
+                key in other_columns
+                and other_column in columns
+                and (table_pattern is None or table_pattern.search(table_long_name))
+                and _compatible(other_columns[key], columns[other_column])
+            ):
+                join_keys.append(
+                    JoinKey(key, other_column, "{}", other_expression).reversed()
+                )
+        join_keys.sort(key=lambda join_key: (join_key.rank, join_key.column))
+        return join_keys
+
+    def _linked_tables(self, table_long_name: str) -> List[str]:
+        """Return the long names of the tables sharing a join key with the table."""
+        columns = self._columns.get(table_long_name, {})
+        # dict rather than set, so that the tables are in a stable order
+        linked_tables: Dict[str, None] = {}
+
+        def link(family, other_column, table_pattern=None):
+            for other_table_long_name in self._tables_by_column.get(other_column, []):
+                if (
+                    other_table_long_name != table_long_name
+                    and (
+                        table_pattern is None
+                        or table_pattern.search(other_table_long_name)
+                    )
+                    and _compatible(
+                        family, self._columns[other_table_long_name][other_column]
+                    )
+                ):
+                    linked_tables[other_table_long_name] = None
+
+        for column_name, family in columns.items():
+            if column_name in self._join_key_columns:
+                link(family, column_name)
+        for key, other_column, _, table_pattern in EQUIVALENT_JOIN_KEYS:
+            if key in columns:
+                link(columns[key], other_column, table_pattern)
+            if other_column in columns and (
+                table_pattern is None or table_pattern.search(table_long_name)
+            ):
+                link(columns[other_column], key)
+        return list(linked_tables)
+
+    def _link_cost(self, table_long_name: str, other_table_long_name: str) -> int:
+        return self.join_keys(table_long_name, other_table_long_name)[0].rank
+
+    def find_paths(
+        self,
+        table_long_name: str,
+        other_table_long_name: str,
+        max_paths: int = MAX_JOIN_PATHS,
+        max_hops: int = MAX_JOIN_PATH_HOPS,
+        table_long_names: Optional[Iterable[str]] = None,
+    ) -> List[List[str]]:
+        """Return up to max_paths of the shortest paths of at most max_hops links between two tables,
+        the ones with the most selective join keys first. If table_long_names is given, the paths only
+        go through these tables.
+        """
+        if table_long_name == other_table_long_name:
+            return []
+        allowed = set(table_long_names) if table_long_names is not None else None
+        paths: List[List[str]] = [[table_long_name]]
+        for hop in range(max_hops):
+            found = []
+            extended = []
+            for path in paths:
+                if hop == max_hops - 1:
+                    # the paths are not extended past the last hop, only checked for a link to the other table
+                    if self._find_join_keys(path[-1], other_table_long_name):
+                        found.append(path + [other_table_long_name])
+                    continue
+                for linked_table in self._linked_tables(path[-1]):
+                    if linked_table in path:
+                        continue
+                    if linked_table == other_table_long_name:
+                        found.append(path + [linked_table])
+                    elif allowed is None or linked_table in allowed:
+                        extended.append(path + [linked_table])
+            if found:
+                return heapq.nsmallest(
+                    max_paths,
+                    found,
+                    key=lambda path: (
+                        sum(self._link_cost(a, b) for a, b in zip(path, path[1:])),
+                        path,
+                    ),
+                )
+            paths = extended
+        return []
+
+    def describe_path(self, path: Sequence[str]) -> str:
+        """Describe a join path as a FROM clause, e.g.
+        a JOIN b ON a.tx_hash = b.tx_hash (other keys: a.block_number = b.block_number)
+        Each link is joined on its most selective key and its qualifiers, e.g. the hour of hourly tables.
+        """
+        clauses = [path[0]]
+        for table_long_name, other_table_long_name in zip(path, path[1:]):
+            table_name = table_long_name.split(".")[-1]
+            other_table_name = other_table_long_name.split(".")[-1]
+            keys = self.join_keys(table_long_name, other_table_long_name)
+            conditions = [keys[0]]
+            if not keys[0].is_qualifier:
+                conditions.extend(key for key in keys[1:] if key.is_qualifier)
+            clause = f"JOIN {other_table_long_name} ON " + " AND ".join(
+                key.condition(table_name, other_table_name) for key in conditions
+            )
+            other_keys = [key for key in keys if key not in conditions]
+            if other_keys:
+                clause += (
+                    " (other keys: "
+                    + ", ".join(
+                        key.condition(table_name, other_table_name)
+                        for key in other_keys
+                    )
+                    + ")"
+                )
+            clauses.append(clause)
+        return "\n\t".join(clauses)
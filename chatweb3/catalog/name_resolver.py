@@ -0,0 +1,158 @@
+"""
+name_resolver.py
+This file contains the table name resolver, which maps the table names the agent asks for to the
+long names of the catalog, so that a typo such as ethereum.core.ez_dex_swap or a wrong schema is
+corrected locally instead of falling back to a Snowflake lookup.
+
+The long names and the table names of the catalog are kept in tries, searched for the names within
+an edit distance of the requested name. A name that is not in the catalog is
+    - corrected if a single table is the closest one within MAX_EDIT_DISTANCE edits, counting a
+      table of the same name in another schema as one edit
+    - otherwise answered with up to MAX_SUGGESTIONS suggestions, the closest first
+    - otherwise left unresolved, e.g. for a table that is only in Snowflake
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+MAX_EDIT_DISTANCE = 2
+MAX_SUGGESTIONS = 3
+
+
+class _TrieNode:
+    __slots__ = ("children", "values")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        # the long names of the tables whose key ends at this node
+        self.values: List[str] = []
+
+
+class _Trie:
+    """Trie of keys, searched for the keys within an edit distance of a word."""
+
+    def __init__(self):
+        self._root = _TrieNode()
+
+    def add(self, key: str, value: str):
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+        node.values.append(value)
+
+    def search(self, word: str, max_distance: int) -> Dict[str, int]:
+        """Return the values of the keys within max_distance edits of word, with their distance."""
+        results: Dict[str, int] = {}
+        first_row = list(range(len(word) + 1))
+        # depth first over the trie, each node with the Levenshtein row of its prefix
+        stack = [
+            (child, char, first_row) for char, child in self._root.children.items()
+        ]
+        while stack:
+            node, char, previous_row = stack.pop()
+            row = [previous_row[0] + 1]
+            for i, word_char in enumerate(word, start=1):
+                row.append(
+                    min(
+                        row[i - 1] + 1,
+                        previous_row[i] + 1,
+                        previous_row[i - 1] + (word_char != char),
+                    )
+                )
+            if row[-1] <= max_distance:
+                for value in node.values:
+                    if row[-1] < results.get(value, max_distance + 1):
+                        results[value] = row[-1]
+            # the distance of longer keys is at least the minimum of the row
+            if min(row) <= max_distance:
+                stack.extend(
+                    (child, child_char, row)
+                    for child_char, child in node.children.items()
+                )
+        return results
+
+
+class TableNameResolution(NamedTuple):
+    """The resolution of a requested table name."""
+
+    name: str
+    # the long name of the catalog table, None if it could not be resolved
+    long_name: Optional[str]
+    # the closest long names, if it could not be resolved
+    suggestions: List[str]
+
+    @property
+    def corrected(self) -> bool:
+        return self.long_name is not None and self.long_name != self.name
+
+    def describe(self) -> str:
+        """Describe a corrected or unresolved name to the agent, an empty string if it was found."""
+        if self.corrected:
+            return f"Note: table '{self.name}' does not exist, showing '{self.long_name}' instead."
+        if self.long_name is not None:
+            return ""
+        if self.suggestions:
+            return (
+                f"Note: table '{self.name}' does not exist, did you mean one of: "
+                f"{', '.join(self.suggestions)}?"
+            )
+        return f"Note: table '{self.name}' does not exist."
+
+
+def _normalize(name: str) -> str:
+    return name.strip().strip("'\"`").strip().lower()
+
+
+class TableNameResolver:
+    """Resolver of requested table names to the long names of a catalog, see resolve()."""
+
+    def __init__(self, table_long_names: Iterable[str]):
+        self._long_names = set()
+        self._long_name_trie = _Trie()
+        # the table names without their database and schema, for names with a wrong or no schema
+        self._table_name_trie = _Trie()
+        for long_name in table_long_names:
+            self._long_names.add(long_name)
+            self._long_name_trie.add(long_name, long_name)
+            self._table_name_trie.add(long_name.split(".")[-1], long_name)
+
+    def __len__(self):
+        return len(self._long_names)
+
+    @staticmethod
+    def _max_distance(name: str) -> int:
+        # fewer edits of short names, otherwise any short name is close to every other one
+        return min(MAX_EDIT_DISTANCE, len(name) // 4)
+
+    def _candidates(self, name: str, max_distance: int) -> Dict[str, int]:
+        """Return the long names within max_distance of name, with their distance."""
+        candidates = self._long_name_trie.search(name, max_distance)
+        prefix, _, table_name = name.rpartition(".")
+        # a table of a close name in another schema is one more edit away
+        for long_name, distance in self._table_name_trie.search(
+            table_name, max_distance
+        ).items():
+            if prefix and not long_name.startswith(f"{prefix}."):
+                distance += 1
+            if distance <= max_distance and distance < candidates.get(
+                long_name, max_distance + 1
+            ):
+                candidates[long_name] = distance
+        return candidates
+
+    def resolve(self, name: str) -> TableNameResolution:
+        """Resolve a requested table name, see the module docstring."""
+        name = _normalize(name)
+        if name in self._long_names:
+            return TableNameResolution(name, name, [])
+        max_distance = self._max_distance(name.rpartition(".")[2])
+        # suggestions may be one edit further than corrections
+        candidates = self._candidates(name, max_distance + 1)
+        ranked = sorted(
+            candidates, key=lambda long_name: (candidates[long_name], long_name)
+        )
+        if ranked and candidates[ranked[0]] <= max_distance:
+            if len(ranked) == 1 or candidates[ranked[1]] > candidates[ranked[0]]:
+                return TableNameResolution(name, ranked[0], [])
+        return TableNameResolution(name, None, ranked[:MAX_SUGGESTIONS])
+
+    def resolve_all(self, names: Sequence[str]) -> List[TableNameResolution]:
+        return [self.resolve(name) for name in names if name.strip()]
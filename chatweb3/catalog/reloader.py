@@ -0,0 +1,89 @@
+"""
+reloader.py
+This file contains the watcher that reloads the metadata catalog when its source files change.
+
+The watcher polls the modification times of the context, annotation, snapshot and indexed catalog
+files in a daemon thread, and calls SnowflakeContainer.reload_metadata() when any of them changes.
+The new catalog is built in the watcher thread and swapped in once it is complete, so that tool
+calls keep being served from the previous catalog in the meantime.
+"""
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def get_file_mtimes(file_paths: List[Optional[str]]) -> Dict[str, Optional[float]]:
+    """Return the modification time of each file, None for files that do not exist."""
+    mtimes: Dict[str, Optional[float]] = {}
+    for file_path in file_paths:
+        if file_path is None:
+            continue
+        try:
+            mtimes[file_path] = os.stat(file_path).st_mtime
+        except OSError:
+            mtimes[file_path] = None
+    return mtimes
+
+
+class CatalogWatcher:
+    """Poll the modification times of the catalog source files and call reload when they change."""
+
+    def __init__(
+        self,
+        file_paths: List[Optional[str]],
+        reload: Callable[[], object],
+        poll_interval: float = 5.0,
+    ):
+        self.file_paths = file_paths
+        self.reload = reload
+        self.poll_interval = poll_interval
+        self._mtimes = get_file_mtimes(file_paths)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        """Reload the catalog if any of the files changed since the last check.
+        Returns whether a reload was triggered."""
+        mtimes = get_file_mtimes(self.file_paths)
+        if mtimes == self._mtimes:
+            return False
+        changed_file_paths = [
+            file_path
+            for file_path, mtime in mtimes.items()
+            if self._mtimes.get(file_path) != mtime
+        ]
+        logger.info(f"Metadata files changed: {changed_file_paths}, reloading catalog")
+        # update the mtimes first, so that a failing reload is not retried on every poll
+        self._mtimes = mtimes
+        try:
+            self.reload()
+        except Exception as e:
+            logger.error(f"Unable to reload the metadata catalog: {e}")
+        return True
+
+    def _run(self):
+        while not self._stop_event.wait(self.poll_interval):
+            self.check()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="catalog-watcher", daemon=True
+        )
+        self._thread.start()
+        logger.debug(
+            f"Watching {self.file_paths} for changes every {self.poll_interval}s"
+        )
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
@@ -0,0 +1,238 @@
+"""
+render_formats.py
+This file contains the formats the column information of a table can be rendered in by
+Table._get_metadata:
+    - markdown: the default, a pipe-separated table with a header row per table
+    - csv: comma-separated rows under a one-line header, quoted only where needed
+    - jsonl: one compact JSON object per column
+    - ddl: a CREATE TABLE statement with the comments and sample values as inline comments
+
+A format renders the head of a table (name, comment and column header), one line per column and
+the tail (end of the table and the note on the omitted columns) separately, so that the token budget
+can count the tokens of the head and of each column, see token_budget.py.
+
+The formats are compared with `python -m benchmarks.bench_render_formats`.
+"""
+import csv
+import io
+import json
+from typing import Any, Dict, List, Sequence
+
+from chatweb3.catalog.column_domains import describe_domain
+
+DEFAULT_RENDER_FORMAT = "markdown"
+
+COLUMN_INFO_HEADERS = {
+    "name": "Name",
+    "comment": "Comment",
+    "data_type": "Data type",
+    "sample_values_list": "List of sample values",
+    "domain": "Value domain",
+}
+# shorter column info names for the compact formats
+COLUMN_INFO_KEYS = {
+    "name": "name",
+    "comment": "comment",
+    "data_type": "type",
+    "sample_values_list": "samples",
+    "domain": "domain",
+}
+
+
+def format_value(value: Any) -> Any:
+    """Keep a value on one line."""
+    if isinstance(value, str):
+        return value.replace("\n", " ")
+    return value
+
+
+def column_info_value(column, col: str) -> Any:
+    """Return the column info col of a column, the value domain as a description."""
+    if col == "domain":
+        return describe_domain(column.domain)
+    return getattr(column, col)
+
+
+def format_values(value: Any, separator: str = ", ") -> Any:
+    """Format a value, joining the items of a list with separator."""
+    if isinstance(value, list):
+        return separator.join(str(format_value(v)) for v in value)
+    return format_value(value)
+
+
+def omission_note(
+    table, omitted_column_names: Sequence[str], omission_reason: str
+) -> str:
+    return (
+        f"Note: {len(omitted_column_names)} of the {len(table.columns)} columns are omitted {omission_reason}: "
+        f"{', '.join(omitted_column_names)}"
+    )
+
+
+class RenderFormat:
+    """A format of the column information of a table."""
+
+    name = ""
+
+    def format_head(
+        self, table, include_table_name: bool, column_info_format: List[str]
+    ) -> str:
+        raise NotImplementedError
+
+    def format_column(self, column, column_info_format: List[str]) -> str:
+        raise NotImplementedError
+
+    def format_tail(
+        self, table, omitted_column_names: Sequence[str], omission_reason: str
+    ) -> str:
+        if not omitted_column_names:
+            return ""
+        return omission_note(table, omitted_column_names, omission_reason) + "\n"
+
+
+class MarkdownFormat(RenderFormat):
+    name = "markdown"
+
+    def format_head(self, table, include_table_name, column_info_format):
+        head = ""
+        if include_table_name:
+            head += f"'{table.database_name}.{table.schema_name}.{table.name}': the '{table.name}' table in '{table.schema_name}' schema of '{table.database_name}' database. "
+        head += f"\nComment: {table.comment}\n"
+        if column_info_format:
+            headers = [COLUMN_INFO_HEADERS[col] for col in column_info_format]
+            head += (
+                "Columns in this table:\n"
+                + "\t"
+                + " | ".join(headers)
+                + "\n"
+                + "\t"
+                + "--- | " * (len(column_info_format) - 1)
+                + "---\n"
+            )
+        return head
+
+    def format_column(self, column, column_info_format):
+        formatted_values = [
+            format_values(column_info_value(column, col)) for col in column_info_format
+        ]
+        return "\t" + " | ".join([str(val) for val in formatted_values]) + "\n"
+
+
+class CsvFormat(RenderFormat):
+    name = "csv"
+
+    @staticmethod
+    def _format_row(values) -> str:
+        output = io.StringIO()
+        csv.writer(output, lineterminator="\n").writerow(values)
+        return output.getvalue()
+
+    def format_head(self, table, include_table_name, column_info_format):
+        head = f"Table {table.long_name}" if include_table_name else "Table"
+        if table.comment:
+            head += f": {format_value(table.comment)}"
+        head += "\n"
+        if column_info_format:
+            head += self._format_row(
+                [COLUMN_INFO_KEYS[col] for col in column_info_format]
+            )
+        return head
+
+    def format_column(self, column, column_info_format):
+        return self._format_row(
+            [
+                "" if value is None else format_values(value, "; ")
+                for value in (
+                    column_info_value(column, col) for col in column_info_format
+                )
+            ]
+        )
+
+
+class JsonLinesFormat(RenderFormat):
+    name = "jsonl"
+
+    @staticmethod
+    def _format_object(obj: Dict[str, Any]) -> str:
+        return (
+            json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+            + "\n"
+        )
+
+    def format_head(self, table, include_table_name, column_info_format):
+        head: Dict[str, Any] = {}
+        if include_table_name:
+            head["table"] = table.long_name
+        if table.comment:
+            head["comment"] = format_value(table.comment)
+        return self._format_object(head)
+
+    def format_column(self, column, column_info_format):
+        return self._format_object(
+            {
+                COLUMN_INFO_KEYS[col]: value
+                for col, value in (
+                    (col, column_info_value(column, col)) for col in column_info_format
+                )
+                if value is not None and value != ""
+            }
+        )
+
+    def format_tail(self, table, omitted_column_names, omission_reason):
+        if not omitted_column_names:
+            return ""
+        return self._format_object(
+            {"note": omission_note(table, omitted_column_names, omission_reason)}
+        )
+
+
+class DdlFormat(RenderFormat):
+    """A CREATE TABLE statement, the column names are always rendered."""
+
+    name = "ddl"
+
+    def format_head(self, table, include_table_name, column_info_format):
+        head = ""
+        if table.comment:
+            head += f"-- {format_value(table.comment)}\n"
+        return head + f"CREATE TABLE {table.long_name} (\n"
+
+    def format_column(self, column, column_info_format):
+        line = f"  {column.name}"
+        if "data_type" in column_info_format and column.data_type:
+            line += f" {column.data_type}"
+        line += ","
+        comments = []
+        if "comment" in column_info_format and column.comment:
+            comments.append(format_value(column.comment))
+        if "sample_values_list" in column_info_format and column.sample_values_list:
+            comments.append(f"e.g. {format_values(column.sample_values_list)}")
+        if "domain" in column_info_format and column.domain:
+            comments.append(f"({describe_domain(column.domain)})")
+        if comments:
+            line += " -- " + " ".join(comments)
+        return line + "\n"
+
+    def format_tail(self, table, omitted_column_names, omission_reason):
+        tail = ");\n"
+        if omitted_column_names:
+            tail += (
+                f"-- {omission_note(table, omitted_column_names, omission_reason)}\n"
+            )
+        return tail
+
+
+RENDER_FORMATS: Dict[str, RenderFormat] = {
+    render_format.name: render_format
+    for render_format in [MarkdownFormat(), CsvFormat(), JsonLinesFormat(), DdlFormat()]
+}
+
+
+def get_render_format(name: str) -> RenderFormat:
+    """Return the render format of the given name, raise ValueError if there is none."""
+    try:
+        return RENDER_FORMATS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown render format {name!r}, expected one of {', '.join(RENDER_FORMATS)}"
+        ) from None
@@ -0,0 +1,100 @@
+"""
+sample_values.py
+This file contains the normalization of the sample values of the columns, applied once when the
+sample rows of a table are parsed, so that the rendered metadata never carries raw sample rows.
+
+Sample rows of tables such as dim_contract_abis or ez_decoded_event_logs contain ABIs, JSON
+documents and bytecode that are kilobytes long. Each column keeps at most MAX_SAMPLE_VALUES distinct
+values, and each value is bounded to about MAX_SAMPLE_VALUE_CHARS characters:
+    - JSON objects and arrays (also as JSON strings) that are too long are summarized,
+      e.g. "JSON object with keys from,gas,gasUsed" or "JSON array of 12 objects with keys inputs,name"
+    - hex strings that are too long are cut, e.g. "0x6080604052...(766 chars)"
+    - other strings that are too long are cut, e.g. "Raw Passes are the...(117 chars)"
+Numbers, booleans and nulls are kept as they are.
+"""
+import json
+from typing import Any, Iterable, List
+
+MAX_SAMPLE_VALUES = 3
+MAX_SAMPLE_VALUE_CHARS = 100
+
+# keys of a JSON object listed in its summary
+MAX_SUMMARY_KEYS = 8
+
+
+def _summarize_keys(keys: Iterable[Any]) -> str:
+    keys = [str(key) for key in keys]
+    # keys are joined without spaces, the rendered sample values are separated by ", "
+    listed = ",".join(keys[:MAX_SUMMARY_KEYS])
+    if len(keys) > MAX_SUMMARY_KEYS:
+        listed += f",...({len(keys)} keys)"
+    return listed
+
+
+def _summarize_json(value: Any) -> str:
+    """Describe a JSON object or array by its shape instead of its content."""
+    if isinstance(value, dict):
+        if not value:
+            return "empty JSON object"
+        return f"JSON object with keys {_summarize_keys(value)}"
+    if not value:
+        return "empty JSON array"
+    if all(isinstance(item, dict) for item in value):
+        keys = dict.fromkeys(key for item in value for key in item)
+        return f"JSON array of {len(value)} objects with keys {_summarize_keys(keys)}"
+    if all(isinstance(item, str) for item in value):
+        return f"JSON array of {len(value)} strings"
+    return f"JSON array of {len(value)} items"
+
+
+def _truncate(value: str, max_chars: int) -> str:
+    return f"{value[:max_chars]}...({len(value)} chars)"
+
+
+def _parse_json_string(value: str) -> Any:
+    """Return the JSON object or array the string holds, or None."""
+    stripped = value.strip()
+    if not stripped or stripped[0] not in "{[":
+        return None
+    try:
+        parsed = json.loads(stripped)
+    except ValueError:
+        return None
+    return parsed if isinstance(parsed, (dict, list)) else None
+
+
+def normalize_sample_value(value: Any, max_chars: int = MAX_SAMPLE_VALUE_CHARS) -> Any:
+    """Return the value bounded to about max_chars characters, see the module docstring."""
+    if isinstance(value, (dict, list, tuple)):
+        if len(str(value)) <= max_chars:
+            return value
+        return _summarize_json(value if isinstance(value, dict) else list(value))
+    if not isinstance(value, str) or len(value) <= max_chars:
+        return value
+    parsed = _parse_json_string(value)
+    if parsed is not None:
+        return _summarize_json(parsed)
+    if value.startswith("0x"):
+        # keep the start of hex data, e.g. the function selector of the input data
+        return _truncate(value, min(max_chars, 12))
+    return _truncate(value, max_chars)
+
+
+def normalize_sample_values(
+    values: Iterable[Any],
+    max_values: int = MAX_SAMPLE_VALUES,
+    max_chars: int = MAX_SAMPLE_VALUE_CHARS,
+) -> List[Any]:
+    """Return at most max_values distinct normalized values, in their order."""
+    normalized: List[Any] = []
+    seen = set()
+    for value in values:
+        value = normalize_sample_value(value, max_chars)
+        key = (type(value).__name__, repr(value))
+        if key in seen:
+            continue
+        seen.add(key)
+        normalized.append(value)
+        if len(normalized) >= max_values:
+            break
+    return normalized
@@ -0,0 +1,187 @@
+"""
+search_index.py
+This file contains the table search index, a BM25 inverted index over the tables of the metadata
+catalog, used to find the tables relevant to a question instead of listing the summaries of all tables.
+
+Each table is indexed by the terms of its fields, weighted by how descriptive they are:
+    - name: the schema and table names, e.g. core.ez_nft_sales
+    - summary: the annotation summary of the table
+    - comment: the table comment from the DDL
+    - columns: the column names, and the column comments of tables that are already loaded
+Lazily loaded tables of an indexed catalog are indexed by their column names only, so that building
+the index does not load every table.
+"""
+import heapq
+import math
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# weight of a term occurrence in each field of a table
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "summary": 1.0,
+    "comment": 1.0,
+    "columns": 0.5,
+}
+
+STOP_WORDS = frozenset(
+    """
+    a an and are as at be by do does for from how i in is it me my of on or show
+    that the their this to was were what when where which who why with
+    """.split()
+)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lower case terms, dropping stop words and the plural s of longer words.
+    Snake case names are split into their words, e.g. ez_nft_sales -> ez, nft, sale.
+    """
+    if not text:
+        return []
+    terms = []
+    for term in _TOKEN_PATTERN.findall(text.lower()):
+        if term in STOP_WORDS:
+            continue
+        if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+            term = term[:-1]
+        terms.append(term)
+    return terms
+
+
+def _table_fields(table) -> Dict[str, List[str]]:
+    column_terms = [term for name in table.column_names for term in tokenize(name)]
+    if table._loader is None:
+        # the columns of a lazily loaded table are only read when it is hydrated
+        for column in table.columns.values():
+            column_terms.extend(tokenize(column.comment))
+    return {
+        "name": tokenize(f"{table.schema_name} {table.name}"),
+        "summary": tokenize(table.summary),
+        "comment": tokenize(table.comment),
+        "columns": column_terms,
+    }
+
+
+class BM25Index:
+    """BM25 inverted index of documents made of weighted fields, see search()."""
+
+    def __init__(
+        self,
+        documents: Iterable[Tuple[str, Dict[str, List[str]]]],
+        field_weights: Dict[str, float],
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        """documents are (key, {field: terms}) pairs, field_weights is the weight of a term occurrence in each field."""
+        self.k1 = k1
+        self.b = b
+        self.keys: List[str] = []
+        # term -> [(document id, weighted term frequency)]
+        self._postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        self._document_lengths: List[float] = []
+        for document_id, (key, fields) in enumerate(documents):
+            self.keys.append(key)
+            term_frequencies: Dict[str, float] = defaultdict(float)
+            for field, terms in fields.items():
+                for term in terms:
+                    term_frequencies[term] += field_weights[field]
+            for term, frequency in term_frequencies.items():
+                self._postings[term].append((document_id, frequency))
+            self._document_lengths.append(sum(term_frequencies.values()))
+        avg_document_length = (
+            sum(self._document_lengths) / len(self._document_lengths)
+            if self._document_lengths
+            else 0.0
+        )
+        # the BM25 length normalization of each document, 1 - b + b * length / average length
+        self._length_norms = [
+            1 - b + b * length / avg_document_length if avg_document_length else 1.0
+            for length in self._document_lengths
+        ]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _idf(self, term: str) -> float:
+        num_documents = len(self.keys)
+        document_frequency = len(self._postings.get(term, ()))
+        return math.log(
+            1 + (num_documents - document_frequency + 0.5) / (document_frequency + 0.5)
+        )
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        keys: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Return the keys and scores of the top_k documents most relevant to the query, best first.
+        If keys is given, only these documents are returned. Documents matching no term of the query are never returned.
+        """
+        allowed = set(keys) if keys is not None else None
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            for document_id, frequency in postings:
+                scores[document_id] += (
+                    idf
+                    * frequency
+                    * (self.k1 + 1)
+                    / (frequency + self.k1 * self._length_norms[document_id])
+                )
+
+        return heapq.nsmallest(
+            top_k,
+            (
+                (self.keys[document_id], score)
+                for document_id, score in scores.items()
+                if allowed is None or self.keys[document_id] in allowed
+            ),
+            key=lambda item: (-item[1], item[0]),
+        )
+
+
+class TableSearchIndex(BM25Index):
+    """BM25 index of the tables of a catalog, keyed by their long names."""
+
+    def __init__(self, tables: Iterable, k1: float = 1.2, b: float = 0.75):
+        super().__init__(
+            ((table.long_name, _table_fields(table)) for table in tables),
+            FIELD_WEIGHTS,
+            k1=k1,
+            b=b,
+        )
+        logger.debug(
+            f"Built table search index with {len(self.keys)} tables and {len(self._postings)} terms"
+        )
+
+    @property
+    def table_long_names(self) -> List[str]:
+        return self.keys
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        table_long_names: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Return the long names and scores of the top_k tables most relevant to the query, best first.
+        If table_long_names is given, only these tables are returned.
+        """
+        return super().search(
+            query,
+            top_k,
+            {name.strip().lower() for name in table_long_names}
+            if table_long_names is not None
+            else None,
+        )
@@ -0,0 +1,195 @@
+"""
+snapshot.py
+This file contains the code for the precompiled binary snapshot of the metadata catalog.
+
+A snapshot stores the fully parsed RootSchema object (comments, data types, sample values
+and annotations already applied), so that a process can skip the JSON parsing and the DDL
+regexes at startup. The snapshot records a fingerprint of the source files it was built
+from and is considered stale as soon as any of them changes.
+
+Build a snapshot with:
+    python -m chatweb3.catalog.snapshot
+"""
+import argparse
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import IO, Any, Callable, List, Optional
+
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Bump this whenever the parsed catalog objects or the parsing logic change,
+# so that snapshots built by older code are rebuilt instead of being loaded.
+CATALOG_SNAPSHOT_VERSION = 8
+
+
+def compute_source_fingerprint(source_file_paths: List[Optional[str]]) -> str:
+    """Return a sha256 fingerprint over the contents of the given source files.
+    None entries (e.g., no annotation file) are part of the fingerprint as well."""
+    sha256 = hashlib.sha256()
+    for file_path in source_file_paths:
+        if file_path is None:
+            sha256.update(b"\0none\0")
+            continue
+        sha256.update(os.path.basename(file_path).encode("utf-8") + b"\0")
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def compute_source_stat_fingerprint(source_file_paths: List[Optional[str]]) -> str:
+    """Return a sha256 fingerprint over the names, sizes and modification times of the given
+    source files, which takes constant time whatever their size, unlike compute_source_fingerprint.
+    None entries (e.g., no annotation file) are part of the fingerprint as well."""
+    sha256 = hashlib.sha256()
+    for file_path in source_file_paths:
+        if file_path is None:
+            sha256.update(b"\0none\0")
+            continue
+        stat = os.stat(file_path)
+        sha256.update(
+            f"{os.path.basename(file_path)}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode(
+                "utf-8"
+            )
+        )
+    return sha256.hexdigest()
+
+
+def atomic_write_file(file_path: str, write: Callable[[IO[bytes]], None]) -> None:
+    """Call write with a binary file object and move the written file to file_path.
+    The file is written to a temporary file first and then moved in place,
+    so that concurrently starting workers never see a partially written file."""
+    file_dir = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(file_dir, exist_ok=True)
+    fd, tmp_file_path = tempfile.mkstemp(dir=file_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        # mkstemp creates the file readable by the owner only
+        os.chmod(tmp_file_path, 0o644)
+        os.replace(tmp_file_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_file_path):
+            os.remove(tmp_file_path)
+        raise
+
+
+def save_catalog_snapshot(
+    root_schema_obj: Any,
+    snapshot_file_path: str,
+    source_file_paths: List[Optional[str]],
+    compact: bool = False,
+) -> None:
+    """Write the parsed root schema object to a versioned binary snapshot.
+    compact marks snapshots of catalogs whose raw table payloads were dropped."""
+    header = {
+        "version": CATALOG_SNAPSHOT_VERSION,
+        "fingerprint": compute_source_fingerprint(source_file_paths),
+        "compact": compact,
+    }
+
+    def write(f):
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(root_schema_obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    atomic_write_file(snapshot_file_path, write)
+    logger.info(f"Saved catalog snapshot to {snapshot_file_path}")
+
+
+def load_catalog_snapshot(
+    snapshot_file_path: str,
+    source_file_paths: List[Optional[str]],
+    compact: bool = False,
+) -> Optional[Any]:
+    """Load the root schema object from a snapshot.
+    Returns None if the snapshot does not exist, was built by a different snapshot version,
+    or is stale with respect to the source files, so that the caller can fall back to the JSON path.
+    A compact snapshot is only loaded if the caller asks for a compact catalog as well.
+
+    Note: snapshots are pickle files, only load snapshots built by this application.
+    """
+    if not os.path.exists(snapshot_file_path):
+        logger.debug(f"Catalog snapshot {snapshot_file_path} does not exist")
+        return None
+
+    try:
+        with open(snapshot_file_path, "rb") as f:
+            header = pickle.load(f)
+            if header.get("version") != CATALOG_SNAPSHOT_VERSION:
+                logger.warning(
+                    f"Catalog snapshot {snapshot_file_path} has version {header.get('version')}, expected {CATALOG_SNAPSHOT_VERSION}, ignoring it"
+                )
+                return None
+            if header.get("fingerprint") != compute_source_fingerprint(
+                source_file_paths
+            ):
+                logger.warning(
+                    f"Catalog snapshot {snapshot_file_path} is stale, ignoring it. Rebuild it with `python -m chatweb3.catalog.snapshot`"
+                )
+                return None
+            if header.get("compact") and not compact:
+                logger.warning(
+                    f"Catalog snapshot {snapshot_file_path} is compact and has no raw table metadata, ignoring it"
+                )
+                return None
+            root_schema_obj = pickle.load(f)
+    except Exception as e:
+        logger.warning(f"Unable to load catalog snapshot {snapshot_file_path}: {e}")
+        return None
+
+    logger.debug(f"Loaded catalog snapshot from {snapshot_file_path}")
+    return root_schema_obj
+
+
+def main():
+    # delay imports so that loading snapshots does not pull in the config and parser
+    from chatweb3.catalog.chain_registry import chain_catalog_from_config
+    from chatweb3.metadata_parser import MetadataParser
+    from config.config import agent_config
+
+    parser = argparse.ArgumentParser(
+        description="Build the binary snapshot of the metadata catalog"
+    )
+    parser.add_argument(
+        "--chain",
+        default=agent_config.get("database.default_database"),
+        help="Chain of the chains section of config.yaml whose files are the defaults of the paths below",
+    )
+    parser.add_argument(
+        "--context-file",
+        help="Path of the context JSON file",
+    )
+    parser.add_argument(
+        "--annotation-file",
+        help="Path of the annotation JSON file",
+    )
+    parser.add_argument(
+        "--output",
+        help="Path of the snapshot file to write",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="Processes parsing the tables of a large context file, 0 (the default) for one per core",
+    )
+    args = parser.parse_args()
+    chain_catalog = chain_catalog_from_config(agent_config, args.chain)
+    args.context_file = args.context_file or chain_catalog.context_file
+    args.annotation_file = args.annotation_file or chain_catalog.annotation_file
+    args.output = args.output or chain_catalog.snapshot_file
+
+    metadata_parser = MetadataParser(
+        file_path=args.context_file,
+        annotation_file_path=args.annotation_file,
+        parse_workers=args.parse_workers,
+    )
+    metadata_parser.save_catalog_snapshot(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,567 @@
+"""
+sqlite_catalog.py
+This file contains the SQLite catalog, a read-only catalog file shared by all worker processes of a
+deployment instead of each of them holding its own parsed catalog.
+
+The file holds
+    - meta: the version of the layout and the fingerprint of the names, sizes and modification times
+      of the context and annotation files, so that checking it at startup does not read them
+    - tables: the names, comment, summary, column names and the hash of the parsed columns of each table
+    - columns: the parsed data type, comment, sample values and value domain of each column
+    - rendered: the metadata of each table pre-rendered for PRERENDERED_FLAGS, with its token count
+
+SqliteCatalog is a MetadataParser which only keeps the table names, comments, summaries and column
+names in memory, like the indexed catalog. The listings and the full table metadata are read from the
+pre-rendered entries, which the OS keeps once in its page cache for all the workers.
+Renders that depend on the question or on a token budget the full metadata does not fit, and other
+render flags, are rendered by a MetadataParser holding only the requested tables, which is dropped
+afterwards, so the memory of a worker does not grow with the tables it has rendered.
+
+Build the catalog for the configured context and annotation files with:
+    python -m chatweb3.catalog.sqlite_catalog
+"""
+import argparse
+import inspect
+import json
+import os
+import sqlite3
+import threading
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence
+
+from chatweb3.catalog.render_formats import DEFAULT_RENDER_FORMAT, RENDER_FORMATS
+from chatweb3.catalog.search_index import TableSearchIndex
+from chatweb3.catalog.snapshot import (
+    atomic_write_file,
+    compute_source_stat_fingerprint,
+)
+from chatweb3.metadata_parser import (
+    DEFAULT_COLUMN_INFO_FORMAT,
+    Column,
+    Database,
+    MetadataParser,
+    RootSchema,
+    Schema,
+    Table,
+    intern_name,
+)
+from chatweb3.utils import parse_table_long_name_to_json_list
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Bump this whenever the tables of the catalog file or the rendered metadata change
+SQLITE_CATALOG_VERSION = 3
+
+# the render flags of MetadataParser._render_table_metadata pre-rendered in the catalog file: the table
+# listings with and without the column names, and the full column information in each render format
+PRERENDERED_FLAGS = [
+    (True, True, False, False, None, DEFAULT_RENDER_FORMAT),
+    (True, True, True, False, None, DEFAULT_RENDER_FORMAT),
+] + [(True, True, False, True, None, render_format) for render_format in RENDER_FORMATS]
+
+# the catalog file is read through the OS page cache, which is shared by the processes reading it, and not
+# memory-mapped: the mapped pages a worker touches count towards its resident memory, see bench_sqlite_catalog.py
+SQLITE_MMAP_SIZE = 0
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE tables (
+    long_name TEXT PRIMARY KEY,
+    database_name TEXT,
+    schema_name TEXT,
+    name TEXT,
+    comment TEXT,
+    summary TEXT,
+    column_names TEXT,
+    columns_hash TEXT
+);
+CREATE TABLE columns (
+    table_long_name TEXT,
+    position INTEGER,
+    name TEXT,
+    data_type TEXT,
+    comment TEXT,
+    sample_values_list TEXT,
+    domain TEXT,
+    PRIMARY KEY (table_long_name, position)
+) WITHOUT ROWID;
+CREATE TABLE rendered (
+    table_long_name TEXT,
+    render_flags TEXT,
+    text TEXT,
+    tokens INTEGER,
+    PRIMARY KEY (table_long_name, render_flags)
+) WITHOUT ROWID;
+"""
+
+
+def normalize_render_flags(render_flags: Sequence) -> tuple:
+    """Return the render flags of MetadataParser._render_table_metadata with the flags that do not change
+    the rendered metadata set to their defaults, e.g. the render format of a listing without column info.
+    """
+    (
+        include_table_name,
+        include_table_summary,
+        include_column_names,
+        include_column_info,
+        column_info_format,
+        render_format,
+    ) = render_flags
+    if not include_column_info:
+        return (
+            bool(include_table_name),
+            bool(include_table_summary),
+            bool(include_column_names),
+            False,
+            None,
+            DEFAULT_RENDER_FORMAT,
+        )
+    if list(column_info_format or []) == DEFAULT_COLUMN_INFO_FORMAT:
+        column_info_format = None
+    # the summary and the column names are only rendered without column info
+    return (
+        bool(include_table_name),
+        True,
+        False,
+        True,
+        column_info_format,
+        render_format,
+    )
+
+
+def _render_flags_key(render_flags: Sequence) -> str:
+    return json.dumps(list(render_flags))
+
+
+def write_sqlite_catalog(
+    metadata_parser: MetadataParser,
+    catalog_file_path: str,
+    source_file_paths: Optional[List[Optional[str]]] = None,
+) -> None:
+    """Write the tables of a parsed catalog and their pre-rendered metadata to a SQLite catalog file.
+    source_file_paths are the context and annotation files the catalog is built from, see load_sqlite_catalog.
+    """
+    connection = sqlite3.connect(":memory:")
+    connection.executescript(_SCHEMA)
+    connection.executemany(
+        "INSERT INTO meta VALUES (?, ?)",
+        [
+            ("version", str(SQLITE_CATALOG_VERSION)),
+            (
+                "fingerprint",
+                compute_source_stat_fingerprint(source_file_paths)
+                if source_file_paths is not None
+                else None,
+            ),
+        ],
+    )
+    num_tables = 0
+    for database in metadata_parser.root_schema_obj.databases.values():
+        for schema in database.schemas.values():
+            for table in schema.tables.values():
+                connection.execute(
+                    "INSERT INTO tables VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        table.long_name,
+                        table.database_name,
+                        table.schema_name,
+                        table.name,
+                        table.comment,
+                        table.summary,
+                        json.dumps(table.column_names),
+                        table.columns_hash,
+                    ),
+                )
+                connection.executemany(
+                    "INSERT INTO columns VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            table.long_name,
+                            position,
+                            column.name,
+                            column.data_type,
+                            column.comment,
+                            json.dumps(column.sample_values_list),
+                            json.dumps(column.domain),
+                        )
+                        for position, column in enumerate(table.columns.values())
+                    ],
+                )
+                rendered = []
+                for render_flags in PRERENDERED_FLAGS:
+                    tokens = 0
+                    if render_flags[3]:
+                        header_tokens, column_tokens = table.token_counts(
+                            DEFAULT_COLUMN_INFO_FORMAT, render_flags[5]
+                        )
+                        tokens = header_tokens + sum(column_tokens.values())
+                    rendered.append(
+                        (
+                            table.long_name,
+                            _render_flags_key(render_flags),
+                            metadata_parser._render_table_metadata(table, render_flags),
+                            tokens,
+                        )
+                    )
+                connection.executemany(
+                    "INSERT INTO rendered VALUES (?, ?, ?, ?)", rendered
+                )
+                num_tables += 1
+    connection.commit()
+    # store the pages of each table together, so that reading the table headers at startup
+    # does not read pages of the rendered metadata
+    connection.execute("VACUUM")
+    data = connection.serialize()
+    connection.close()
+
+    def write(f):
+        f.write(data)
+
+    atomic_write_file(catalog_file_path, write)
+    logger.info(
+        f"Saved SQLite catalog with {num_tables} tables to {catalog_file_path} ({len(data) / 1024:.0f} KiB)"
+    )
+
+
+def _bind_arguments(method, args, kwargs) -> Dict[str, Any]:
+    """Return the arguments of a call of a MetadataParser method by name, with the defaults filled in."""
+    bound_arguments = inspect.signature(method).bind(None, *args, **kwargs)
+    bound_arguments.apply_defaults()
+    arguments = dict(bound_arguments.arguments)
+    del arguments["self"]
+    return arguments
+
+
+class SqliteCatalog(MetadataParser):
+    """MetadataParser reading the tables and their rendered metadata from a SQLite catalog file, see the module docstring."""
+
+    def __init__(self, catalog_file_path: str, verbose: bool = False):
+        super().__init__(verbose=verbose)
+        self.catalog_file_path = catalog_file_path
+        self._connection = sqlite3.connect(
+            f"file:{catalog_file_path}?mode=ro&immutable=1",
+            uri=True,
+            check_same_thread=False,
+        )
+        # the connection is shared by the threads of the worker
+        self._connection_lock = threading.Lock()
+        self._execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        meta: Dict[str, str] = {
+            key: value
+            for key, value in self._execute("SELECT key, value FROM meta")
+        }
+        if meta.get("version") != str(SQLITE_CATALOG_VERSION):
+            self.close()
+            raise ValueError(
+                f"{catalog_file_path} is not a SQLite catalog of version {SQLITE_CATALOG_VERSION}"
+            )
+        self.fingerprint: Optional[str] = meta.get("fingerprint")
+        self._prerendered_flags = set(PRERENDERED_FLAGS)
+        self._load_table_headers()
+        self._update_content_hashes()
+
+    def _execute(self, sql: str, parameters: Sequence = ()) -> List[tuple]:
+        with self._connection_lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def close(self):
+        self._connection.close()
+
+    def _load_table_headers(self):
+        """Create the RootSchema object with a table for each entry of the tables of the catalog file,
+        whose columns are loaded on first access."""
+        root_schema_obj = RootSchema()
+        for (
+            long_name,
+            database_name,
+            schema_name,
+            name,
+            comment,
+            summary,
+            column_names,
+            columns_hash,
+        ) in self._execute("SELECT * FROM tables ORDER BY rowid"):
+            database_name = intern_name(database_name)
+            schema_name = intern_name(schema_name)
+            database = root_schema_obj.databases.get(database_name)
+            if database is None:
+                database = root_schema_obj.databases[database_name] = Database(
+                    database_name
+                )
+            schema = database.schemas.get(schema_name)
+            if schema is None:
+                schema = database.schemas[schema_name] = Schema(
+                    schema_name, database_name
+                )
+            table = Table(name, schema_name, database_name)
+            table.comment = comment
+            table.summary = summary
+            table.column_names = [intern_name(x) for x in json.loads(column_names)]
+            table._columns_hash = columns_hash
+            table._loader = partial(self._load_table, long_name)
+            schema.tables[table.name] = table
+        self.root_schema_obj = root_schema_obj
+        if self.verbose:
+            self.root_schema_obj.verbose = self.verbose
+        self._build_table_index()
+
+    def _load_table(self, table_long_name: str) -> Table:
+        """Read a table and its columns from the catalog file."""
+        (
+            database_name,
+            schema_name,
+            name,
+            comment,
+            summary,
+            column_names,
+        ) = self._execute(
+            "SELECT database_name, schema_name, name, comment, summary, column_names FROM tables WHERE long_name = ?",
+            (table_long_name,),
+        )[
+            0
+        ]
+        table = Table(name, schema_name, database_name, verbose=self.verbose)
+        table.comment = comment
+        table.summary = summary
+        table.column_names = [intern_name(x) for x in json.loads(column_names)]
+        columns = {}
+        for (
+            column_name,
+            data_type,
+            column_comment,
+            sample_values_list,
+            domain,
+        ) in self._execute(
+            "SELECT name, data_type, comment, sample_values_list, domain FROM columns "
+            "WHERE table_long_name = ? ORDER BY position",
+            (table_long_name,),
+        ):
+            column = Column(
+                column_name,
+                table.name,
+                table.schema_name,
+                table.database_name,
+                data_type,
+                column_comment,
+                verbose=self.verbose,
+            )
+            column.sample_values_list = json.loads(sample_values_list)
+            column.domain = json.loads(domain)
+            columns[column.name] = column
+        table.columns = columns
+        return table
+
+    @property
+    def search_index(self) -> TableSearchIndex:
+        """The BM25 index of the tables of the catalog, built on first access from the tables read with their
+        column comments, which are dropped once they are indexed."""
+        search_index = self._search_index
+        if search_index is None:
+            search_index = self._search_index = TableSearchIndex(
+                self._load_table(table_long_name)
+                for table_long_name in self._table_index
+            )
+        return search_index
+
+    def _load_metadata_parser(self, tables: List[Table]) -> MetadataParser:
+        """Return a MetadataParser holding only the given tables, loaded from the catalog file."""
+        root_schema_obj = RootSchema()
+        for table in tables:
+            loaded_table = self._load_table(table.long_name)
+            database = root_schema_obj.databases.setdefault(
+                table.database_name, Database(table.database_name)
+            )
+            schema = database.schemas.setdefault(
+                table.schema_name, Schema(table.schema_name, table.database_name)
+            )
+            schema.tables[table.name] = loaded_table
+        metadata_parser = MetadataParser(verbose=self.verbose)
+        metadata_parser.root_schema_obj = root_schema_obj
+        metadata_parser._build_table_index()
+        return metadata_parser
+
+    def _needs_columns(self, tables: List[Table], arguments: Dict[str, Any]) -> bool:
+        """Return whether the metadata of the tables cannot be served from the pre-rendered entries:
+        for render flags that are not pre-rendered, for columns pruned for the question, or for a token
+        budget the full metadata does not fit."""
+        if not tables:
+            return False
+        render_flags = normalize_render_flags(
+            (
+                arguments["include_table_name"],
+                arguments["include_table_summary"],
+                arguments["include_column_names"],
+                arguments["include_column_info"],
+                tuple(arguments["column_info_format"])
+                if arguments["column_info_format"] is not None
+                else None,
+                arguments["render_format"],
+            )
+        )
+        if render_flags not in self._prerendered_flags:
+            return True
+        if not render_flags[3]:
+            return False
+        max_columns = arguments["max_columns"]
+        if (
+            arguments["question"]
+            and max_columns
+            and any(len(table.column_names) > max_columns for table in tables)
+        ):
+            return True
+        max_tokens: Optional[int] = arguments.get("max_tokens")
+        if max_tokens is None:
+            return False
+        return self._count_tokens(tables, render_flags) > max_tokens
+
+    def _count_tokens(self, tables: List[Table], render_flags: tuple) -> int:
+        """Return the tokens of the pre-rendered metadata of the tables."""
+        table_long_names = [table.long_name for table in tables]
+        tokens: int
+        ((tokens,),) = self._execute(
+            "SELECT COALESCE(SUM(tokens), 0) FROM rendered WHERE render_flags = ? AND table_long_name IN "
+            f"({', '.join('?' * len(table_long_names))})",
+            [_render_flags_key(render_flags)] + table_long_names,
+        )
+        return tokens
+
+    def _find_tables_by_long_names(self, table_long_names: str) -> List[Table]:
+        tables = []
+        for info in parse_table_long_name_to_json_list(table_long_names):
+            tables.extend(
+                self._find_target_tables(
+                    info["database"], info["schema"], info["tables"]
+                )
+            )
+        return tables
+
+    def get_table_metadata(self, *args, **kwargs) -> str:
+        """See MetadataParser.get_table_metadata."""
+        arguments = _bind_arguments(MetadataParser.get_table_metadata, args, kwargs)
+        tables = self._find_target_tables(
+            arguments["database"], arguments["schema"], arguments["tables"]
+        )
+        metadata: str
+        if self._needs_columns(tables, arguments):
+            metadata = self._load_metadata_parser(tables).get_table_metadata(
+                **arguments
+            )
+        else:
+            metadata = super().get_table_metadata(**arguments)
+        return metadata
+
+    def get_metadata_by_table_long_names(self, *args, **kwargs) -> str:
+        """See MetadataParser.get_metadata_by_table_long_names."""
+        arguments = _bind_arguments(
+            MetadataParser.get_metadata_by_table_long_names, args, kwargs
+        )
+        tables = self._find_tables_by_long_names(arguments["table_long_names"])
+        if self._needs_columns(tables, arguments):
+            return self._load_metadata_parser(tables).get_metadata_by_table_long_names(
+                **arguments
+            )
+        # the full metadata fits the token budget, it is rendered without budgeting
+        arguments["max_tokens"] = None
+        return super().get_metadata_by_table_long_names(**arguments)
+
+    def _render_table_metadata(self, table, render_flags) -> str:
+        """Return the pre-rendered metadata of the table, see MetadataParser._render_table_metadata."""
+        render_flags = normalize_render_flags(render_flags)
+        if render_flags in self._prerendered_flags:
+            rows = self._execute(
+                "SELECT text FROM rendered WHERE table_long_name = ? AND render_flags = ?",
+                (table.long_name, _render_flags_key(render_flags)),
+            )
+            if rows:
+                text: str = rows[0][0]
+                return text
+        return super()._render_table_metadata(table, render_flags)
+
+
+def load_sqlite_catalog(
+    catalog_file_path: str,
+    source_file_paths: Optional[List[Optional[str]]] = None,
+    verbose: bool = False,
+) -> Optional[SqliteCatalog]:
+    """Open a SQLite catalog file.
+    Returns None if the file does not exist, was written by a different version, or was built from
+    other source files than source_file_paths (when given), so that the caller can fall back to the JSON path.
+    """
+    if not os.path.exists(catalog_file_path):
+        logger.debug(f"SQLite catalog {catalog_file_path} does not exist")
+        return None
+
+    try:
+        sqlite_catalog = SqliteCatalog(catalog_file_path, verbose=verbose)
+    except Exception as e:
+        logger.warning(f"Unable to load SQLite catalog {catalog_file_path}: {e}")
+        return None
+
+    if (
+        source_file_paths is not None
+        and sqlite_catalog.fingerprint != compute_source_stat_fingerprint(source_file_paths)
+    ):
+        logger.warning(
+            f"SQLite catalog {catalog_file_path} is stale, ignoring it. Rebuild it with `python -m chatweb3.catalog.sqlite_catalog`"
+        )
+        sqlite_catalog.close()
+        return None
+
+    logger.debug(
+        f"Loaded SQLite catalog {catalog_file_path} with {len(sqlite_catalog._table_index)} tables"
+    )
+    return sqlite_catalog
+
+
+def main():
+    # delay imports so that loading the catalog does not pull in the config
+    from chatweb3.catalog.chain_registry import chain_catalog_from_config
+    from config.config import agent_config
+
+    parser = argparse.ArgumentParser(
+        description="Build the SQLite metadata catalog from the context and annotation files"
+    )
+    parser.add_argument(
+        "--chain",
+        default=agent_config.get("database.default_database"),
+        help="Chain of the chains section of config.yaml whose files are the defaults of the paths below",
+    )
+    parser.add_argument(
+        "--context-file",
+        help="Path of the context JSON file",
+    )
+    parser.add_argument(
+        "--annotation-file",
+        help="Path of the annotation JSON file",
+    )
+    parser.add_argument(
+        "--output",
+        help="Path of the SQLite catalog file to write",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="Processes parsing the tables of a large context file, 0 (the default) for one per core",
+    )
+    args = parser.parse_args()
+    chain_catalog = chain_catalog_from_config(agent_config, args.chain)
+    args.context_file = args.context_file or chain_catalog.context_file
+    args.annotation_file = args.annotation_file or chain_catalog.annotation_file
+    args.output = args.output or chain_catalog.sqlite_catalog_file
+    if args.output is None:
+        parser.error(f"No sqlite_catalog_file is configured for {args.chain}")
+
+    metadata_parser = MetadataParser(
+        file_path=args.context_file,
+        annotation_file_path=args.annotation_file,
+        parse_workers=args.parse_workers,
+    )
+    write_sqlite_catalog(
+        metadata_parser, args.output, [args.context_file, args.annotation_file]
+    )
+
+
+if __name__ == "__main__":
+    main()
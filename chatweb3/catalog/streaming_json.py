@@ -0,0 +1,157 @@
+"""
+streaming_json.py
+This file contains an incremental JSON reader, which walks a JSON file chunk by chunk instead of
+loading it into one dict, and hands the values at a given path, e.g. the tables of a context file,
+to a callback one at a time.
+
+The context files hold all tables of a chain in one object. json.load() keeps the whole document
+in memory until the catalog has been built from it, so the peak memory of a load is the raw document
+plus the catalog. With load_json_streaming(), only the chunk being read and the value being handed
+over are held on top of the catalog. It only needs the standard library: the values themselves are
+decoded by the json module, the reader only walks the objects above them.
+"""
+import json
+from json.decoder import scanstring  # type: ignore[attr-defined]
+from typing import IO, Any, Callable, Dict, List, Optional, Sequence
+
+# characters read from the file at a time
+STREAMING_CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARACTERS = "0123456789+-.eE"
+
+
+class _JsonReader:
+    """A buffer over a text file with the primitives to walk JSON objects and decode the values in them."""
+
+    def __init__(self, f: IO[str], chunk_size: int = STREAMING_CHUNK_SIZE):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _read_more(self) -> bool:
+        """Append the next chunk to the buffer, dropping what was already consumed.
+        Returns False at the end of the file."""
+        if self._eof:
+            return False
+        # read at least as much as is buffered, so that a value larger than a chunk is decoded
+        # after a logarithmic number of attempts
+        chunk = self._file.read(max(self._chunk_size, len(self._buffer) - self._pos))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def peek(self) -> str:
+        """Skip the whitespace and return the next character, "" at the end of the file."""
+        while True:
+            while (
+                self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE
+            ):
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._read_more():
+                return self._buffer[self._pos : self._pos + 1]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise self._error(f"Expecting {char!r}")
+        self._pos += 1
+
+    def read_string(self) -> str:
+        self.expect('"')
+        while True:
+            value: str
+            try:
+                value, end = scanstring(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # the string continues in the next chunk
+                if self._read_more():
+                    continue
+                raise
+            self._pos = end
+            return value
+
+    def read_value(self) -> Any:
+        """Decode the next value with the json module."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._read_more():
+                    continue
+                raise
+            # a number cut by the end of the buffer decodes as its prefix, e.g. "2." as 2
+            if (
+                end == len(self._buffer) or self._buffer[end] in _NUMBER_CHARACTERS
+            ) and self._read_more():
+                continue
+            self._pos = end
+            return value
+
+    def iter_object_keys(self):
+        """Walk an object, yielding each of its keys once the reader is at the value of the key.
+        The caller reads the value before asking for the next key."""
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.read_string()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                self._pos -= 1
+                raise self._error("Expecting ',' delimiter")
+
+
+def _read_streamed(
+    reader: _JsonReader,
+    stream_path: Sequence[Optional[str]],
+    keys: List[str],
+    callback: Callable[[List[str], Any], None],
+) -> Any:
+    """Read the value at keys, handing the values at stream_path in it to the callback, see load_json_streaming."""
+    depth = len(keys)
+    if reader.peek() != "{":
+        return reader.read_value()
+    document: Dict[str, Any] = {}
+    for key in reader.iter_object_keys():
+        if stream_path[depth] is not None and stream_path[depth] != key:
+            document[key] = reader.read_value()
+        elif depth + 1 == len(stream_path):
+            callback(keys + [key], reader.read_value())
+        else:
+            document[key] = _read_streamed(reader, stream_path, keys + [key], callback)
+    return document
+
+
+def load_json_streaming(
+    f: IO[str],
+    stream_path: Sequence[Optional[str]],
+    callback: Callable[[List[str], Any], None],
+    chunk_size: int = STREAMING_CHUNK_SIZE,
+) -> Any:
+    """Read a JSON document from a text file incrementally. Each value at stream_path, a sequence of keys
+    where None matches any key, is decoded on its own and handed to callback(keys, value) in the order of the
+    file, instead of being kept in the document. Returns the rest of the document, e.g. for
+        stream_path=("root_schema_obj", "databases", None, "schemas", None, "tables", None)
+    the databases and schemas of a context file, each with an empty tables object.
+    """
+    reader = _JsonReader(f, chunk_size)
+    document = _read_streamed(reader, stream_path, [], callback)
+    if reader.peek() != "":
+        raise reader._error("Extra data")
+    return document
@@ -0,0 +1,78 @@
+"""
+token_budget.py
+This file contains the token estimates of the rendered table metadata and the planning of renders
+that fit a token budget.
+
+The estimate is a local approximation of the tokenizers of the OpenAI chat models, which does not
+need a tokenizer library: words count one token per 6 letters, numbers one token per 3 digits and
+every other character one token. It is only used to decide how much metadata to render.
+
+When the metadata of the requested tables does not fit the budget, it is degraded step by step for
+all tables, until it fits:
+    1. drop the sample values of the columns
+    2. drop the value domains of the columns, if they are rendered
+    3. drop the comments of the columns
+    4. drop the least relevant columns, the key columns (timestamps, hashes, addresses) last
+"""
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_TOKEN_PIECE_PATTERN = re.compile(r"[A-Za-z]+|[0-9]+|[^\sA-Za-z0-9]")
+
+# tokens of the note listing the omitted columns of a table, without the column names
+OMISSION_NOTE_TOKENS = 20
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Return the approximate number of tokens of the text."""
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _TOKEN_PIECE_PATTERN.findall(text):
+        if piece[0].isalpha():
+            tokens += 1 + (len(piece) - 1) // 6
+        elif piece[0].isdigit():
+            tokens += 1 + (len(piece) - 1) // 3
+        else:
+            tokens += 1
+    return tokens
+
+
+def degraded_column_info_formats(column_info_format: Sequence[str]) -> List[List[str]]:
+    """Return the column info formats to try in order: as given, without sample values, without value domains,
+    without comments.
+    """
+    formats = [list(column_info_format)]
+    for dropped in ("sample_values_list", "domain", "comment"):
+        if dropped in formats[-1]:
+            formats.append([col for col in formats[-1] if col != dropped])
+    return formats
+
+
+def plan_columns_within_budget(
+    token_counts: List[Tuple[int, Dict[str, int]]],
+    column_priorities: List[List[str]],
+    max_tokens: int,
+) -> List[List[str]]:
+    """Choose the columns to render of each table so that their total token count fits max_tokens.
+
+    token_counts are the (header tokens, column tokens) of each table in the render format, and
+    column_priorities the columns of each table from the most to the least important. Columns are
+    dropped from the end of the priorities of the table with the most columns left, the name of a
+    dropped column still counts towards the budget since it is listed in the omission note.
+    Each table keeps at least one column. Returns the columns to render of each table, in priority order.
+    """
+    kept = [list(priorities) for priorities in column_priorities]
+    total = sum(
+        header_tokens + sum(column_tokens[name] for name in columns)
+        for (header_tokens, column_tokens), columns in zip(token_counts, kept)
+    )
+    while total > max_tokens:
+        table_index = max(range(len(kept)), key=lambda i: len(kept[i]))
+        if len(kept[table_index]) <= 1:
+            break
+        if len(kept[table_index]) == len(column_priorities[table_index]):
+            total += OMISSION_NOTE_TOKENS
+        name = kept[table_index].pop()
+        total -= token_counts[table_index][1][name] - estimate_tokens(name) - 1
+    return kept
@@ -3,8 +3,6 @@ create_agent.py
 This file sets up the agent executor for the chatbot application.
 """
 
-import os
-
 from langchain.chat_models import ChatOpenAI
 from langchain.memory import ConversationBufferMemory
 
@@ -31,7 +29,14 @@ from chatweb3.agents.conversational_chat.prompt import (  # CUSTOM_CONV_SNOWFLAK
     CONV_SNOWFLAKE_SUFFIX_WITH_TOOLKIT_INSTRUCTIONS,
 )
 from chatweb3.callbacks.logger_callback import LoggerCallbackHandler
-from chatweb3.snowflake_database import SnowflakeContainer
+from chatweb3.catalog.chain_registry import (
+    chain_catalog_from_config,
+    chain_catalogs_from_config,
+)
+from chatweb3.snowflake_database import (
+    DEFAULT_METADATA_MISS_CACHE_TTL,
+    SnowflakeContainer,
+)
 from config.config import agent_config
 from config.logging_config import get_logger
 
@@ -51,15 +56,16 @@ logger = get_logger(__name__)
 log_callback_handler = LoggerCallbackHandler()
 
 
-PROJ_ROOT_DIR = agent_config.get("proj_root_dir")
-LOCAL_INDEX_FILE_PATH = os.path.join(
-    PROJ_ROOT_DIR, agent_config.get("metadata.context_ethereum_file")
-)
-#    PROJ_ROOT_DIR, agent_config.get("metadata.context_ethereum_core_file")
-INDEX_ANNOTATION_FILE_PATH = os.path.join(
-    PROJ_ROOT_DIR, agent_config.get("metadata.annotation_ethereum_file")
-)
-#    PROJ_ROOT_DIR, agent_config.get("metadata.annotation_ethereum_core_file")
+# the catalog shard of each chain, the default database's one is loaded at startup
+CHAIN_CATALOGS = chain_catalogs_from_config(agent_config)
+DEFAULT_CHAIN = agent_config.get("database.default_database")
+DEFAULT_CHAIN_CATALOG = chain_catalog_from_config(agent_config, DEFAULT_CHAIN)
+LOCAL_INDEX_FILE_PATH = DEFAULT_CHAIN_CATALOG.context_file
+INDEX_ANNOTATION_FILE_PATH = DEFAULT_CHAIN_CATALOG.annotation_file
+COMPACT_CATALOG = bool(agent_config.get("metadata.compact_catalog"))
+PARSE_WORKERS = agent_config.get("metadata.parse_workers")
+STREAMING_LOAD = bool(agent_config.get("metadata.streaming_load"))
+METADATA_MISS_CACHE_TTL = agent_config.get("metadata.miss_cache_ttl")
 QUERY_DATABASE_TOOL_TOP_K = agent_config.get("tool.query_database_tool_top_k")
 # AGENT_EXECUTOR_RETURN_INTERMEDIDATE_STEPS = agent_config.get(
 #    "agent_chain.agent_executor_return_intermediate_steps"
@@ -82,8 +88,14 @@ def get_snowflake_container():
         **agent_config.get("shroomdk_params")
         if agent_config.get("shroomdk_params")
         else {},
-        local_index_file_path=LOCAL_INDEX_FILE_PATH,
-        index_annotation_file_path=INDEX_ANNOTATION_FILE_PATH,
+        chain_catalogs=CHAIN_CATALOGS,
+        default_chain=DEFAULT_CHAIN,
+        compact_catalog=COMPACT_CATALOG,
+        parse_workers=PARSE_WORKERS if PARSE_WORKERS is not None else 1,
+        streaming_load=STREAMING_LOAD,
+        metadata_miss_cache_ttl=METADATA_MISS_CACHE_TTL
+        if METADATA_MISS_CACHE_TTL is not None
+        else DEFAULT_METADATA_MISS_CACHE_TTL,
         verbose=False,
     )
     return container
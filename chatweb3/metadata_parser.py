@@ -1,10 +1,46 @@
 # %%
 import json
 import logging
+import multiprocessing
+import os
 import re
+import sys
+import time
 from collections import defaultdict
-from typing import Dict, List, Optional
-
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat
+from typing import Dict, List, Optional, Tuple
+
+from chatweb3.catalog.column_pruning import (
+    build_column_index,
+    is_key_column,
+    select_relevant_columns,
+)
+from chatweb3.catalog.content_hash import combine_hashes, hash_columns, hash_table
+from chatweb3.catalog.ddl_tokenizer import parse_column_definitions
+from chatweb3.catalog.indexed_catalog import IndexedCatalog, load_indexed_catalog
+from chatweb3.catalog.join_graph import (
+    MAX_JOIN_PATHS,
+    JoinGraph,
+    join_paths_need_two_tables,
+)
+from chatweb3.catalog.name_resolver import TableNameResolution, TableNameResolver
+from chatweb3.catalog.render_formats import (
+    DEFAULT_RENDER_FORMAT,
+    format_value,
+    get_render_format,
+)
+from chatweb3.catalog.sample_values import normalize_sample_values
+from chatweb3.catalog.search_index import BM25Index, TableSearchIndex
+from chatweb3.catalog.snapshot import load_catalog_snapshot, save_catalog_snapshot
+from chatweb3.catalog.streaming_json import load_json_streaming
+from chatweb3.catalog.token_budget import (
+    degraded_column_info_formats,
+    estimate_tokens,
+    plan_columns_within_budget,
+)
 from chatweb3.utils import parse_table_long_name, parse_table_long_name_to_json_list
 from config.logging_config import get_logger
 
@@ -13,6 +49,28 @@ from config.logging_config import get_logger
 # )
 logger = get_logger(__name__)
 
+# maximum number of listings kept by the listing cache of MetadataParser.get_metadata_by_table_long_names
+LISTING_CACHE_SIZE = 64
+# log the render cache statistics every RENDER_CACHE_LOG_INTERVAL lookups
+RENDER_CACHE_LOG_INTERVAL = 100
+# catalogs with fewer tables are parsed in the loading process even if parse_workers > 1,
+# starting the worker processes takes longer than parsing them
+PARALLEL_PARSE_MIN_TABLES = 2000
+# number of chunks of tables per parse worker, so that the workers finish at about the same time
+PARALLEL_PARSE_CHUNKS_PER_WORKER = 4
+# the tables of a context file, read one at a time by from_json_stream
+CONTEXT_FILE_TABLES_PATH = (
+    "root_schema_obj",
+    "databases",
+    None,
+    "schemas",
+    None,
+    "tables",
+    None,
+)
+
+DEFAULT_COLUMN_INFO_FORMAT = ["name", "comment", "data_type", "sample_values_list"]
+
 
 def nested_dict_to_dict(d):
     return {
@@ -45,7 +103,60 @@ def nested_dict():
     return defaultdict(nested_dict)
 
 
+class TableAttributeView(Mapping):
+    """Read-only {database: {schema: {table: value}}} view of a Table attribute.
+    Values are looked up on the Database/Schema/Table objects on access, so nothing is copied.
+    """
+
+    def __init__(self, objects, attribute, depth=0):
+        # objects is the databases, schemas or tables dictionary, depending on the depth
+        self._objects = objects
+        self._attribute = attribute
+        self._depth = depth
+
+    def __getitem__(self, key):
+        obj = self._objects[key]
+        if self._depth == 0:
+            return TableAttributeView(obj.schemas, self._attribute, 1)
+        if self._depth == 1:
+            return TableAttributeView(obj.tables, self._attribute, 2)
+        return getattr(obj, self._attribute) or None
+
+    def __iter__(self):
+        return iter(self._objects)
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __repr__(self) -> str:
+        return f"TableAttributeView({dict(self.items())})"
+
+
+def _table_attribute_view_property(attribute):
+    return property(
+        lambda self: TableAttributeView(self.root_schema_obj.databases, attribute),
+        doc=f"Read-only view of the {attribute} of the tables, keyed by database, schema and table names.",
+    )
+
+
+def intern_name(name):
+    """Lower-case and intern a database/schema/table/column name, so that all objects share one copy."""
+    return sys.intern(name.lower()) if name else None
+
+
 class Column:
+    __slots__ = (
+        "name",
+        "table_name",
+        "schema_name",
+        "database_name",
+        "data_type",
+        "comment",
+        "sample_values_list",
+        "domain",
+        "_verbose",
+    )
+
     def __init__(
         self,
         name,
@@ -56,13 +167,15 @@ class Column:
         comment=None,
         verbose=False,
     ):
-        self.name = name.lower()
-        self.table_name = table_name.lower() if table_name else None
-        self.schema_name = schema_name.lower() if schema_name else None
-        self.database_name = database_name.lower() if database_name else None
+        self.name = intern_name(name)
+        self.table_name = intern_name(table_name)
+        self.schema_name = intern_name(schema_name)
+        self.database_name = intern_name(database_name)
         self.data_type = data_type
         self.comment = comment
         self.sample_values_list = []
+        # optional value domain, see chatweb3.catalog.column_domains
+        self.domain = None
         self.verbose = verbose
 
     def __repr__(self) -> str:
@@ -89,40 +202,12 @@ class Column:
     def verbose(self, value):
         self._verbose = value
 
-    def _parse_data_type_from_create_table_stmt(self, create_table_stmt):
-        pattern = rf"{self.name}\s+(?P<data_type>.+?(\([^\)]+\))?(?=\s*(,|\n\s*\))))"
-
-        match = re.search(pattern, create_table_stmt, re.IGNORECASE)
-
-        if match:
-            data_type = match.group("data_type")
-        else:
-            if self.verbose:
-                logger.warning(
-                    f"{self.database_name}.{self.schema_name}.{self.table_name}: {self.name} data type not parsed from create table statement."
-                )
-            data_type = None
-        return data_type
-
-    def _parse_comment_from_ddl(self, get_ddl_create_table):
-        pattern = rf"{self.name}\s+([\w\(\),]*)?\s*COMMENT\s+'(?P<comment>.*?)'"
-        match = re.search(pattern, get_ddl_create_table, re.IGNORECASE | re.DOTALL)
-
-        if match:
-            comment = match.group("comment")
-        else:
-            if self.verbose:
-                logger.warning(
-                    f"{self.database_name}.{self.schema_name}.{self.table_name}: {self.name} comment not parsed from get_ddl_create_table."
-                )
-            comment = None
-        return comment
-
     def _parse_value_from_sample_rows(self, sample_row_column_names, sample_rows):
         if self.name in sample_row_column_names:
             index = sample_row_column_names.index(self.name)
-            values = [row[index] for row in sample_rows]
-            sample_values_list = list(values)
+            sample_values_list = normalize_sample_values(
+                row[index] for row in sample_rows
+            )
         else:
             if self.verbose:
                 logger.warning(
@@ -154,15 +239,51 @@ class Column:
 
 
 class Table:
+    # raw payloads fetched from the database, only needed until the columns are parsed
+    RAW_METADATA_ATTRIBUTES = (
+        "create_table_stmt",
+        "select_sample_rows_stmt",
+        "sample_row_column_names",
+        "sample_rows",
+        "select_get_ddl_table_stmt",
+        "get_ddl_create_table",
+        "select_information_schema_columns_stmt",
+        "information_schema_columns_names",
+        "information_schema_columns_values",
+        "select_column_domains_stmt",
+        "column_domains",
+    )
+
+    __slots__ = (
+        "name",
+        "schema_name",
+        "database_name",
+        "long_name",
+        "comment",
+        "_summary",
+        "column_names",
+        "_columns",
+        "_verbose",
+        "_loader",
+        "_token_counts",
+        "_columns_hash",
+    ) + RAW_METADATA_ATTRIBUTES
+
     def __init__(self, table_name, schema_name, database_name, verbose=False):
-        self.name = table_name.lower()
-        self.schema_name = schema_name.lower()
-        self.database_name = database_name.lower()
+        self.name = intern_name(table_name)
+        self.schema_name = intern_name(schema_name)
+        self.database_name = intern_name(database_name)
         self.long_name = f"{database_name}.{schema_name}.{table_name}".lower()
         self.comment = ""
         self.summary = ""
         self.column_names = []
+        # the hash of the parsed columns, see columns_hash
+        self._columns_hash = None
         self.columns = {}
+        # set for tables of an indexed catalog until they are hydrated, see hydrate()
+        self._loader = None
+        # column_info_format -> token counts of the rendered metadata, see token_counts()
+        self._token_counts = {}
         self.create_table_stmt = None
         self.select_sample_rows_stmt = None
         self.sample_row_column_names = None
@@ -172,6 +293,8 @@ class Table:
         self.select_information_schema_columns_stmt = None
         self.information_schema_columns_names = None
         self.information_schema_columns_values = None
+        self.select_column_domains_stmt = None
+        self.column_domains = None
         self.verbose = verbose
 
     def __repr__(self) -> str:
@@ -179,6 +302,8 @@ class Table:
 
     def __eq__(self, other):
         if isinstance(other, Table):
+            self.hydrate()
+            other.hydrate()
             return (
                 self.name == other.name
                 and self.database_name == other.database_name
@@ -199,6 +324,8 @@ class Table:
                 == other.information_schema_columns_names
                 and self.information_schema_columns_values
                 == other.information_schema_columns_values
+                and self.select_column_domains_stmt == other.select_column_domains_stmt
+                and self.column_domains == other.column_domains
                 and self.columns == other.columns
             )
         return False
@@ -224,9 +351,61 @@ class Table:
     @verbose.setter
     def verbose(self, verbose):
         self._verbose = verbose
-        for column in self.columns.values():
+        # do not hydrate the table, its columns get the verbose flag when they are loaded
+        for column in self._columns.values():
             column.verbose = verbose
 
+    @property
+    def columns(self):
+        if self._loader is not None:
+            self.hydrate()
+        return self._columns
+
+    @columns.setter
+    def columns(self, columns):
+        self._columns = columns
+        # the token counts and the hash are computed from the columns
+        self._token_counts = {}
+        self._columns_hash = None
+
+    @property
+    def columns_hash(self) -> str:
+        """The hash of the parsed columns, see chatweb3.catalog.content_hash. It is computed once the table is
+        parsed, and read from the catalog file for the tables of an indexed or SQLite catalog without loading them.
+        """
+        columns_hash: Optional[str] = self._columns_hash
+        if columns_hash is None:
+            columns_hash = self._columns_hash = hash_columns(self.columns.values())
+        return columns_hash
+
+    def content_hash(self) -> str:
+        """The hash of the metadata of the table, its header and its parsed columns, see chatweb3.catalog.content_hash."""
+        return hash_table(
+            self.long_name,
+            self.comment,
+            self.summary,
+            self.column_names,
+            self.columns_hash,
+        )
+
+    def hydrate(self):
+        """Load the columns and raw metadata of a table whose catalog entry is loaded lazily,
+        see chatweb3.catalog.indexed_catalog. Does nothing if the table is already loaded.
+        """
+        loader = self._loader
+        if loader is None:
+            return
+        loaded_table = loader()
+        for attribute in (
+            "comment",
+            "column_names",
+            "_columns",
+        ) + self.RAW_METADATA_ATTRIBUTES:
+            setattr(self, attribute, getattr(loaded_table, attribute))
+        # the summary comes from the annotation file and is kept as is
+        self._loader = None
+        self.verbose = self._verbose
+
     def _parse_comment_from_ddl(self, get_ddl_create_table):
         comment_pattern = re.compile(
             r"COMMENT='{1,3}(.*?)'{1,3}(?:[\s\\n]*as[\s\\n]*\((?:.|[\r\n])*?SELECT|[\s\\n]*;)",
@@ -243,6 +422,11 @@ class Table:
             comment = ""
         return comment
 
+    def drop_raw_metadata(self):
+        """Drop the raw DDL, sample rows and information schema payloads of the table."""
+        for attribute in self.RAW_METADATA_ATTRIBUTES:
+            setattr(self, attribute, None)
+
     def _create_columns(self):
         """Create Column objects for each column in the table if they do not already exist."""
         for column_name in self.column_names:
@@ -252,15 +436,10 @@ class Table:
                     table_name=self.name,
                     schema_name=self.schema_name,
                     database_name=self.database_name,
+                    verbose=self.verbose,
                 )
 
-    @staticmethod
-    def _format_value(value):
-        if isinstance(value, str):
-            replaced_value = value.replace("\n", " ")
-            # return f"'{replaced_value}'"
-            return replaced_value
-        return value
+    _format_value = staticmethod(format_value)
 
     def _get_metadata(
         self,
@@ -269,63 +448,91 @@ class Table:
         include_column_names: bool = False,
         include_column_info: bool = True,
         column_info_format: Optional[List[str]] = None,
+        columns_to_render: Optional[List[str]] = None,
+        omission_reason: str = "as less relevant to the question",
+        render_format: str = DEFAULT_RENDER_FORMAT,
     ) -> str:
         """
         By default, this method returns a string with the table name, summary.
         Optionally it can return column names, or more detailed column information.
+        If columns_to_render is given, the column information only includes these columns, followed by the names of the omitted columns.
+        The column information is rendered in render_format, see chatweb3.catalog.render_formats.
         """
-        output = ""
-        if include_table_name:
-            output += f"'{self.database_name}.{self.schema_name}.{self.name}': the '{self.name}' table in '{self.schema_name}' schema of '{self.database_name}' database. "
+        parts = []
+        if include_table_name and not include_column_info:
+            parts.append(
+                f"'{self.database_name}.{self.schema_name}.{self.name}': the '{self.name}' table in '{self.schema_name}' schema of '{self.database_name}' database. "
+            )
         if include_table_summary and not include_column_info:
             # if include_column_info if True, then we will use the table comment as the summary and not the table summary
-            output += f"{self.summary}"
+            parts.append(f"{self.summary}")
 
         if include_column_names and not include_column_info:
             column_names = ", ".join(self.column_names)
-            output += f"This table has the following columns: '{column_names}'\n"
+            parts.append(f"This table has the following columns: '{column_names}'\n")
 
         if include_column_info:
             if column_info_format is None:
-                column_info_format = [
-                    "name",
-                    "comment",
-                    "data_type",
-                    "sample_values_list",
-                ]
-            column_info = {
-                "name": "Name",
-                "comment": "Comment",
-                "data_type": "Data type",
-                "sample_values_list": "List of sample values",
-            }
+                column_info_format = DEFAULT_COLUMN_INFO_FORMAT
 
-            output += f"\nComment: {self.comment}\n"
+            formatter = get_render_format(render_format)
+            parts.append(
+                formatter.format_head(self, include_table_name, column_info_format)
+            )
 
+            omitted_column_names: List[str] = []
             if len(column_info_format) > 0:
-                output += "Columns in this table:\n"
+                columns = self.columns
+                if columns_to_render is not None:
+                    rendered_column_names = set(columns_to_render)
+                    omitted_column_names = [
+                        name for name in columns if name not in rendered_column_names
+                    ]
+                    columns = {name: columns[name] for name in columns_to_render}
 
-                headers = [column_info[col] for col in column_info_format]
-                output += "\t" + " | ".join(headers) + "\n"
-                output += "\t" + "--- | " * (len(column_info_format) - 1) + "---\n"
+                for column in columns.values():
+                    parts.append(formatter.format_column(column, column_info_format))
 
-                for column in self.columns.values():
-                    column_values = [getattr(column, col) for col in column_info_format]
+            parts.append(
+                formatter.format_tail(self, omitted_column_names, omission_reason)
+            )
 
-                    formatted_values = [
-                        ", ".join(str(self._format_value(v)) for v in value)
-                        if isinstance(value, list)
-                        else self._format_value(value)
-                        for value in column_values
-                    ]
+        return "".join(parts).strip()
 
-                    output += (
-                        "\t" + " | ".join([str(val) for val in formatted_values]) + "\n"
+    def token_counts(
+        self, column_info_format=None, render_format: str = DEFAULT_RENDER_FORMAT
+    ) -> Tuple[int, Dict[str, int]]:
+        """Return the estimated number of tokens of the metadata rendered with column info in the given format:
+        the tokens of the table name, comment, column header and end of the table, and the tokens of each column.
+        The counts are computed once per format and kept with the table, see chatweb3.catalog.token_budget.
+        """
+        if column_info_format is None:
+            column_info_format = DEFAULT_COLUMN_INFO_FORMAT
+        # the counts of the default render format are keyed by the column info format alone
+        key = tuple(column_info_format)
+        if render_format != DEFAULT_RENDER_FORMAT:
+            key = (render_format,) + key
+        token_counts: Optional[Tuple[int, Dict[str, int]]] = self._token_counts.get(key)
+        if token_counts is None:
+            formatter = get_render_format(render_format)
+            header = formatter.format_head(
+                self, True, column_info_format
+            ) + formatter.format_tail(self, [], "")
+            token_counts = self._token_counts[key] = (
+                estimate_tokens(header),
+                {
+                    name: estimate_tokens(
+                        formatter.format_column(column, column_info_format)
                     )
-
-        return output.strip()
+                    if column_info_format
+                    else 0
+                    for name, column in self.columns.items()
+                },
+            )
+        return token_counts
 
     def to_dict(self):
+        self.hydrate()
         return {
             key: value
             for key, value in {
@@ -348,6 +555,8 @@ class Table:
                 "select_information_schema_columns_stmt": self.select_information_schema_columns_stmt,
                 "information_schema_columns_names": self.information_schema_columns_names,
                 "information_schema_columns_values": self.information_schema_columns_values,
+                "select_column_domains_stmt": self.select_column_domains_stmt,
+                "column_domains": self.column_domains,
             }.items()
             if value
         }
@@ -361,9 +570,9 @@ class Table:
         table.long_name = data.get("long_name").lower()
         table.comment = data.get("comment")
         table.summary = data.get("summary")
-        table.column_names = [x.lower() for x in data.get("column_names")]
+        table.column_names = [intern_name(x) for x in data.get("column_names")]
         table.columns = {
-            name.lower(): Column.from_dict(col_data)
+            intern_name(name): Column.from_dict(col_data)
             for name, col_data in data.get("columns", {}).items()
         }
         table.create_table_stmt = data.get("create_table_stmt")
@@ -381,6 +590,8 @@ class Table:
         table.information_schema_columns_values = data.get(
             "information_schema_columns_values"
         )
+        table.select_column_domains_stmt = data.get("select_column_domains_stmt")
+        table.column_domains = data.get("column_domains")
         # adjust for columns
         return table
 
@@ -428,7 +639,7 @@ class Schema:
     def from_dict(cls, data):
         schema = cls(data["name"], data["database_name"])
         schema.tables = {
-            name.lower(): Table.from_dict(table_data)
+            intern_name(name): Table.from_dict(table_data)
             for name, table_data in data["tables"].items()
         }
         return schema
@@ -472,7 +683,7 @@ class Database:
         database = cls(data.get("name"))
         # ["name"])
         database.schemas = {
-            name.lower(): Schema.from_dict(schema_data)
+            intern_name(name): Schema.from_dict(schema_data)
             for name, schema_data in data["schemas"].items()
         }
         return database
@@ -519,27 +730,117 @@ class RootSchema:
         return root_schema
 
 
+# the raw metadata of a table sent to the parse workers, see MetadataParser._parse_tables_in_parallel
+_PARSED_RAW_METADATA_ATTRIBUTES = (
+    "create_table_stmt",
+    "get_ddl_create_table",
+    "sample_row_column_names",
+    "sample_rows",
+)
+
+
+def _parse_tables(raw_tables: List[tuple], verbose: bool) -> List[tuple]:
+    """Parse the tables in a worker process of MetadataParser._parse_tables_in_parallel, each given by its
+    names, the names of its columns and its _PARSED_RAW_METADATA_ATTRIBUTES.
+    Returns the comment of each table and the data types, comments and sample values of its columns, as three lists
+    rather than a tuple per column, which are faster to unpickle in the loading process.
+    """
+    metadata_parser = MetadataParser(verbose=verbose)
+    parsed_tables: List[tuple] = []
+    for table_names, column_names, raw_metadata in raw_tables:
+        name, schema_name, database_name = table_names
+        table = Table(name, schema_name, database_name, verbose=verbose)
+        table.column_names = column_names
+        for attribute, value in zip(_PARSED_RAW_METADATA_ATTRIBUTES, raw_metadata):
+            setattr(table, attribute, value)
+        metadata_parser._parse_table(table)
+        columns = table.columns.values()
+        parsed_tables.append(
+            (
+                table.comment,
+                [column.data_type for column in columns],
+                [column.comment for column in columns],
+                [column.sample_values_list for column in columns],
+            )
+        )
+    return parsed_tables
+
+
 class MetadataParser:
     def __init__(
         self,
         file_path: Optional[str] = None,
         annotation_file_path: Optional[str] = None,
         verbose: bool = False,
+        snapshot_file_path: Optional[str] = None,
+        compact: bool = False,
+        indexed_catalog_file_path: Optional[str] = None,
+        parse_workers: int = 1,
+        streaming_load: bool = False,
     ):
         """
         Note: the verbose flag is only effective when the file_path is provided. Otherwise, we have to manually set it after the contents of the root_schema_obj is set.
         The verbose flag is useful when we want to print out the processing warning messages, e.g., parsing issues for comments and other fields of metadata.
+        If a snapshot_file_path is provided and the snapshot is up to date with the context and annotation files, the parsed catalog is loaded from the snapshot instead of the JSON files.
+        If compact is True, the raw DDL, sample rows and information schema payloads of the tables are dropped once they are parsed, the context file remains their source.
+        If an indexed_catalog_file_path is provided and the catalog is up to date with the context file (if any), only the table names, comments and column names are loaded at startup, the tables are loaded from the catalog on first access.
+        If parse_workers is more than 1 (0 for one per core), the tables of a large context file are parsed by a pool of that many processes, see from_dict.
+        If streaming_load is True, the context file is read and parsed table by table instead of being loaded into one dict first, see from_json_stream.
         """
         self.file_path = file_path
+        self.annotation_file_path = annotation_file_path
         self._verbose = verbose
+        self.compact = compact
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self._indexed_catalog: Optional[IndexedCatalog] = None
+        self._render_cache_stats = {
+            "hits": 0,
+            "misses": 0,
+            "listing_hits": 0,
+            "listing_misses": 0,
+            "render_ms": 0.0,
+        }
+
+        indexed_catalog = None
+        if indexed_catalog_file_path is not None:
+            indexed_catalog = load_indexed_catalog(
+                indexed_catalog_file_path,
+                [file_path] if file_path is not None else None,
+            )
 
-        self._initialize_nested_dicts()
+        root_schema_obj = None
+        if (
+            indexed_catalog is None
+            and file_path is not None
+            and snapshot_file_path is not None
+        ):
+            root_schema_obj = load_catalog_snapshot(
+                snapshot_file_path, [file_path, annotation_file_path], compact=compact
+            )
 
-        if file_path is not None:
-            # If a file_path is provided, load metadata from the file
-            data = self.load_metadata_from_json()
-            # then deserialize the metadata into the RootSchema object
-            self.from_dict(data, verbose=verbose)
+        if indexed_catalog is not None:
+            # The tables are loaded from the indexed catalog on first access
+            self.from_indexed_catalog(indexed_catalog)
+            if annotation_file_path is not None:
+                self.add_table_summary(file_path_json=annotation_file_path)
+        elif root_schema_obj is not None:
+            # The snapshot already contains the parsed metadata and the table summaries
+            self.root_schema_obj = root_schema_obj
+            if verbose:
+                self.root_schema_obj.verbose = verbose
+            if compact:
+                self.drop_raw_metadata()
+            self._build_table_index()
+        elif file_path is not None:
+            if streaming_load:
+                # Read the metadata from the file table by table into the RootSchema object
+                self.from_json_stream(verbose=verbose)
+            else:
+                # If a file_path is provided, load metadata from the file
+                data = self.load_metadata_from_json()
+                # then deserialize the metadata into the RootSchema object
+                self.from_dict(data, verbose=verbose)
+                del data
 
             if annotation_file_path is not None:
                 # If an annotation_file_path is provided, load the annotation file and add the summary to the RootSchema object
@@ -551,170 +852,385 @@ class MetadataParser:
             # If no file_path is provided, create an empty RootSchema object
             self.root_schema_obj = RootSchema()
 
+        if self.root_schema_obj.databases and self._content_hash is None:
+            self._update_content_hashes()
+
     def from_dict(self, data, verbose: bool = False):
         """Takes in the metadata dictionary loaded from the JSON file and deserializes it into the RootSchema object"""
         self.root_schema_obj = RootSchema.from_dict(data=data["root_schema_obj"])
         self._unify_names_to_lower_cases()
-        # Create the column objects for each table
-        self._create_table_columns()
         if verbose:
             self.root_schema_obj.verbose = verbose
+        tables = [
+            table
+            for database in self.root_schema_obj.databases.values()
+            for schema in database.schemas.values()
+            for table in schema.tables.values()
+        ]
+        if self.parse_workers > 1 and len(tables) >= PARALLEL_PARSE_MIN_TABLES:
+            self._parse_tables_in_parallel(tables)
+        else:
+            for table in tables:
+                self._parse_table(table)
+        self._build_table_index()
+
+    def from_json_stream(self, file_path=None, verbose: bool = False):
+        """Read the JSON file incrementally into the RootSchema object, see chatweb3.catalog.streaming_json.
+        Each table is built and parsed as soon as it is read, so that the dict of the whole file is never held,
+        and with compact only the raw payloads of the table being parsed are. The result is the same as from_dict,
+        but the tables are always parsed in this process.
+        """
+        if file_path is None:
+            file_path = self.file_path
+        # (database key, schema key, table key, table) in the order of the file
+        tables = []
 
-        # Populate the comment for each table
-        self._populate_table_comment()
-        # Populate various column attributes
-        self._populate_column_table_schema_database_names()
-        self._populate_column_data_type()
-        self._populate_column_comment()
-        self._populate_column_sample_values_list()
-
-        # NOTE: the use of nested dicts will be removed in the future
-        # Initialize the nested dictionaries
-        self._initialize_nested_dicts()
-        # Populate the nested dictionaries
-        self._populate_nested_dicts()
+        def add_table(keys, table_data):
+            table = Table.from_dict(table_data)
+            if verbose:
+                table.verbose = verbose
+            self._parse_table(table)
+            tables.append((keys[2], keys[4], keys[6], table))
 
-    def to_dict(self):
+        with open(file_path, "r") as f:
+            data = load_json_streaming(f, CONTEXT_FILE_TABLES_PATH, add_table)
+        # the databases and schemas, without their tables
+        self.root_schema_obj = RootSchema.from_dict(data=data["root_schema_obj"])
+        for database_key, schema_key, table_key, table in tables:
+            schema = self.root_schema_obj.databases[database_key.lower()].schemas[
+                intern_name(schema_key)
+            ]
+            schema.tables[intern_name(table_key)] = table
         self._unify_names_to_lower_cases()
-        data = {
-            "root_schema_obj": self.root_schema_obj.to_dict(),
-        }
-        return data
-
-    def _initialize_nested_dicts(self):
-        self.create_table_stmt = nested_dict()
-        self.select_sample_rows_stmt = nested_dict()
-        self.table_sample_rows = nested_dict()
-        self.table_sample_row_column_names = nested_dict()
-        self.select_get_ddl_table_stmt = nested_dict()
-        self.get_ddl_create_table = nested_dict()
-        self.select_information_schema_columns_stmt = nested_dict()
-        self.information_schema_columns_names = nested_dict()
-        self.information_schema_columns_values = nested_dict()
-
-    def _populate_nested_dicts(self):
-        for database_name, database in self.root_schema_obj.databases.items():
-            for schema_name, schema in database.schemas.items():
-                for table_name, table in schema.tables.items():
-                    self.create_table_stmt[database_name][schema_name][table_name] = (
-                        table.create_table_stmt or None
-                    )
+        if verbose:
+            self.root_schema_obj.verbose = verbose
+        self._build_table_index()
 
-                    self.select_sample_rows_stmt[database_name][schema_name][
-                        table_name
-                    ] = (table.select_sample_rows_stmt or None)
+    def _parse_tables_in_parallel(self, tables: List[Table]):
+        """Parse the tables like _parse_table, with the comment, data type and sample value parsing of the
+        tables sharded across a pool of parse_workers processes. Only the raw payloads the parsing needs are sent
+        to the workers, and only the parsed values are sent back and set on the tables of this process.
+        """
+        start_time = time.perf_counter()
+        for table in tables:
+            table._create_columns()
+        num_chunks = self.parse_workers * PARALLEL_PARSE_CHUNKS_PER_WORKER
+        # every num_chunks-th table, so that the large tables of a schema are spread over the chunks
+        chunks = [tables[i::num_chunks] for i in range(num_chunks)]
+        raw_chunks = [
+            [
+                (
+                    (table.name, table.schema_name, table.database_name),
+                    list(table.columns),
+                    [
+                        getattr(table, attribute)
+                        for attribute in _PARSED_RAW_METADATA_ATTRIBUTES
+                    ],
+                )
+                for table in chunk
+            ]
+            for chunk in chunks
+        ]
+        with ProcessPoolExecutor(
+            max_workers=self.parse_workers,
+            # forking a process whose other threads hold locks, e.g. of the logging handlers, may deadlock
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            for chunk, parsed_tables in zip(
+                chunks, executor.map(_parse_tables, raw_chunks, repeat(self.verbose))
+            ):
+                for table, (comment, *parsed_columns) in zip(chunk, parsed_tables):
+                    table.comment = comment
+                    self._populate_column_table_schema_database_names(table)
+                    for column, data_type, column_comment, sample_values_list in zip(
+                        table.columns.values(), *parsed_columns
+                    ):
+                        column.data_type = data_type
+                        column.comment = column_comment
+                        column.sample_values_list = sample_values_list
+                    self._populate_column_domain(table)
+                    if self.compact:
+                        table.drop_raw_metadata()
+        logger.info(
+            f"Parsed {len(tables)} tables with {self.parse_workers} processes in "
+            f"{(time.perf_counter() - start_time) * 1000:.0f} ms"
+        )
 
-                    self.table_sample_row_column_names[database_name][schema_name][
-                        table_name
-                    ] = (table.sample_row_column_names or None)
+    def from_indexed_catalog(self, indexed_catalog: IndexedCatalog):
+        """Create the RootSchema object with a lazily loaded table for each entry of the indexed catalog."""
+        self._indexed_catalog = indexed_catalog
+        root_schema_obj = RootSchema()
+        for table_long_name, entry in indexed_catalog.pop_table_headers().items():
+            database_name = intern_name(entry["database_name"])
+            schema_name = intern_name(entry["schema_name"])
+            database = root_schema_obj.databases.get(database_name)
+            if database is None:
+                database = root_schema_obj.databases[database_name] = Database(
+                    database_name
+                )
+            schema = database.schemas.get(schema_name)
+            if schema is None:
+                schema = database.schemas[schema_name] = Schema(
+                    schema_name, database_name
+                )
+            table = Table(entry["name"], schema_name, database_name)
+            table.comment = entry["comment"]
+            table.summary = entry["summary"]
+            table.column_names = [intern_name(x) for x in entry["column_names"]]
+            table._columns_hash = entry["columns_hash"]
+            table._loader = partial(self._load_indexed_table, table_long_name)
+            schema.tables[table.name] = table
+        self.root_schema_obj = root_schema_obj
+        if self.verbose:
+            self.root_schema_obj.verbose = self.verbose
+        self._build_table_index()
+
+    def _load_indexed_table(self, table_long_name) -> Table:
+        """Read and parse a table of the indexed catalog, called by Table.hydrate()."""
+        if self._indexed_catalog is None:
+            raise ValueError(
+                f"Unable to load table {table_long_name}: no indexed catalog is open"
+            )
+        data = self._indexed_catalog.read_table(table_long_name)
+        data.setdefault("column_names", [])
+        table: Table = Table.from_dict(data)
+        table.verbose = self.verbose
+        self._parse_table(table)
+        logger.debug(f"Loaded table {table_long_name} from the indexed catalog")
+        return table
 
-                    self.table_sample_rows[database_name][schema_name][table_name] = (
-                        table.sample_rows or None
-                    )
+    def hydrate_tables(self):
+        """Load all lazily loaded tables of an indexed catalog."""
+        for database in self.root_schema_obj.databases.values():
+            for schema in database.schemas.values():
+                for table in schema.tables.values():
+                    table.hydrate()
 
-                    self.select_get_ddl_table_stmt[database_name][schema_name][
-                        table_name
-                    ] = (table.select_get_ddl_table_stmt or None)
+    def compute_token_counts(self):
+        """Compute the token counts of every table for the column info formats used by the token budget,
+        so that they are stored with the catalog snapshot."""
+        for database in self.root_schema_obj.databases.values():
+            for schema in database.schemas.values():
+                for table in schema.tables.values():
+                    for column_info_format in degraded_column_info_formats(
+                        DEFAULT_COLUMN_INFO_FORMAT
+                    ):
+                        table.token_counts(column_info_format)
+
+    def _parse_table(self, table):
+        """Create the columns of a table and populate the table and column attributes from its raw metadata."""
+        # Create the column objects for the table
+        table._create_columns()
+        # Populate the comment for the table
+        self._populate_table_comment(table)
+        # Populate various column attributes
+        self._populate_column_table_schema_database_names(table)
+        self._populate_column_data_type(table)
+        self._populate_column_comment(table)
+        self._populate_column_sample_values_list(table)
+        self._populate_column_domain(table)
+        if self.compact:
+            table.drop_raw_metadata()
 
-                    self.get_ddl_create_table[database_name][schema_name][
-                        table_name
-                    ] = (table.get_ddl_create_table or None)
+    @property
+    def root_schema_obj(self):
+        return self._root_schema_obj
+
+    @root_schema_obj.setter
+    def root_schema_obj(self, root_schema_obj):
+        self._root_schema_obj = root_schema_obj
+        # database.schema.table -> Table, see _get_table
+        self._table_index: Dict[str, Table] = {}
+        # built on the first search, see search_index
+        self._search_index: Optional[TableSearchIndex] = None
+        # built on the first join path lookup, see join_graph
+        self._join_graph: Optional[JoinGraph] = None
+        # built on the first table name resolution, see name_resolver
+        self._name_resolver: Optional[TableNameResolver] = None
+        # table long name -> BM25 index of its columns, see _select_columns
+        self._column_indexes: Dict[str, BM25Index] = {}
+        # table long name -> content hash of the table, see content_hash
+        self._table_content_hashes: Dict[str, str] = {}
+        self._content_hash: Optional[str] = None
+        self.clear_render_cache()
+
+    def _build_table_index(self):
+        """Index all tables of the catalog by their database.schema.table long names."""
+        self._table_index = {
+            f"{database_name}.{schema_name}.{table_name}": table
+            for database_name, database in self.root_schema_obj.databases.items()
+            for schema_name, schema in database.schemas.items()
+            for table_name, table in schema.tables.items()
+        }
 
-                    self.select_information_schema_columns_stmt[database_name][
-                        schema_name
-                    ][table_name] = (
-                        table.select_information_schema_columns_stmt or None
-                    )
+    def _get_schema(self, database_name, schema_name) -> Optional[Schema]:
+        database = self.root_schema_obj.databases.get(database_name)
+        return database.schemas.get(schema_name) if database is not None else None
+
+    def _get_table(self, database_name, schema_name, table_name) -> Optional[Table]:
+        """Return the table with the given names in constant time, or None if it does not exist."""
+        table_long_name = f"{database_name}.{schema_name}.{table_name}"
+        table = self._table_index.get(table_long_name)
+        if table is not None:
+            return table
+        # tables added to the catalog after it was loaded are indexed on first access
+        schema = self._get_schema(database_name, schema_name)
+        added_table: Optional[Table] = (
+            schema.tables.get(table_name) if schema is not None else None
+        )
+        if added_table is not None:
+            self._table_index[table_long_name] = added_table
+        return added_table
 
-                    self.information_schema_columns_names[database_name][schema_name][
-                        table_name
-                    ] = (table.information_schema_columns_names or None)
+    @property
+    def content_hash(self) -> str:
+        """The hash of the metadata of all tables of the catalog, see chatweb3.catalog.content_hash.
+        It is computed at load and after add_table_summary(), and changes exactly when the metadata of a table does.
+        """
+        if self._content_hash is None:
+            # hashes the empty catalog as well
+            self._update_content_hashes()
+        assert self._content_hash is not None
+        return self._content_hash
+
+    def table_content_hash(self, table_long_name: str) -> Optional[str]:
+        """Return the content hash of a table, or None if it is not in the catalog."""
+        try:
+            table = self._get_table(*parse_table_long_name(table_long_name.lower()))
+        except ValueError:
+            return None
+        if table is None:
+            return None
+        content_hash = self._table_content_hashes.get(table.long_name)
+        if content_hash is None:
+            content_hash = self._table_content_hashes[
+                table.long_name
+            ] = table.content_hash()
+        return content_hash
+
+    def _update_content_hashes(self, tables: Optional[List[Table]] = None) -> List[str]:
+        """Compute the content hashes of the tables, all tables of the catalog if None, and of the catalog.
+        Returns the long names of the tables whose hash changed.
+        """
+        if tables is None:
+            tables = [
+                table
+                for database in self.root_schema_obj.databases.values()
+                for schema in database.schemas.values()
+                for table in schema.tables.values()
+            ]
+        changed_table_long_names = []
+        for table in tables:
+            content_hash = table.content_hash()
+            if self._table_content_hashes.get(table.long_name) != content_hash:
+                self._table_content_hashes[table.long_name] = content_hash
+                changed_table_long_names.append(table.long_name)
+        self._content_hash = combine_hashes(self._table_content_hashes)
+        return changed_table_long_names
 
-                    self.information_schema_columns_values[database_name][schema_name][
-                        table_name
-                    ] = (table.information_schema_columns_values or None)
+    def to_dict(self):
+        self._unify_names_to_lower_cases()
+        data = {
+            "root_schema_obj": self.root_schema_obj.to_dict(),
+        }
+        return data
 
-    def _populate_column_table_schema_database_names(self):
-        for database_name, database in self.root_schema_obj.databases.items():
-            for schema_name, schema in database.schemas.items():
-                for table_name, table in schema.tables.items():
-                    for column in table.columns.values():
-                        column.table_name = table_name
-                        column.schema_name = schema_name
-                        column.database_name = database_name
-
-    def _create_table_columns(self):
-        """Create Column objects for each column in each table in each schema in each database, if they do not already exists."""
-        for database_name, database in self.root_schema_obj.databases.items():
-            for schema_name, schema in database.schemas.items():
-                for table_name, table in schema.tables.items():
-                    table._create_columns()
-
-    def _populate_column_comment(self):
-        for database_name, database in self.root_schema_obj.databases.items():
-            for schema_name, schema in database.schemas.items():
-                for table_name, table in schema.tables.items():
-                    ddl_create_table = table.get_ddl_create_table
-                    for column in table.columns.values():
-                        column.comment = (
-                            column._parse_comment_from_ddl(ddl_create_table)
-                            if ddl_create_table
-                            else None
-                        )
-
-    #                    ddl_create_table = self.get_ddl_create_table[database_name][ schema_name ][table_name]
-
-    def _populate_column_data_type(self):
-        for database_name, database in self.root_schema_obj.databases.items():
-            for schema_name, schema in database.schemas.items():
-                for table_name, table in schema.tables.items():
-                    create_table_stmt = table.create_table_stmt
-                    for column in table.columns.values():
-                        column.data_type = (
-                            (
-                                column._parse_data_type_from_create_table_stmt(
-                                    create_table_stmt
-                                )
-                            )
-                            if create_table_stmt
-                            else None
-                        )
-
-                    # create_table_stmt = self.create_table_stmt[database_name][ schema_name ][table_name]
-
-    def _populate_column_sample_values_list(self):
+    # read-only views of the raw table payloads, e.g. create_table_stmt[database][schema][table]
+    create_table_stmt = _table_attribute_view_property("create_table_stmt")
+    select_sample_rows_stmt = _table_attribute_view_property("select_sample_rows_stmt")
+    table_sample_rows = _table_attribute_view_property("sample_rows")
+    table_sample_row_column_names = _table_attribute_view_property(
+        "sample_row_column_names"
+    )
+    select_get_ddl_table_stmt = _table_attribute_view_property(
+        "select_get_ddl_table_stmt"
+    )
+    get_ddl_create_table = _table_attribute_view_property("get_ddl_create_table")
+    select_information_schema_columns_stmt = _table_attribute_view_property(
+        "select_information_schema_columns_stmt"
+    )
+    information_schema_columns_names = _table_attribute_view_property(
+        "information_schema_columns_names"
+    )
+    information_schema_columns_values = _table_attribute_view_property(
+        "information_schema_columns_values"
+    )
+
+    def drop_raw_metadata(self):
+        """Drop the raw payloads of all tables, only the parsed catalog is kept in memory."""
         for database in self.root_schema_obj.databases.values():
             for schema in database.schemas.values():
                 for table in schema.tables.values():
-                    for column in table.columns.values():
-                        column.sample_values_list = (
-                            column._parse_value_from_sample_rows(
-                                table.sample_row_column_names,
-                                table.sample_rows,
-                            )
-                            if table.sample_rows
-                            else None
-                        )
-
-    def _populate_table_comment(self):
-        for db in self.root_schema_obj.databases.values():
-            for schema in db.schemas.values():
-                for table in schema.tables.values():
-                    table.comment = (
-                        table._parse_comment_from_ddl(table.get_ddl_create_table)
-                        if table.get_ddl_create_table
-                        else None
-                    )
+                    table.drop_raw_metadata()
+
+    def _populate_column_table_schema_database_names(self, table):
+        for column in table.columns.values():
+            column.table_name = table.name
+            column.schema_name = table.schema_name
+            column.database_name = table.database_name
+
+    def _populate_column_comment(self, table):
+        ddl_create_table = table.get_ddl_create_table
+        if not ddl_create_table:
+            for column in table.columns.values():
+                column.comment = None
+            return
+        # parse the column list once per table instead of once per column
+        column_definitions = parse_column_definitions(ddl_create_table)
+        for column in table.columns.values():
+            column.comment = column_definitions.get(column.name, (None, None))[1]
+            if column.comment is None and column.verbose:
+                logger.warning(
+                    f"{table.long_name}: {column.name} comment not parsed from get_ddl_create_table."
+                )
+
+    def _populate_column_data_type(self, table):
+        create_table_stmt = table.create_table_stmt
+        if not create_table_stmt:
+            for column in table.columns.values():
+                column.data_type = None
+            return
+        # parse the column list once per table instead of once per column
+        column_definitions = parse_column_definitions(create_table_stmt)
+        for column in table.columns.values():
+            column.data_type = column_definitions.get(column.name, (None, None))[0]
+            if column.data_type is None and column.verbose:
+                logger.warning(
+                    f"{table.long_name}: {column.name} data type not parsed from create table statement."
+                )
+
+    def _populate_column_sample_values_list(self, table):
+        for column in table.columns.values():
+            column.sample_values_list = (
+                column._parse_value_from_sample_rows(
+                    table.sample_row_column_names,
+                    table.sample_rows,
+                )
+                if table.sample_rows
+                else None
+            )
+
+    def _populate_column_domain(self, table):
+        column_domains = table.column_domains or {}
+        for column in table.columns.values():
+            column.domain = column_domains.get(column.name)
+
+    def _populate_table_comment(self, table):
+        table.comment = (
+            table._parse_comment_from_ddl(table.get_ddl_create_table)
+            if table.get_ddl_create_table
+            else None
+        )
 
     def _unify_names_to_lower_cases(self):
         for database in self.root_schema_obj.databases.values():
-            database.name = database.name.lower()
+            database.name = intern_name(database.name)
             for schema in database.schemas.values():
-                schema.name = schema.name.lower()
+                schema.name = intern_name(schema.name)
                 for table in schema.tables.values():
-                    table.name = table.name.lower()
+                    table.name = intern_name(table.name)
                     for column in table.columns.values():
-                        column.name = column.name.lower()
+                        column.name = intern_name(column.name)
 
     def add_table_summary(
         self,
@@ -741,16 +1257,17 @@ class MetadataParser:
                 "Both table_summary_json and file_path_json are provided, use file_path_json only."
             )
 
-        print(f"{file_path_json=}")
         if file_path_json:
+            logger.debug(f"Loading table summaries from {file_path_json}")
             try:
                 with open(file_path_json, "r") as f:
                     data = json.load(f)
-                    print(f"{data=}")
                     table_summary = data.get("table_summary", None)
-                    print(f"{table_summary=}")
+                    logger.debug(
+                        f"Loaded {len(table_summary or {})} table summaries from {file_path_json}"
+                    )
             except FileNotFoundError:
-                print(f"File not found: {file_path_json}")
+                logger.warning(f"File not found: {file_path_json}")
         elif table_summary_json:
             # table_summary = json.loads(table_summary_json)
             table_summary = table_summary_json
@@ -759,15 +1276,28 @@ class MetadataParser:
                 f"Unable to load table summary from {file_path_json} or {table_summary_json}."
             )
 
-        for table_long_name, summary in table_summary.items():
-            # parse the table long name
-            database_name, schema_name, table_name = parse_table_long_name(
-                table_long_name
+        tables = []
+        try:
+            for table_long_name, summary in table_summary.items():
+                # parse the table long name
+                database_name, schema_name, table_name = parse_table_long_name(
+                    table_long_name
+                )
+                # add the summary to the table
+                table = self._get_table(database_name, schema_name, table_name)
+                if table is None:
+                    raise KeyError(table_long_name)
+                table.summary = summary
+                tables.append(table)
+        finally:
+            # the rendered metadata of the tables and the search index include their summaries,
+            # only the tables whose content hash changed are rendered again
+            changed_table_long_names = self._update_content_hashes(
+                tables if self._content_hash is not None else None
             )
-            # add the summary to the table
-            self.root_schema_obj.databases[database_name].schemas[schema_name].tables[
-                table_name
-            ].summary = summary
+            if changed_table_long_names:
+                self._evict_rendered_tables(changed_table_long_names)
+                self._search_index = None
 
     # create a property to access the verbose attribute
     @property
@@ -780,7 +1310,23 @@ class MetadataParser:
         self._verbose = value
         self.root_schema_obj.verbose = value
 
+    def save_catalog_snapshot(self, snapshot_file_path):
+        """Save the parsed catalog to a binary snapshot tied to the current context and annotation files."""
+        # the snapshot holds complete tables, not references to the indexed catalog
+        self.hydrate_tables()
+        self.compute_token_counts()
+        save_catalog_snapshot(
+            self.root_schema_obj,
+            snapshot_file_path,
+            [self.file_path, self.annotation_file_path],
+            compact=self.compact,
+        )
+
     def save_metadata_to_json(self, file_path):
+        if self.compact:
+            logger.warning(
+                f"Saving a compact catalog to {file_path}, the raw DDL and sample rows are not included."
+            )
         with open(file_path, "w") as f:
             json.dump(self.to_dict(), f)
 
@@ -815,12 +1361,14 @@ class MetadataParser:
                 raise ValueError(
                     "database_name and schema_name must be provided if table_name is provided"
                 )
-            table = (
-                self.root_schema_obj.databases[database_name]
-                .schemas[schema_name]
-                .tables[table_name]
-            )
+            table = self._get_table(database_name, schema_name, table_name)
+            if table is None:
+                raise KeyError(f"{database_name}.{schema_name}.{table_name}")
             tables.append(table)
+        elif database_name is not None and schema_name is not None:
+            schema = self._get_schema(database_name, schema_name)
+            if schema is not None:
+                tables.extend(schema.tables.values())
         else:
             for (
                 cat_name,
@@ -845,6 +1393,9 @@ class MetadataParser:
         include_column_names: Optional[bool] = False,
         include_column_info: Optional[bool] = True,
         column_info_format: Optional[List] = None,
+        question: Optional[str] = None,
+        max_columns: Optional[int] = None,
+        render_format: str = DEFAULT_RENDER_FORMAT,
     ):
         """
         Process and return metadata information given database, schema and table.
@@ -853,33 +1404,432 @@ class MetadataParser:
             database (str, optional): The database of the table.
             schema (str, optional): The schema of the table.
             tables (list of str, optional): The names of the tables.
+            question (str, optional): If given with max_columns, the column information of tables with more than max_columns columns
+                only includes the max_columns columns most relevant to the question and the key columns (timestamps, hashes, addresses).
+            render_format (str, optional): The format of the column information: markdown, csv, jsonl or ddl,
+                see chatweb3.catalog.render_formats.
 
         Returns:
             str: The concatenated table information.
 
         """
         target_tables = self._find_target_tables(database, schema, tables)
+        render_flags = (
+            include_table_name,
+            include_table_summary,
+            include_column_names,
+            include_column_info,
+            tuple(column_info_format) if column_info_format is not None else None,
+            render_format,
+        )
 
         output = ""
         for table in target_tables:
-            output += table._get_metadata(
-                include_table_name=include_table_name,
-                include_table_summary=include_table_summary,
-                include_column_names=include_column_names,
-                include_column_info=include_column_info,
-                column_info_format=column_info_format,
-            )
+            columns_to_render = None
+            if include_column_info and question and max_columns:
+                columns_to_render = self._select_columns(table, question, max_columns)
+            if columns_to_render is not None:
+                # the pruned metadata depends on the question and is not cached
+                output += table._get_metadata(
+                    include_table_name=include_table_name,
+                    include_table_summary=include_table_summary,
+                    include_column_names=include_column_names,
+                    include_column_info=include_column_info,
+                    column_info_format=column_info_format,
+                    columns_to_render=columns_to_render,
+                    render_format=render_format,
+                )
+            else:
+                output += self._render_table_metadata(table, render_flags)
 
             output += "\n\n"
 
         return output.strip()
 
+    def _get_column_index(self, table) -> BM25Index:
+        column_index = self._column_indexes.get(table.long_name)
+        if column_index is None:
+            column_index = self._column_indexes[table.long_name] = build_column_index(
+                table
+            )
+        return column_index
+
+    def _column_priorities(self, table, columns, question) -> List[str]:
+        """Order the columns from the most to the least important: the key columns, the columns
+        relevant to the question from the most relevant, then the other columns in table order.
+        """
+        key_columns = [name for name in columns if is_key_column(table.columns[name])]
+        relevant_columns = []
+        if question:
+            relevant_columns = [
+                name
+                for name, _ in self._get_column_index(table).search(
+                    question, len(columns), columns
+                )
+            ]
+        prioritized = dict.fromkeys(key_columns + relevant_columns)
+        return list(prioritized) + [name for name in columns if name not in prioritized]
+
+    def _render_tables_within_budget(
+        self,
+        tables,
+        max_tokens,
+        include_table_name=True,
+        include_table_summary=True,
+        include_column_names=False,
+        column_info_format=None,
+        question=None,
+        max_columns=None,
+        render_format=DEFAULT_RENDER_FORMAT,
+    ) -> str:
+        """Render the column information of the tables within max_tokens, see get_metadata_by_table_long_names."""
+        render_flags = (
+            include_table_name,
+            include_table_summary,
+            include_column_names,
+            True,
+            tuple(column_info_format) if column_info_format is not None else None,
+            render_format,
+        )
+        if column_info_format is None:
+            column_info_format = DEFAULT_COLUMN_INFO_FORMAT
+        table_columns = []
+        for table in tables:
+            columns = None
+            if question and max_columns:
+                columns = self._select_columns(table, question, max_columns)
+            table_columns.append(
+                columns if columns is not None else list(table.columns)
+            )
+
+        for column_format in degraded_column_info_formats(column_info_format):
+            token_counts = [
+                table.token_counts(column_format, render_format) for table in tables
+            ]
+            total_tokens = sum(
+                header_tokens + sum(column_tokens[name] for name in columns)
+                for (header_tokens, column_tokens), columns in zip(
+                    token_counts, table_columns
+                )
+            )
+            if total_tokens <= max_tokens:
+                budget_columns = table_columns
+                break
+        else:
+            kept_columns = plan_columns_within_budget(
+                token_counts,
+                [
+                    self._column_priorities(table, columns, question)
+                    for table, columns in zip(tables, table_columns)
+                ],
+                max_tokens,
+            )
+            budget_columns = [
+                [name for name in columns if name in set(kept)]
+                for columns, kept in zip(table_columns, kept_columns)
+            ]
+        if (
+            column_format != list(column_info_format)
+            or budget_columns is not table_columns
+        ):
+            logger.debug(
+                f"Rendering {[table.long_name for table in tables]} with {column_format=} to fit {max_tokens=}"
+            )
+
+        outputs = []
+        for table, columns, rendered_columns in zip(
+            tables, table_columns, budget_columns
+        ):
+            if column_format == list(column_info_format) and len(
+                rendered_columns
+            ) == len(table.columns):
+                outputs.append(self._render_table_metadata(table, render_flags))
+                continue
+            outputs.append(
+                table._get_metadata(
+                    include_table_name=include_table_name,
+                    include_table_summary=include_table_summary,
+                    include_column_names=include_column_names,
+                    include_column_info=True,
+                    column_info_format=column_format,
+                    columns_to_render=rendered_columns
+                    if len(rendered_columns) < len(table.columns)
+                    else None,
+                    omission_reason="as less relevant to the question"
+                    if len(rendered_columns) == len(columns)
+                    else "to fit the token budget",
+                    render_format=render_format,
+                )
+            )
+        return "\n\n".join(outputs)
+
+    def _select_columns(self, table, question, max_columns) -> Optional[List[str]]:
+        """Return the columns of the table to render for the question, None if the table is not pruned."""
+        if len(table.columns) <= max_columns:
+            return None
+        columns_to_render = select_relevant_columns(
+            table, question, max_columns, self._get_column_index(table)
+        )
+        if columns_to_render is not None:
+            logger.debug(
+                f"Rendering {len(columns_to_render)} of {len(table.columns)} columns of {table.long_name} for {question=}"
+            )
+        return columns_to_render
+
+    def _render_table_metadata(self, table, render_flags) -> str:
+        """Return table._get_metadata() for the given flags, rendered once per table and flags."""
+        key = (table.long_name,) + render_flags
+        rendered = self._render_cache.get(key)
+        if rendered is not None:
+            self._record_render_cache_lookup("hits")
+            return rendered
+
+        (
+            include_table_name,
+            include_table_summary,
+            include_column_names,
+            include_column_info,
+            column_info_format,
+            render_format,
+        ) = render_flags
+        start_time = time.perf_counter()
+        metadata: str = table._get_metadata(
+            include_table_name=include_table_name,
+            include_table_summary=include_table_summary,
+            include_column_names=include_column_names,
+            include_column_info=include_column_info,
+            column_info_format=list(column_info_format)
+            if column_info_format is not None
+            else None,
+            render_format=render_format,
+        )
+        self._render_cache_stats["render_ms"] += (
+            time.perf_counter() - start_time
+        ) * 1000
+        self._render_cache[key] = metadata
+        self._record_render_cache_lookup("misses")
+        return metadata
+
+    def _record_render_cache_lookup(self, outcome):
+        stats = self._render_cache_stats
+        stats[outcome] += 1
+        if (
+            stats["hits"]
+            + stats["misses"]
+            + stats["listing_hits"]
+            + stats["listing_misses"]
+        ) % RENDER_CACHE_LOG_INTERVAL == 0:
+            info = self.render_cache_info()
+            logger.info(
+                f"Render cache: hit rate {info['hit_rate']:.1%} ({info['hits']} hits, {info['misses']} misses), "
+                f"listing hit rate {info['listing_hit_rate']:.1%}, {info['avg_render_ms']:.3f} ms per table render"
+            )
+
+    def render_cache_info(self) -> Dict[str, float]:
+        """Return the hit rates of the render and listing caches and the average render time of a table."""
+        stats = self._render_cache_stats
+        lookups = stats["hits"] + stats["misses"]
+        listing_lookups = stats["listing_hits"] + stats["listing_misses"]
+        return {
+            **stats,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+            "listing_hit_rate": stats["listing_hits"] / listing_lookups
+            if listing_lookups
+            else 0.0,
+            "avg_render_ms": stats["render_ms"] / stats["misses"]
+            if stats["misses"]
+            else 0.0,
+        }
+
+    def clear_render_cache(self):
+        """Drop the rendered table metadata and listings.
+        Call it after changing the tables of the catalog other than through add_table_summary().
+        """
+        # (table long name, include_* flags, column_info_format) -> rendered table metadata
+        self._render_cache: Dict[tuple, str] = {}
+        # (table long names, include_* flags) -> listing, see get_metadata_by_table_long_names
+        self._listing_cache: Dict[tuple, str] = {}
+
+    def _evict_rendered_tables(self, table_long_names: List[str]):
+        """Drop the rendered metadata of the tables, e.g. after their content hash changed, and the listings."""
+        evicted_table_long_names = set(table_long_names)
+        for key in [
+            key for key in self._render_cache if key[0] in evicted_table_long_names
+        ]:
+            del self._render_cache[key]
+        self._listing_cache.clear()
+
+    @property
+    def search_index(self) -> TableSearchIndex:
+        """The BM25 index of the tables of the catalog, built on first access."""
+        search_index = self._search_index
+        if search_index is None:
+            start_time = time.perf_counter()
+            search_index = self._search_index = TableSearchIndex(
+                table
+                for database in self.root_schema_obj.databases.values()
+                for schema in database.schemas.values()
+                for table in schema.tables.values()
+            )
+            logger.info(
+                f"Built table search index with {len(search_index)} tables in "
+                f"{(time.perf_counter() - start_time) * 1000:.1f} ms"
+            )
+        return search_index
+
+    def search_tables(
+        self,
+        query: str,
+        top_k: int = 5,
+        table_long_names: Optional[str] = None,
+        include_column_names: Optional[bool] = False,
+    ) -> str:
+        """
+        Return the names and summaries of the top_k tables most relevant to the query, best first.
+
+        Args:
+            query (str): The question to find tables for.
+            table_long_names (str, optional): Comma separated long names of the tables to search, all tables if None.
+
+        Returns:
+            str: The concatenated table information, empty if no table matches the query.
+        """
+        searched_table_long_names = (
+            table_long_names.split(",") if table_long_names is not None else None
+        )
+        ranked_tables = self.search_index.search(
+            query, top_k, searched_table_long_names
+        )
+        logger.debug(f"Tables matching {query=}: {ranked_tables}")
+        render_flags = (
+            True,
+            True,
+            include_column_names,
+            False,
+            None,
+            DEFAULT_RENDER_FORMAT,
+        )
+        return "\n\n".join(
+            self._render_table_metadata(
+                self._get_table(*parse_table_long_name(table_long_name)), render_flags
+            )
+            for table_long_name, _ in ranked_tables
+        )
+
+    @property
+    def join_graph(self) -> JoinGraph:
+        """The join graph of the tables of the catalog, built on first access."""
+        join_graph = self._join_graph
+        if join_graph is None:
+            start_time = time.perf_counter()
+            join_graph = self._join_graph = JoinGraph(
+                table
+                for database in self.root_schema_obj.databases.values()
+                for schema in database.schemas.values()
+                for table in schema.tables.values()
+            )
+            logger.info(
+                f"Built join graph with {len(join_graph)} tables in "
+                f"{(time.perf_counter() - start_time) * 1000:.1f} ms"
+            )
+        return join_graph
+
+    def find_join_paths(
+        self,
+        table_long_names: str,
+        max_paths: int = MAX_JOIN_PATHS,
+        allowed_table_long_names: Optional[str] = None,
+    ) -> str:
+        """
+        Return the candidate join paths between each pair of the given tables, with their join keys.
+
+        Args:
+            table_long_names (str): Comma separated long names of the tables to join.
+            allowed_table_long_names (str, optional): Comma separated long names of the tables the paths may go through,
+                all tables if None.
+
+        Returns:
+            str: The join paths of each pair of tables as FROM clauses, the most selective join keys first.
+        """
+        names = [
+            name.strip().lower() for name in table_long_names.split(",") if name.strip()
+        ]
+        if len(names) < 2:
+            return join_paths_need_two_tables(names)
+        allowed_names = (
+            [name.strip().lower() for name in allowed_table_long_names.split(",")]
+            if allowed_table_long_names is not None
+            else None
+        )
+        output = []
+        for i, table_long_name in enumerate(names):
+            for other_table_long_name in names[i + 1 :]:
+                paths = self.join_graph.find_paths(
+                    table_long_name,
+                    other_table_long_name,
+                    max_paths=max_paths,
+                    table_long_names=allowed_names,
+                )
+                logger.debug(
+                    f"Join paths between {table_long_name} and {other_table_long_name}: {paths}"
+                )
+                if not paths:
+                    output.append(
+                        f"No join path found between {table_long_name} and {other_table_long_name}."
+                    )
+                    continue
+                output.append(
+                    f"Join paths between {table_long_name} and {other_table_long_name}:\n"
+                    + "\n".join(
+                        f"{n}. {self.join_graph.describe_path(path)}"
+                        for n, path in enumerate(paths, start=1)
+                    )
+                )
+        return "\n\n".join(output)
+
+    @property
+    def name_resolver(self) -> TableNameResolver:
+        """The resolver of the requested table names to the tables of the catalog, built on first access."""
+        name_resolver = self._name_resolver
+        if name_resolver is None:
+            name_resolver = self._name_resolver = TableNameResolver(
+                table.long_name
+                for database in self.root_schema_obj.databases.values()
+                for schema in database.schemas.values()
+                for table in schema.tables.values()
+            )
+        return name_resolver
+
+    def resolve_table_long_names(
+        self, table_long_names: str
+    ) -> List[TableNameResolution]:
+        """
+        Resolve comma separated table long names to the tables of the catalog, correcting unambiguous typos
+        and wrong schemas and suggesting the closest tables otherwise, see chatweb3.catalog.name_resolver.
+        """
+        resolutions = self.name_resolver.resolve_all(table_long_names.split(","))
+        for resolution in resolutions:
+            if resolution.long_name != resolution.name:
+                logger.debug(f"Resolved table name: {resolution}")
+        return resolutions
+
     def _find_target_tables(self, database=None, schema=None, tables=None):
         matched_tables = []
 
         if database is not None and database not in self.root_schema_obj.databases:
             logger.warning(f"Database '{database}' does not exist.")
 
+        if database is not None and schema is not None:
+            # look the tables up directly instead of scanning the whole catalog
+            if tables is None:
+                schema_obj = self._get_schema(database, schema)
+                return list(schema_obj.tables.values()) if schema_obj else []
+            for table_name in tables:
+                table = self._get_table(database, schema, table_name)
+                if table is not None:
+                    matched_tables.append(table)
+            return matched_tables
+
         for db_name, db in self.root_schema_obj.databases.items():
             if database is None or db_name == database:
                 for sch_name, sch in db.schemas.items():
@@ -901,6 +1851,10 @@ class MetadataParser:
         include_column_names: Optional[bool] = False,
         include_column_info: Optional[bool] = True,
         column_info_format: Optional[List] = None,
+        question: Optional[str] = None,
+        max_columns: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        render_format: str = DEFAULT_RENDER_FORMAT,
     ) -> str:
         """
         Process and return metadata information given a list of table long names in the form of
@@ -908,10 +1862,49 @@ class MetadataParser:
 
         Args:
             table_long_names (str): The list of table long names.
+            question (str, optional): The question to prune the columns of wide tables for, see get_table_metadata.
+            max_tokens (int, optional): The approximate token budget of the column information of all tables.
+                If it is exceeded, the sample values, then the column comments, then the least relevant columns are dropped,
+                see chatweb3.catalog.token_budget.
+            render_format (str, optional): The format of the column information, see get_table_metadata.
 
         Returns:
             str: The concatenated table information.
         """
+        if max_tokens is not None and include_column_info:
+            tables = []
+            for info in parse_table_long_name_to_json_list(table_long_names):
+                tables.extend(
+                    self._find_target_tables(
+                        info["database"], info["schema"], info["tables"]
+                    )
+                )
+            return self._render_tables_within_budget(
+                tables,
+                max_tokens,
+                include_table_name=include_table_name,
+                include_table_summary=include_table_summary,
+                include_column_names=include_column_names,
+                column_info_format=column_info_format,
+                question=question,
+                max_columns=max_columns,
+                render_format=render_format,
+            )
+
+        # listings without column info, e.g. the table summaries of all enabled tables,
+        # are requested with the same table names over and over and are kept as a whole
+        listing_key = None
+        if not include_column_info:
+            listing_key = (
+                table_long_names,
+                include_table_name,
+                include_table_summary,
+                include_column_names,
+            )
+            listing = self._listing_cache.get(listing_key)
+            if listing is not None:
+                self._record_render_cache_lookup("listing_hits")
+                return listing
 
         parsed_table_info = parse_table_long_name_to_json_list(table_long_names)
 
@@ -929,7 +1922,17 @@ class MetadataParser:
                 include_column_names=include_column_names,
                 include_column_info=include_column_info,
                 column_info_format=column_info_format,
+                question=question,
+                max_columns=max_columns,
+                render_format=render_format,
             )
             output += "\n\n"
 
-        return output.strip()
+        output = output.strip()
+        if listing_key is not None:
+            if len(self._listing_cache) >= LISTING_CACHE_SIZE:
+                # evict the oldest listing
+                del self._listing_cache[next(iter(self._listing_cache))]
+            self._listing_cache[listing_key] = output
+            self._record_render_cache_lookup("listing_misses")
+        return output
@@ -1,5 +1,7 @@
 # %%
 import logging
+import threading
+import time
 from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 from flipside import Flipside
@@ -14,6 +16,9 @@ from sqlalchemy.engine.row import Row
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.schema import CreateTable
 
+from chatweb3.catalog.chain_registry import DEFAULT_CHAIN, ChainCatalog, ChainRegistry
+from chatweb3.catalog.content_hash import combine_hashes
+from chatweb3.catalog.reloader import CatalogWatcher
 from config.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -21,6 +26,104 @@ logger = get_logger(__name__)
 #     __name__, log_level=logging.DEBUG, log_to_console=True, log_to_file=True
 # )
 
+# seconds a Snowflake metadata miss is remembered, see SnowflakeContainer.metadata_miss_cache
+DEFAULT_METADATA_MISS_CACHE_TTL = 300.0
+METADATA_MISS_CACHE_SIZE = 1024
+# log the negative cache statistics every NEGATIVE_CACHE_LOG_INTERVAL lookups
+NEGATIVE_CACHE_LOG_INTERVAL = 100
+# errnos of the Snowflake errors for objects that do not exist (or are not authorized),
+# e.g. "SQL compilation error: Schema 'ETHEREUM.FOO' does not exist or not authorized."
+SNOWFLAKE_OBJECT_NOT_FOUND_ERRNOS = {2003, 2043}
+
+
+class SnowflakeObjectNotFoundError(ValueError):
+    """Raised when Snowflake reports that a database or schema does not exist, as opposed to
+    a connection, authentication or other error that may not happen again."""
+
+
+def is_object_not_found_error(error: Optional[BaseException]) -> bool:
+    """Return True if the error, or the database error it wraps, is a Snowflake error for an
+    object that does not exist."""
+    while error is not None:
+        if getattr(error, "errno", None) in SNOWFLAKE_OBJECT_NOT_FOUND_ERRNOS:
+            return True
+        # sqlalchemy keeps the error of the driver in orig
+        error = getattr(error, "orig", None) or error.__cause__
+    return False
+
+
+class NegativeCache:
+    """Thread-safe cache of the errors of lookups that failed, each remembered for ttl seconds,
+    so that a failed lookup repeated within the ttl returns the cached error instead of running again.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_METADATA_MISS_CACHE_TTL,
+        max_entries: int = METADATA_MISS_CACHE_SIZE,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (expiry time, error), the oldest first
+        self._entries: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "expirations": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _record_lookup(self, outcome: str):
+        stats = self._stats
+        stats[outcome] += 1
+        if (stats["hits"] + stats["misses"]) % NEGATIVE_CACHE_LOG_INTERVAL == 0:
+            info = self.info()
+            logger.info(
+                f"Negative cache: hit rate {info['hit_rate']:.1%} ({info['hits']} hits, {info['misses']} misses), "
+                f"{info['entries']} entries"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached error of a failed lookup, None if there is none or it expired."""
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                entry = None
+            self._record_lookup("misses" if entry is None else "hits")
+        if entry is not None:
+            logger.debug(f"Negative cache hit for {key}: {entry[1]}")
+            return entry[1]
+        return None
+
+    def put(self, key: str, error: str):
+        """Remember the error of a failed lookup for ttl seconds."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                # evict the oldest entry
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + self.ttl, error)
+            self._stats["stores"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> Dict[str, float]:
+        """Return the hit rate of the cache, its lookup and store counts and its number of entries."""
+        stats = self._stats
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            **stats,
+            "entries": len(self._entries),
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+        }
+
 
 class SnowflakeDatabase(SQLDatabase):
     def __init__(
@@ -64,14 +167,7 @@ class SnowflakeDatabase(SQLDatabase):
         # logger.debug(f"Entering run with command: {command}")
 
         with self._engine.begin() as connection:
-            if self._schema is not None:
-                # Set the session-level default schema
-
-                if self.dialect == "snowflake":
-                    set_schema_command = f"USE SCHEMA {self._schema}"
-                    connection.execute(text(set_schema_command))
-                else:
-                    connection.exec_driver_sql(f"SET search_path TO {self._schema}")
+            self._set_schema(connection)
 
             cursor: CursorResult = connection.execute(text(command))
 
@@ -95,6 +191,35 @@ class SnowflakeDatabase(SQLDatabase):
                     return cursor
         return "" if return_string else cursor
 
+    def _set_schema(self, connection) -> None:
+        """Set the session-level default schema.
+        Other dialects, e.g. the SQLite engines used in tests, rely on schema-qualified table names.
+        """
+        if self._schema is None:
+            return
+        if self.dialect == "snowflake":
+            set_schema_command = f"USE SCHEMA {self._schema}"
+            connection.execute(text(set_schema_command))
+        elif self.dialect == "postgresql":
+            connection.exec_driver_sql(f"SET search_path TO {self._schema}")
+
+    def fetch_rows(self, command: str) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+        """Execute a SQL command and return the column names and all rows of the result."""
+        with self._engine.begin() as connection:
+            self._set_schema(connection)
+            cursor = connection.execute(text(command))
+            return list(cursor.keys()), [tuple(row) for row in cursor.fetchall()]
+
+    def get_view_names(self) -> List[str]:
+        return self._inspector.get_view_names(schema=self._schema)
+
+    def get_create_table_statement(self, table_name: str) -> str:
+        """Return the CREATE TABLE statement of a table, compiled from its reflected metadata."""
+        for table in self._metadata.sorted_tables:
+            if table.name == table_name:
+                return str(CreateTable(table).compile(self._engine))
+        raise ValueError(f"table_name {table_name} not found in database")
+
     def run_no_throw(  # type: ignore
         self, command: str, fetch: str = "all", return_string: bool = True
     ) -> Union[str, CursorResult]:
@@ -184,28 +309,65 @@ class SnowflakeContainer:
         local_index_file_path: Optional[str] = None,
         index_annotation_file_path: Optional[str] = None,
         verbose: bool = False,
+        catalog_snapshot_file_path: Optional[str] = None,
+        compact_catalog: bool = False,
+        parse_workers: int = 1,
+        streaming_load: bool = False,
+        indexed_catalog_file_path: Optional[str] = None,
+        metadata_miss_cache_ttl: float = DEFAULT_METADATA_MISS_CACHE_TTL,
+        chain_catalogs: Optional[Sequence[ChainCatalog]] = None,
+        default_chain: str = DEFAULT_CHAIN,
     ):
         """Create a Snowflake container.
         It stores the user, password, and account identifier for a Snowflake account.
         It has a _databases attribute that stores SQLDatabase objects, which are created on demand.
         These databases can be accessed via the (database, schema) key pair
         It can later append the database and schema to the URL to create a Snowflake db engine.
+        If catalog_snapshot_file_path points to an up-to-date catalog snapshot, the metadata is loaded from it directly.
+        If compact_catalog is True, the raw table payloads are dropped from the metadata once it is parsed.
+        If parse_workers is more than 1 (0 for one per core), the tables of a large context file are parsed by a pool of processes.
+        If streaming_load is True, the context files are read table by table instead of into one dict.
+        If indexed_catalog_file_path points to an up-to-date indexed catalog, the tables are loaded from it on first access.
+        The metadata can be reloaded from the files with reload_metadata(), see also start_metadata_watcher().
+        Tables and schemas missing from Snowflake are remembered in metadata_miss_cache for metadata_miss_cache_ttl seconds, 0 to disable it.
+        If chain_catalogs is provided, the metadata of each chain is loaded from its own catalog shard, see chain_registry:
+        the shard of default_chain at startup, the others on first reference. Otherwise the metadata files above are the
+        catalog of default_chain.
         """
-        # delay import to avoid circular import
-        from chatweb3.metadata_parser import MetadataParser
-
         self._user = user
         self._password = password
         self._account_identifier = account_identifier
         # Store SQLDatabase objects with (database, schema) as the key
         self._databases: Dict[str, SnowflakeDatabase] = {}
+        # table or database.schema long name -> error of the failed Snowflake metadata lookup
+        self.metadata_miss_cache = NegativeCache(ttl=metadata_miss_cache_ttl)
         # Keep the dialect attribute for compatibility with SQLDatabase object
         self.dialect = "snowflake"
-        self.metadata_parser = MetadataParser(
-            file_path=local_index_file_path,
-            annotation_file_path=index_annotation_file_path,
+        if chain_catalogs is None:
+            chain_catalogs = [
+                ChainCatalog(
+                    chain=default_chain,
+                    context_file=local_index_file_path,
+                    annotation_file=index_annotation_file_path,
+                    snapshot_file=catalog_snapshot_file_path,
+                    indexed_catalog_file=indexed_catalog_file_path,
+                )
+            ]
+        # the MetadataParser of each chain, loaded on first reference
+        self.chain_registry = ChainRegistry(
+            chain_catalogs,
+            default_chain=default_chain,
+            compact=compact_catalog,
+            parse_workers=parse_workers,
+            streaming_load=streaming_load,
             verbose=verbose,
         )
+        # serializes reloads, the metadata parsers themselves are read without locking
+        self._metadata_reload_lock = threading.Lock()
+        self._metadata_watcher: Optional[CatalogWatcher] = None
+        # the catalog of the default chain is loaded at startup, with the listings of its tables
+        self.chain_registry.get_metadata_parser()
+        self.chain_registry.precompute_table_listings()
         self._flipside = (
             Flipside(flipside_api_key) if flipside_api_key is not None else None
         )
@@ -213,6 +375,86 @@ class SnowflakeContainer:
             ShroomDK(shroomdk_api_key) if shroomdk_api_key is not None else None
         )
 
+    @property
+    def metadata_parser(self):
+        """The MetadataParser of the catalog of the default chain."""
+        return self.chain_registry.get_metadata_parser()
+
+    def metadata_content_hash(
+        self, table_long_names: Optional[str] = None
+    ) -> Optional[str]:
+        """Return the content hash of the metadata of the comma separated tables, or of the catalogs
+        of all chains if None, see MetadataParser.content_hash, e.g. for the ETags of the API.
+        No shard is loaded for it, see ChainRegistry.content_hash. Returns None if one of the
+        tables is not in the catalog, its metadata is then looked up in Snowflake, or if it is
+        in a shard not loaded yet.
+        """
+        if table_long_names is None:
+            return self.chain_registry.content_hash(load=False)
+        table_hashes: Dict[str, str] = {}
+        for name, table_hash in self.chain_registry.table_content_hashes(
+            table_long_names, load=False
+        ).items():
+            if table_hash is None:
+                return None
+            table_hashes[name] = table_hash
+        if not table_hashes:
+            return None
+        return combine_hashes(table_hashes)
+
+    def reload_metadata(self) -> Dict[str, Any]:
+        """Rebuild the catalog shards of the loaded chains from their metadata files and swap them in.
+        Each new MetadataParser is built completely before it replaces the current one in a single
+        assignment, so that tool calls in flight keep using the catalog they started with.
+        Returns the number of tables and the content hashes of the new catalogs and the time the rebuild took.
+        """
+        with self._metadata_reload_lock:
+            start_time = time.perf_counter()
+            metadata_parsers = {}
+            for chain in self.chain_registry.loaded_chains:
+                metadata_parsers[chain] = self.chain_registry.load_metadata_parser(
+                    chain
+                )
+                self.chain_registry.set_metadata_parser(chain, metadata_parsers[chain])
+            self.chain_registry.precompute_table_listings()
+            duration_ms = (time.perf_counter() - start_time) * 1000
+        num_tables = sum(
+            len(schema.tables)
+            for metadata_parser in metadata_parsers.values()
+            for database in metadata_parser.root_schema_obj.databases.values()
+            for schema in database.schemas.values()
+        )
+        logger.info(
+            f"Reloaded metadata catalog of {', '.join(metadata_parsers)} with {num_tables} tables in {duration_ms:.1f} ms"
+        )
+        return {
+            "num_tables": num_tables,
+            "duration_ms": round(duration_ms, 1),
+            "chains": list(metadata_parsers),
+            "content_hashes": {
+                chain: metadata_parser.content_hash
+                for chain, metadata_parser in metadata_parsers.items()
+            },
+        }
+
+    def start_metadata_watcher(self, poll_interval: float = 5.0):
+        """Reload the metadata catalog in a background thread whenever one of the metadata files changes."""
+        if self._metadata_watcher is None:
+            self._metadata_watcher = CatalogWatcher(
+                file_paths=[
+                    file_path
+                    for chain_catalog in self.chain_registry.chain_catalogs
+                    for file_path in chain_catalog.file_paths
+                ],
+                reload=self.reload_metadata,
+                poll_interval=poll_interval,
+            )
+        self._metadata_watcher.start()
+
+    def stop_metadata_watcher(self):
+        if self._metadata_watcher is not None:
+            self._metadata_watcher.stop()
+
     @property
     def flipside(self):
         if self._flipside is None:
@@ -263,6 +505,10 @@ class SnowflakeContainer:
                 self._databases[key] = snowflake_database
                 return snowflake_database
             except Exception as e:
+                if is_object_not_found_error(e):
+                    raise SnowflakeObjectNotFoundError(
+                        f"Error getting snowflake database for {key}: {str(e)}"
+                    ) from e
                 raise ValueError(
                     f"Error getting snowflake database for {key}: {str(e)}"
                 )
@@ -1,5 +1,11 @@
+from contextvars import ContextVar
+from typing import Optional
+
 from pydantic import BaseModel
 
+# the question the agent is currently answering, set by ChatWeb3AgentExecutor for the tools
+agent_question: ContextVar[Optional[str]] = ContextVar("agent_question", default=None)
+
 
 class BaseToolInput(BaseModel):
     """A base class for tool input models."""
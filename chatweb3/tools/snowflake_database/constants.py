@@ -5,6 +5,8 @@ SNOWFLAKE_QUERY_CHECKER_TOOL_NAME = "snowflake_query_checker"
 SELECT_SNOWFLAKE_DATABASE_SCHEMA_TOOL_NAME = "select_snowflake_db_schema"
 
 CHECK_TABLE_SUMMARY_TOOL_NAME = "check_available_tables_summary"
+SEARCH_TABLE_SUMMARY_TOOL_NAME = "search_relevant_tables_summary"
 CHECK_TABLE_METADATA_TOOL_NAME = "check_table_metadata_details"
+FIND_JOIN_PATHS_TOOL_NAME = "find_table_join_paths"
 CHECK_QUERY_SYNTAX_TOOL_NAME = "check_snowflake_query_syntax"
 QUERY_DATABASE_TOOL_NAME = "query_snowflake_database"
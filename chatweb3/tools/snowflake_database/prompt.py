@@ -56,8 +56,11 @@ from chatweb3.tools.snowflake_database.constants import (
     CHECK_QUERY_SYNTAX_TOOL_NAME,
     CHECK_TABLE_METADATA_TOOL_NAME,
     CHECK_TABLE_SUMMARY_TOOL_NAME,
+    FIND_JOIN_PATHS_TOOL_NAME,
     QUERY_DATABASE_TOOL_NAME,
+    SEARCH_TABLE_SUMMARY_TOOL_NAME,
 )
+from config.config import agent_config
 
 # TOOLKIT_INSTRUCTIONS = f"""
 # When using these tools, you MUST follow the instructions below:
@@ -67,10 +70,20 @@ from chatweb3.tools.snowflake_database.constants import (
 # 4. If you receive and error from  {QUERY_DATABASE_TOOL_NAME} tool, you MUST always analyze the error message and determine how to resolve it. If it is a general syntax error, you MUST use the {CHECK_QUERY_SYNTAX_TOOL_NAME} tool to double check the query before you can run it again through the {QUERY_DATABASE_TOOL_NAME} tool. If it is due to invalid table or column names, you MUST double check the {CHECK_TABLE_METADATA_TOOL_NAME} tool and re-construct the query accordingly.
 # """
 
+if agent_config.get("tool.table_search_tool_enabled"):
+    TABLE_SELECTION_INSTRUCTION = f"""1. You MUST always start with the {SEARCH_TABLE_SUMMARY_TOOL_NAME} tool with the question as input to find the tables relevant to the question, and make selection of one or multiple tables you want to work with if applicable. Once you received the tables summary information, you should proceed to the next step."""
+else:
+    TABLE_SELECTION_INSTRUCTION = f"""1. You MUST always start with the {CHECK_TABLE_SUMMARY_TOOL_NAME} tool to check the available tables in the databases, and make selection of one or multiple tables you want to work with if applicable. Once you received the tables summary information, you should proceed to the next step. """
+
+if agent_config.get("tool.join_paths_tool_enabled"):
+    JOIN_PATHS_INSTRUCTION = f""" If the query needs more than one table, you should use the {FIND_JOIN_PATHS_TOOL_NAME} tool with their full names to get the columns to join them on."""
+else:
+    JOIN_PATHS_INSTRUCTION = ""
+
 TOOLKIT_INSTRUCTIONS = f"""
 When using these tools, you MUST follow the instructions below:
-1. You MUST always start with the {CHECK_TABLE_SUMMARY_TOOL_NAME} tool to check the available tables in the databases, and make selection of one or multiple tables you want to work with if applicable. Once you received the tables summary information, you should proceed to the next step. 
-2. Once you have the table summraries, you MUST always use the {CHECK_TABLE_METADATA_TOOL_NAME} tool to check the metadata detail of the table before you can create a query for that table. Note that you can check the metadata details of multiple tables at the same time.
+{TABLE_SELECTION_INSTRUCTION}
+2. Once you have the table summraries, you MUST always use the {CHECK_TABLE_METADATA_TOOL_NAME} tool to check the metadata detail of the table before you can create a query for that table. Note that you can check the metadata details of multiple tables at the same time.{JOIN_PATHS_INSTRUCTION}
 3. When constructing a query containing a token or NFT, if you have both its address and and its symbol, you MUST always prefer using the token address over the token symbol since token symbols are often not unique.
 4. If you receive and error from  {QUERY_DATABASE_TOOL_NAME} tool, you MUST always analyze the error message and determine how to resolve it. If it is a general syntax error, you MUST use the {CHECK_QUERY_SYNTAX_TOOL_NAME} tool to double check the query before you can run it again through the {QUERY_DATABASE_TOOL_NAME} tool. If it is due to invalid table or column names, you MUST double check the {CHECK_TABLE_METADATA_TOOL_NAME} tool and re-construct the query accordingly.
 """
@@ -24,10 +24,12 @@ from langchain.tools.sql_database.tool import (
     QuerySQLCheckerTool,
     QuerySQLDataBaseTool,
 )
-from pydantic import Field, root_validator
+from pydantic import Field, root_validator, validator
 
-from chatweb3.snowflake_database import SnowflakeContainer
-from chatweb3.tools.base import BaseToolInput
+from chatweb3.catalog.render_formats import DEFAULT_RENDER_FORMAT, get_render_format
+from chatweb3.metadata_parser import DEFAULT_COLUMN_INFO_FORMAT
+from chatweb3.snowflake_database import SnowflakeContainer, SnowflakeObjectNotFoundError
+from chatweb3.tools.base import BaseToolInput, agent_question
 from chatweb3.tools.snowflake_database.prompt import SNOWFLAKE_QUERY_CHECKER
 from chatweb3.utils import parse_table_long_name_to_json_list  # parse_str_to_dict
 from config.config import agent_config
@@ -69,6 +71,21 @@ DEFAULT_SCHEMA = agent_config.get("database.default_schema")
 
 FLIPSIDE_QUERY_TIMEOUT = agent_config.get("flipside.query_timeout")
 FLIPSIDE_QUERY_MAX_RETRIES = agent_config.get("flipside.query_max_retries")
+# render only the most relevant columns of tables with more columns than this, 0 to render all columns
+COLUMN_PRUNING_MAX_COLUMNS = agent_config.get("tool.column_pruning_max_columns")
+# approximate token budget of the table metadata returned by one tool call, 0 for no budget
+CHECK_TABLE_METADATA_TOOL_MAX_TOKENS = agent_config.get(
+    "tool.check_table_metadata_tool_max_tokens"
+)
+# format of the column information returned by the table metadata tool, see chatweb3.catalog.render_formats
+CHECK_TABLE_METADATA_TOOL_RENDER_FORMAT = (
+    agent_config.get("tool.check_table_metadata_tool_render_format")
+    or DEFAULT_RENDER_FORMAT
+)
+# render the precomputed value domains of the columns, see chatweb3.catalog.column_domains
+CHECK_TABLE_METADATA_TOOL_INCLUDE_COLUMN_DOMAINS = bool(
+    agent_config.get("tool.check_table_metadata_tool_include_column_domains")
+)
 QUERY_DATABASE_TOOL_RETURN_DIRECT_IF_SUCCESSFUL = agent_config.get(
     "tool.query_database_tool_return_direct_if_successful"
 )  # noqa E501
@@ -122,6 +139,20 @@ class ListSnowflakeDatabaseTableNamesTool(ListSQLDatabaseTool):
 
         return ", ".join(table_long_names)
 
+    def _get_enabled_table_long_names(self) -> List[str]:
+        """Return the long names of the tables available to the agent on all chains, all tables in plugin mode."""
+        # use the full table lists if we are in plugin mode, the enabled table lists otherwise
+        table_long_names_enabled_list = self.db.chain_registry.table_long_names(
+            full=Config.PLUGIN_MODE
+        )
+        logger.debug(f"{table_long_names_enabled_list=}")
+
+        return table_long_names_enabled_list
+
+    def _get_table_listing(self) -> str:
+        """Return the names and summaries of the tables available to the agent, precomputed by the chain registry."""
+        return self.db.chain_registry.table_listing(full=Config.PLUGIN_MODE)
+
     def _run(
         self,
         tool_input: str = "",
@@ -145,59 +176,9 @@ class ListSnowflakeDatabaseTableNamesTool(ListSQLDatabaseTool):
         if mode not in ["local", "snowflake", "default"]:
             raise ValueError(f"Invalid mode: {mode}")
 
-        if Config.PLUGIN_MODE:
-            # use the full table list if we are in plugin mode
-            ethereum_core_table_long_name_list = agent_config.get(
-                "ethereum_core_table_long_name.full_list"
-            )
-            ethereum_defi_table_long_name_list = agent_config.get(
-                "ethereum_defi_table_long_name.full_list"
-            )
-            ethereum_nft_table_long_name_list = agent_config.get(
-                "ethereum_nft_table_long_name.full_list"
-            )
-            ethereum_price_table_long_name_list = agent_config.get(
-                "ethereum_price_table_long_name.full_list"
-            )
-            # table_long_names_enabled_list = agent_config.get(
-            #     "ethereum_core_table_long_name.full_list"
-            # )
-        else:
-            # use the enabled table list
-            ethereum_core_table_long_name_list = agent_config.get(
-                "ethereum_core_table_long_name.enabled_list"
-            )
-            ethereum_defi_table_long_name_list = agent_config.get(
-                "ethereum_defi_table_long_name.enabled_list"
-            )
-            ethereum_nft_table_long_name_list = agent_config.get(
-                "ethereum_nft_table_long_name.enabled_list"
-            )
-            ethereum_price_table_long_name_list = agent_config.get(
-                "ethereum_price_table_long_name.enabled_list"
-            )
-            # table_long_names_enabled_list = agent_config.get(
-            #     "ethereum_core_table_long_name.enabled_list"
-            # )
-
-        logger.debug(f"{ethereum_core_table_long_name_list=}, {ethereum_defi_table_long_name_list=}, {ethereum_nft_table_long_name_list=}, {ethereum_price_table_long_name_list=}")
-
-        table_long_names_enabled_list = ethereum_core_table_long_name_list + ethereum_defi_table_long_name_list + ethereum_nft_table_long_name_list + ethereum_price_table_long_name_list  # noqa E501
-
-        logger.debug(f"{table_long_names_enabled_list=}")       
-
-        table_long_names_enabled = ", ".join(table_long_names_enabled_list)
-        include_column_names = False
-        # include_column_names = True
-        include_column_info = False
-
         if mode == "local":
             # use local index to get the info
-            return self.db.metadata_parser.get_metadata_by_table_long_names(
-                table_long_names=table_long_names_enabled,
-                include_column_names=include_column_names,
-                include_column_info=include_column_info,
-            )
+            return self._get_table_listing()
 
         if mode == "snowflake":
             return self._get_table_long_names_from_snowflake(tool_input=tool_input)
@@ -207,11 +188,7 @@ class ListSnowflakeDatabaseTableNamesTool(ListSQLDatabaseTool):
         if mode == "default":
             try:
                 # logger.debug(f"mode: {mode}")
-                result = self.db.metadata_parser.get_metadata_by_table_long_names(
-                    table_long_names=table_long_names_enabled,
-                    include_column_names=include_column_names,
-                    include_column_info=include_column_info,
-                )
+                result = self._get_table_listing()
                 if result:
                     return result
                 else:
@@ -234,6 +211,8 @@ class GetSnowflakeDatabaseTableMetadataTool(InfoSQLDatabaseTool):
     """Tool for getting metadata about a SQL database schema."""
 
     db: SnowflakeContainer = Field(exclude=True)  # type: ignore
+    render_format: str = CHECK_TABLE_METADATA_TOOL_RENDER_FORMAT
+    include_column_domains: bool = CHECK_TABLE_METADATA_TOOL_INCLUDE_COLUMN_DOMAINS
 
     name = GET_SNOWFLAKE_DATABASE_TABLE_METADATA_TOOL_NAME
     description = f"""
@@ -245,6 +224,11 @@ class GetSnowflakeDatabaseTableMetadataTool(InfoSQLDatabaseTool):
     Example Input: "database_name.schema_name.table_name1: database_name.schema_name.table_name2: database_name.schema_name.table_name3"
     """
 
+    @validator("render_format")
+    def validate_render_format(cls, render_format: str) -> str:
+        get_render_format(render_format)
+        return render_format
+
     def _get_metadata_from_snowflake(self, tool_input: str) -> str:
         """First parse the input into a list of jsons with database and schema separated.
             Example:
@@ -265,6 +249,8 @@ class GetSnowflakeDatabaseTableMetadataTool(InfoSQLDatabaseTool):
             f"Entering _get_metadata_from_snowflake with {input_table_json_list=}"
         )
         metadata_list = []
+        # tables and schemas recently found missing are not looked up in snowflake again
+        miss_cache = self.db.metadata_miss_cache
         for input_dict in input_table_json_list:
             logging.debug(f"\n{input_dict=}")
             database, schema, tables = (
@@ -272,7 +258,26 @@ class GetSnowflakeDatabaseTableMetadataTool(InfoSQLDatabaseTool):
                 input_dict["schema"],
                 input_dict["tables"],
             )
-            snowflake_database = self.db.get_database(database, schema)
+            schema_error = miss_cache.get(f"{database}.{schema}")
+            if schema_error is not None:
+                raise ValueError(schema_error)
+            cached_errors = {
+                table: miss_cache.get(f"{database}.{schema}.{table}")
+                for table in tables
+            }
+            for table, error in cached_errors.items():
+                if error is not None:
+                    metadata_list.append(f"{database}.{schema}.{table}: {error}")
+            tables = [table for table in tables if cached_errors[table] is None]
+            if not tables:
+                continue
+
+            try:
+                snowflake_database = self.db.get_database(database, schema)
+            except SnowflakeObjectNotFoundError as e:
+                # other errors, e.g. of the connection, are not remembered
+                miss_cache.put(f"{database}.{schema}", str(e))
+                raise
             # table_names = ", ".join(tables)
             metadata = snowflake_database.get_table_info_no_throw(
                 table_names=tables, as_dict=True
@@ -282,6 +287,10 @@ class GetSnowflakeDatabaseTableMetadataTool(InfoSQLDatabaseTool):
             ), "Expected a dict from get_table_info_no_throw"  # make mypy happy
 
             logger.debug(f"\n Retrieved {metadata=}")
+            usable_table_names = set(snowflake_database.get_usable_table_names())
+            for table in tables:
+                if table not in usable_table_names and table in metadata:
+                    miss_cache.put(f"{database}.{schema}.{table}", metadata[table])
 
             # Add the formatted metadata string for each table to metadata_list
             for table, table_metadata in metadata.items():
@@ -302,6 +311,16 @@ class GetSnowflakeDatabaseTableMetadataTool(InfoSQLDatabaseTool):
             else metadata_list[0]
         )
 
+    @staticmethod
+    def _with_resolution_notes(result: str, resolutions) -> str:
+        """Prepend the notes on the corrected and unknown table names to the metadata."""
+        notes = "\n".join(
+            resolution.describe()
+            for resolution in resolutions
+            if resolution.long_name != resolution.name
+        )
+        return "\n\n".join(part for part in [notes, result] if part)
+
     def _run(
         self,
         table_names: str,
@@ -316,30 +335,70 @@ class GetSnowflakeDatabaseTableMetadataTool(InfoSQLDatabaseTool):
         - "snowflake": use snowflake to get metadata
         - "local": use local index to get metadata
 
+        Except in the snowflake mode, misspelled table names are first resolved against the local index,
+        see MetadataParser.resolve_table_long_names. The tables of each chain are looked up in its catalog shard.
         """
         logger.debug(f"\n Entering get metadata tool _run with {table_names=}, {mode=}")
 
         if mode not in ["local", "snowflake", "default"]:
             raise ValueError(f"Invalid mode: {mode}")
 
-        if mode == "local":
-            # use local index to get metadata
-            return self.db.metadata_parser.get_metadata_by_table_long_names(table_names)
-
         if mode == "snowflake":
             # use snowflake to get metadata
             return self._get_metadata_from_snowflake(table_names)
 
+        # raises ValueError if the names are not in the database.schema.table form
+        parse_table_long_name_to_json_list(table_names)
+        # correct typos and wrong schemas of the table names locally, before any snowflake lookup
+        resolutions = self.db.chain_registry.resolve_table_long_names(table_names)
+        resolved_table_names = ", ".join(
+            dict.fromkeys(
+                resolution.long_name
+                for resolution in resolutions
+                if resolution.long_name is not None
+            )
+        )
+
+        # prune the columns of wide tables to the ones relevant to the question being answered,
+        # and fit the metadata of all tables in the token budget
+        question = agent_question.get()
+        render_kwargs: Dict[str, Any] = {}
+        if question:
+            render_kwargs["question"] = f"{question} {resolved_table_names}"
+            if COLUMN_PRUNING_MAX_COLUMNS:
+                render_kwargs["max_columns"] = COLUMN_PRUNING_MAX_COLUMNS
+        if CHECK_TABLE_METADATA_TOOL_MAX_TOKENS:
+            render_kwargs["max_tokens"] = CHECK_TABLE_METADATA_TOOL_MAX_TOKENS
+        render_kwargs["render_format"] = self.render_format
+        if self.include_column_domains:
+            render_kwargs["column_info_format"] = DEFAULT_COLUMN_INFO_FORMAT + [
+                "domain"
+            ]
+
+        if mode == "local":
+            # use local index to get metadata
+            result = ""
+            if resolved_table_names:
+                result = self.db.chain_registry.get_metadata_by_table_long_names(
+                    resolved_table_names, **render_kwargs
+                )
+            return self._with_resolution_notes(result, resolutions)
+
         if mode == "default":
+            # tables that are not close to any table of the local index may still be in snowflake
+            unresolved_table_names = ", ".join(
+                resolution.name
+                for resolution in resolutions
+                if resolution.long_name is None and not resolution.suggestions
+            )
             try:
                 # use local index to get metadata
-                logger.debug(f"{self.db.metadata_parser=}")
-                result = self.db.metadata_parser.get_metadata_by_table_long_names(
-                    table_names
-                )
-                if result:
-                    return result
-                else:
+                result = ""
+                if resolved_table_names:
+                    result = self.db.chain_registry.get_metadata_by_table_long_names(
+                        resolved_table_names, **render_kwargs
+                    )
+                if resolved_table_names and not result:
                     raise Exception("Not found in local index")
             except Exception:
                 # if not found in local index, use snowflake to get metadata
@@ -347,6 +406,22 @@ class GetSnowflakeDatabaseTableMetadataTool(InfoSQLDatabaseTool):
                     "Metadata not found in local index, retrieving using snowflake"
                 )
                 return self._get_metadata_from_snowflake(table_names)
+            if unresolved_table_names:
+                logger.warning(
+                    f"Metadata of {unresolved_table_names} not found in local index, retrieving using snowflake"
+                )
+                snowflake_result = self._get_metadata_from_snowflake(
+                    unresolved_table_names
+                )
+                result = "\n\n".join(
+                    part for part in [result, snowflake_result] if part
+                )
+                resolutions = [
+                    resolution
+                    for resolution in resolutions
+                    if resolution.long_name is not None or resolution.suggestions
+                ]
+            return self._with_resolution_notes(result, resolutions)
 
         return ""  # dummy return, just to make mypy happy
 
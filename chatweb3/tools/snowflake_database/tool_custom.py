@@ -17,13 +17,19 @@ from chatweb3.tools.snowflake_database.constants import (
     CHECK_QUERY_SYNTAX_TOOL_NAME,
     CHECK_TABLE_METADATA_TOOL_NAME,
     CHECK_TABLE_SUMMARY_TOOL_NAME,
+    FIND_JOIN_PATHS_TOOL_NAME,
     QUERY_DATABASE_TOOL_NAME,
+    SEARCH_TABLE_SUMMARY_TOOL_NAME,
 )
 from config.config import agent_config
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 QUERY_DATABASE_TOOL_MODE = agent_config.get("tool.query_database_tool_mode")
 CHECK_TABLE_SUMMARY_TOOL_MODE = agent_config.get("tool.check_table_summary_tool_mode")
 CHECK_TABLE_METADATA_TOOL_MODE = agent_config.get("tool.check_table_metadata_tool_mode")
+TABLE_SEARCH_TOOL_TOP_K = agent_config.get("tool.table_search_tool_top_k")
 
 # CHECK_TABLE_SUMMARY_TOOL_NAME = "check_available_tables_summary"
 # CHECK_TABLE_METADATA_TOOL_NAME = "check_table_metadata_details"
@@ -47,6 +53,38 @@ class CheckTableSummaryTool(ListSnowflakeDatabaseTableNamesTool):
         return super()._run(tool_input=tool_input, run_manager=run_manager, mode=mode)
 
 
+class SearchTableSummaryTool(ListSnowflakeDatabaseTableNamesTool):
+    name = SEARCH_TABLE_SUMMARY_TOOL_NAME
+    description = """
+    Input is the question you need to answer, in natural language.
+    Output is the list of the tables most relevant to the question in their full names (database.schema.table), accompanied by their summary descriptions to help you understand what each table is about.
+    """
+
+    def _run(  # type: ignore[override]
+        self,
+        tool_input: str = "",
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+        top_k: int = TABLE_SEARCH_TOOL_TOP_K,
+    ) -> str:
+        """Search the local index for the available tables relevant to the question.
+        Falls back to the summaries of all available tables if no table matches the question.
+        """
+        logger.debug(f"Entering search table summary tool _run with {tool_input=}")
+        result = ""
+        if tool_input.strip():
+            result = self.db.chain_registry.search_tables(
+                tool_input,
+                top_k=top_k,
+                table_long_names=", ".join(self._get_enabled_table_long_names()),
+            )
+        if result:
+            return result
+        logger.debug(f"No table matches {tool_input=}, listing all available tables")
+        return super()._run(
+            tool_input="", run_manager=run_manager, mode=CHECK_TABLE_SUMMARY_TOOL_MODE
+        )
+
+
 class CheckTableMetadataTool(GetSnowflakeDatabaseTableMetadataTool):
     name = CHECK_TABLE_METADATA_TOOL_NAME
     description = """
@@ -58,6 +96,40 @@ class CheckTableMetadataTool(GetSnowflakeDatabaseTableMetadataTool):
         return super()._run(table_names=table_names, run_manager=run_manager, mode=mode)
 
 
+class FindJoinPathsTool(ListSnowflakeDatabaseTableNamesTool):
+    name = FIND_JOIN_PATHS_TOOL_NAME
+    description = """
+    Input is two or more table names specified in their full names (database.schema.table) and seperated by a COMMA.
+    Output is the candidate ways to join each pair of those tables, with the columns to join them on, so that you can construct SQL query joining them.
+    """
+
+    def _run(  # type: ignore[override]
+        self,
+        table_names: str,
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+    ) -> str:
+        """Look the join paths between the tables up in the join graph of the local catalog.
+        The paths only go through the available tables. Misspelled table names are first resolved
+        against the local catalog, as in the metadata tool.
+        """
+        logger.debug(f"Entering find join paths tool _run with {table_names=}")
+        resolutions = self.db.chain_registry.resolve_table_long_names(table_names)
+        resolved_table_names = ", ".join(
+            dict.fromkeys(
+                resolution.long_name
+                for resolution in resolutions
+                if resolution.long_name is not None
+            )
+        )
+        result = self.db.chain_registry.find_join_paths(
+            resolved_table_names,
+            allowed_table_long_names=", ".join(self._get_enabled_table_long_names()),
+        )
+        return GetSnowflakeDatabaseTableMetadataTool._with_resolution_notes(
+            result, resolutions
+        )
+
+
 class CheckQuerySyntaxTool(SnowflakeQueryCheckerTool):
     name = CHECK_QUERY_SYNTAX_TOOL_NAME
     description = """
@@ -35,6 +35,9 @@ class Config:
         self.config["shroomdk_params"] = {
             "shroomdk_api_key": os.getenv("SHROOMDK_API_KEY"),
         }
+        self.config["admin_params"] = {
+            "admin_token": os.getenv("CHATWEB3_ADMIN_TOKEN"),
+        }
 
     def get(self, path, default=None):
         keys = path.split(".")
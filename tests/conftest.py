@@ -3,11 +3,12 @@ conftest.py
 This file contains the fixtures for the tests.
 """
 
+import json
 import logging
 
 import pytest
 
-from chatweb3.create_agent import INDEX_ANNOTATION_FILE_PATH, LOCAL_INDEX_FILE_PATH
+from chatweb3.create_agent import CHAIN_CATALOGS
 from chatweb3.metadata_parser import Column, Database, MetadataParser, Schema, Table
 from chatweb3.snowflake_database import SnowflakeContainer
 from config.config import agent_config
@@ -43,8 +44,7 @@ def snowflake_container(snowflake_params):
 def snowflake_container_eth_core(snowflake_params):
     return SnowflakeContainer(
         **snowflake_params,
-        local_index_file_path=LOCAL_INDEX_FILE_PATH,
-        index_annotation_file_path=INDEX_ANNOTATION_FILE_PATH,
+        chain_catalogs=CHAIN_CATALOGS,
     )
 
 
@@ -131,3 +131,17 @@ def metadata_parser_with_sample_data():
     metadata_parser.root_schema_obj.databases["polygon"] = polygon_db
 
     return metadata_parser
+
+
+@pytest.fixture
+def metadata_files(tmp_path, metadata_parser_with_sample_data):
+    """Context and annotation files of the sample data."""
+    context_file_path = str(tmp_path / "context.json")
+    annotation_file_path = str(tmp_path / "annotation.json")
+    metadata_parser_with_sample_data.save_metadata_to_json(context_file_path)
+    with open(annotation_file_path, "w") as f:
+        json.dump(
+            {"table_summary": {"ethereum.core.ez_nft_sales": "NFT sales summary."}},
+            f,
+        )
+    return context_file_path, annotation_file_path
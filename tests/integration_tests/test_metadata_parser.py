@@ -2,6 +2,7 @@
 test_metadata_parser.py
 This file contains the tests for the metadata_parser module.
 """
+from chatweb3.metadata_parser import RootSchema
 
 
 def test_get_metadata_by_table_long_names(metadata_parser_with_sample_data):
@@ -38,3 +39,79 @@ def test_get_metadata_by_table_long_names_table_summary(
     expected_result_2 = "'ethereum.aave.ez_proposals': the 'ez_proposals' table in 'aave' schema of 'ethereum' database. Summary: This table contains Aave proposals.This table has the following columns: 'block_number'\n\n'ethereum.core.ez_nft_sales': the 'ez_nft_sales' table in 'core' schema of 'ethereum' database. Summary: This table contains the sales of NFTs.This table has the following columns: 'block_number, event_type'\n\n'polygon.core.fact_blocks': the 'fact_blocks' table in 'core' schema of 'polygon' database. Summary: This table contains the fact blocks on Polygon.This table has the following columns: 'difficulty'"
     assert result1 == expected_result_1
     assert result2 == expected_result_2
+
+
+def test_table_attribute_views(metadata_parser_with_sample_data):
+    table = (
+        metadata_parser_with_sample_data.root_schema_obj.databases["ethereum"]
+        .schemas["core"]
+        .tables["ez_nft_sales"]
+    )
+    table.create_table_stmt = "CREATE TABLE ETHEREUM.CORE.EZ_NFT_SALES (\n)"
+
+    create_table_stmt = metadata_parser_with_sample_data.create_table_stmt
+    assert set(create_table_stmt) == {"ethereum", "polygon"}
+    assert (
+        create_table_stmt["ethereum"]["core"]["ez_nft_sales"] == table.create_table_stmt
+    )
+    assert create_table_stmt["ethereum"]["aave"]["ez_proposals"] is None
+    assert metadata_parser_with_sample_data.table_sample_rows["polygon"]["core"] == {
+        "fact_blocks": None
+    }
+
+
+def test_table_lookup(metadata_parser_with_sample_data):
+    metadata_parser = metadata_parser_with_sample_data
+    ez_nft_sales = (
+        metadata_parser.root_schema_obj.databases["ethereum"]
+        .schemas["core"]
+        .tables["ez_nft_sales"]
+    )
+    assert (
+        metadata_parser._get_table("ethereum", "core", "ez_nft_sales") is ez_nft_sales
+    )
+    assert metadata_parser._get_table("ethereum", "core", "missing_table") is None
+    assert metadata_parser._get_table("missing_db", "core", "ez_nft_sales") is None
+    assert metadata_parser._find_target_tables("ethereum", "core", None) == [
+        ez_nft_sales
+    ]
+    assert metadata_parser.get_tables_from_database_schema_table_names(
+        "ethereum", "core", "ez_nft_sales"
+    ) == [ez_nft_sales]
+
+    metadata_parser.add_table_summary({"ethereum.core.ez_nft_sales": "New summary."})
+    assert ez_nft_sales.summary == "New summary."
+
+    # replacing the catalog resets the index
+    metadata_parser.root_schema_obj = RootSchema()
+    assert metadata_parser._get_table("ethereum", "core", "ez_nft_sales") is None
+
+
+def test_render_cache(metadata_parser_with_sample_data):
+    metadata_parser = metadata_parser_with_sample_data
+    table_long_names = "ethereum.core.ez_nft_sales, polygon.core.fact_blocks"
+
+    metadata = metadata_parser.get_metadata_by_table_long_names(table_long_names)
+    assert (
+        metadata_parser.get_metadata_by_table_long_names(table_long_names) == metadata
+    )
+    listing = metadata_parser.get_metadata_by_table_long_names(
+        table_long_names, include_column_info=False
+    )
+    assert (
+        metadata_parser.get_metadata_by_table_long_names(
+            table_long_names, include_column_info=False
+        )
+        == listing
+    )
+    render_cache_info = metadata_parser.render_cache_info()
+    assert render_cache_info["misses"] == 4
+    assert render_cache_info["hits"] == 2
+    assert render_cache_info["listing_misses"] == 1
+    assert render_cache_info["listing_hits"] == 1
+
+    # adding table summaries invalidates the rendered metadata
+    metadata_parser.add_table_summary({"ethereum.core.ez_nft_sales": "New summary."})
+    assert "New summary." in metadata_parser.get_metadata_by_table_long_names(
+        table_long_names, include_column_info=False
+    )
@@ -0,0 +1,52 @@
+"""
+test_benchmark_suite.py
+This file contains the tests for the synthetic catalog generator and the metadata benchmark suite.
+"""
+from benchmarks.suite import compare_results, measure_catalog
+from benchmarks.synthetic_catalog import write_synthetic_catalog_files
+from chatweb3.metadata_parser import MetadataParser
+
+
+def test_synthetic_catalog_files(tmp_path):
+    context_file_path, annotation_file_path = write_synthetic_catalog_files(
+        str(tmp_path / "context.json"),
+        str(tmp_path / "annotation.json"),
+        num_tables=20,
+        num_columns=5,
+        num_databases=2,
+        num_schemas=2,
+    )
+    metadata_parser = MetadataParser(
+        file_path=context_file_path, annotation_file_path=annotation_file_path
+    )
+    table = (
+        metadata_parser.root_schema_obj.databases["chain_0"]
+        .schemas["schema_0"]
+        .tables["table_0"]
+    )
+    assert table.summary.startswith("This table contains the table_0 data")
+    assert table.comment.endswith("It's refreshed every hour.")
+    assert all(column.data_type for column in table.columns.values())
+    assert all(column.comment for column in table.columns.values())
+    # repeated sample values, e.g. of boolean columns, are kept once
+    assert all(
+        1 <= len(column.sample_values_list) <= 3 for column in table.columns.values()
+    )
+
+
+def test_measure_catalog(tmp_path):
+    context_file_path, annotation_file_path = write_synthetic_catalog_files(
+        str(tmp_path / "context.json"),
+        str(tmp_path / "annotation.json"),
+        num_tables=20,
+        num_columns=5,
+    )
+    results = measure_catalog(context_file_path, annotation_file_path, num_lookups=20)
+    assert results["num_tables"] == 20
+    assert results["load_s"] > 0
+    assert results["render_us_p50"] > 0
+
+    baseline = {"20": dict(results, render_us_p50=results["render_us_p50"] / 4)}
+    assert compare_results({"20": results}, {"20": results}, tolerance=0.5) == []
+    regressions = compare_results({"20": results}, baseline, tolerance=0.5)
+    assert len(regressions) == 1 and "render_us_p50" in regressions[0]
@@ -0,0 +1,140 @@
+"""
+test_catalog_builder.py
+This file contains the tests for the catalog builder, using a SQLite database as a stand-in for Snowflake.
+"""
+import json
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from chatweb3.catalog.builder import PROGRESS_FILE_SUFFIX, build_catalog
+from chatweb3.metadata_parser import MetadataParser
+from chatweb3.snowflake_database import SnowflakeDatabase
+
+
+@pytest.fixture
+def sqlite_get_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'chain.db'}")
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE fact_blocks (block_number INTEGER NOT NULL, hash VARCHAR(66))"
+            )
+        )
+        connection.execute(
+            text("INSERT INTO fact_blocks VALUES (1, '0xabc'), (2, '0xdef')")
+        )
+        connection.execute(
+            text("CREATE TABLE ez_nft_sales (block_number INTEGER, price NUMERIC)")
+        )
+
+    def get_database(database_name, schema_name):
+        return SnowflakeDatabase(engine=engine, schema=schema_name)
+
+    return get_database
+
+
+def test_build_catalog(tmp_path, sqlite_get_database):
+    output_file_path = str(tmp_path / "context.json")
+    result = build_catalog(
+        sqlite_get_database, "chain", ["main"], output_file_path, max_workers=2
+    )
+    assert result == {
+        "built": ["chain.main.ez_nft_sales", "chain.main.fact_blocks"],
+        "resumed": [],
+        "failed": [],
+    }
+    assert not os.path.exists(output_file_path + PROGRESS_FILE_SUFFIX)
+
+    metadata_parser = MetadataParser(file_path=output_file_path)
+    fact_blocks = (
+        metadata_parser.root_schema_obj.databases["chain"]
+        .schemas["main"]
+        .tables["fact_blocks"]
+    )
+    assert fact_blocks.column_names == ["block_number", "hash"]
+    assert fact_blocks.columns["block_number"].data_type == "INTEGER"
+    assert fact_blocks.columns["hash"].data_type == "VARCHAR(66)"
+    assert fact_blocks.columns["hash"].sample_values_list == ["0xabc", "0xdef"]
+
+
+def test_build_catalog_resumes_after_failure(
+    tmp_path, sqlite_get_database, monkeypatch
+):
+    output_file_path = str(tmp_path / "context.json")
+    fetch_rows = SnowflakeDatabase.fetch_rows
+
+    def failing_fetch_rows(self, command):
+        if "ez_nft_sales" in command:
+            raise RuntimeError("connection lost")
+        return fetch_rows(self, command)
+
+    monkeypatch.setattr(SnowflakeDatabase, "fetch_rows", failing_fetch_rows)
+    result = build_catalog(sqlite_get_database, "chain", ["main"], output_file_path)
+    assert result["built"] == ["chain.main.fact_blocks"]
+    assert result["failed"] == ["chain.main.ez_nft_sales"]
+    assert os.path.exists(output_file_path + PROGRESS_FILE_SUFFIX)
+
+    monkeypatch.setattr(SnowflakeDatabase, "fetch_rows", fetch_rows)
+    result = build_catalog(sqlite_get_database, "chain", ["main"], output_file_path)
+    assert result["built"] == ["chain.main.ez_nft_sales"]
+    assert result["resumed"] == ["chain.main.fact_blocks"]
+    assert result["failed"] == []
+
+    with open(output_file_path) as f:
+        tables = json.load(f)["root_schema_obj"]["databases"]["chain"]["schemas"][
+            "main"
+        ]["tables"]
+    assert sorted(tables) == ["ez_nft_sales", "fact_blocks"]
+
+
+def test_build_catalog_with_column_domains(tmp_path, sqlite_get_database):
+    output_file_path = str(tmp_path / "context.json")
+    build_catalog(
+        sqlite_get_database,
+        "chain",
+        ["main"],
+        output_file_path,
+        column_domains_sample_rows=100,
+    )
+
+    metadata_parser = MetadataParser(file_path=output_file_path)
+    fact_blocks = (
+        metadata_parser.root_schema_obj.databases["chain"]
+        .schemas["main"]
+        .tables["fact_blocks"]
+    )
+    assert "limit 100" in fact_blocks.select_column_domains_stmt
+    assert fact_blocks.columns["block_number"].domain == {
+        "null_ratio": 0.0,
+        "distinct_count": 2,
+        "min": 1,
+        "max": 2,
+        "values": ["1", "2"],
+    }
+    assert fact_blocks.columns["hash"].domain == {
+        "null_ratio": 0.0,
+        "distinct_count": 2,
+        "values": ["0xabc", "0xdef"],
+    }
+    # the domains of empty tables are not known
+    ez_nft_sales = (
+        metadata_parser.root_schema_obj.databases["chain"]
+        .schemas["main"]
+        .tables["ez_nft_sales"]
+    )
+    assert ez_nft_sales.columns["price"].domain is None
+
+    assert "\thash | None | VARCHAR(66) | 0xabc, 0xdef | values: 0xabc, 0xdef" in (
+        metadata_parser.get_metadata_by_table_long_names(
+            "chain.main.fact_blocks",
+            column_info_format=[
+                "name",
+                "comment",
+                "data_type",
+                "sample_values_list",
+                "domain",
+            ],
+        )
+    )
@@ -0,0 +1,60 @@
+"""
+test_catalog_reloader.py
+This file contains the tests for reloading the metadata catalog.
+"""
+import json
+import os
+
+from chatweb3.catalog.reloader import CatalogWatcher
+from chatweb3.snowflake_database import SnowflakeContainer
+
+
+def test_reload_metadata_swaps_catalog(snowflake_params, metadata_files):
+    context_file_path, annotation_file_path = metadata_files
+    container = SnowflakeContainer(
+        **snowflake_params,
+        local_index_file_path=context_file_path,
+        index_annotation_file_path=annotation_file_path,
+    )
+    metadata_parser = container.metadata_parser
+
+    with open(annotation_file_path, "w") as f:
+        json.dump(
+            {"table_summary": {"ethereum.core.ez_nft_sales": "Updated summary."}}, f
+        )
+    result = container.reload_metadata()
+
+    assert result["num_tables"] == 3
+    assert result["duration_ms"] >= 0
+    assert container.metadata_parser is not metadata_parser
+    # the previous catalog is left untouched for the tool calls still using it
+    assert (
+        metadata_parser.root_schema_obj.databases["ethereum"]
+        .schemas["core"]
+        .tables["ez_nft_sales"]
+        .summary
+        == "NFT sales summary."
+    )
+    assert (
+        container.metadata_parser.root_schema_obj.databases["ethereum"]
+        .schemas["core"]
+        .tables["ez_nft_sales"]
+        .summary
+        == "Updated summary."
+    )
+
+
+def test_catalog_watcher_reloads_on_change(metadata_files):
+    context_file_path, annotation_file_path = metadata_files
+    reloads = []
+    watcher = CatalogWatcher(
+        [context_file_path, annotation_file_path, None],
+        reload=lambda: reloads.append(True),
+    )
+    assert not watcher.check()
+
+    stat = os.stat(annotation_file_path)
+    os.utime(annotation_file_path, (stat.st_atime, stat.st_mtime + 10))
+    assert watcher.check()
+    assert not watcher.check()
+    assert len(reloads) == 1
@@ -0,0 +1,133 @@
+"""
+test_catalog_snapshot.py
+This file contains the tests for the catalog snapshot module.
+"""
+import json
+
+from chatweb3.catalog.snapshot import load_catalog_snapshot
+from chatweb3.metadata_parser import MetadataParser
+
+
+def test_metadata_parser_loads_from_snapshot(tmp_path, metadata_files, monkeypatch):
+    context_file_path, annotation_file_path = metadata_files
+    snapshot_file_path = str(tmp_path / "snapshot.pickle")
+
+    parser = MetadataParser(
+        file_path=context_file_path,
+        annotation_file_path=annotation_file_path,
+        snapshot_file_path=snapshot_file_path,
+    )
+    parser.save_catalog_snapshot(snapshot_file_path)
+
+    def fail_load_metadata_from_json(*args, **kwargs):
+        raise AssertionError("JSON file should not be parsed when snapshot is fresh")
+
+    monkeypatch.setattr(
+        MetadataParser, "load_metadata_from_json", fail_load_metadata_from_json
+    )
+    snapshot_parser = MetadataParser(
+        file_path=context_file_path,
+        annotation_file_path=annotation_file_path,
+        snapshot_file_path=snapshot_file_path,
+    )
+
+    assert snapshot_parser.root_schema_obj == parser.root_schema_obj
+    assert (
+        snapshot_parser.get_metadata_by_table_long_names("ethereum.core.ez_nft_sales")
+        == parser.get_metadata_by_table_long_names("ethereum.core.ez_nft_sales")
+    )
+    assert (
+        snapshot_parser.root_schema_obj.databases["ethereum"]
+        .schemas["core"]
+        .tables["ez_nft_sales"]
+        .summary
+        == "NFT sales summary."
+    )
+
+
+def test_stale_snapshot_is_ignored(tmp_path, metadata_files):
+    context_file_path, annotation_file_path = metadata_files
+    snapshot_file_path = str(tmp_path / "snapshot.pickle")
+
+    parser = MetadataParser(
+        file_path=context_file_path, annotation_file_path=annotation_file_path
+    )
+    parser.save_catalog_snapshot(snapshot_file_path)
+    source_file_paths = [context_file_path, annotation_file_path]
+    assert load_catalog_snapshot(snapshot_file_path, source_file_paths) is not None
+
+    with open(annotation_file_path, "w") as f:
+        json.dump(
+            {"table_summary": {"ethereum.core.ez_nft_sales": "Updated summary."}}, f
+        )
+    assert load_catalog_snapshot(snapshot_file_path, source_file_paths) is None
+
+    updated_parser = MetadataParser(
+        file_path=context_file_path,
+        annotation_file_path=annotation_file_path,
+        snapshot_file_path=snapshot_file_path,
+    )
+    assert (
+        updated_parser.root_schema_obj.databases["ethereum"]
+        .schemas["core"]
+        .tables["ez_nft_sales"]
+        .summary
+        == "Updated summary."
+    )
+
+
+def test_missing_snapshot_falls_back_to_json(tmp_path, metadata_files):
+    context_file_path, annotation_file_path = metadata_files
+    parser = MetadataParser(
+        file_path=context_file_path,
+        annotation_file_path=annotation_file_path,
+        snapshot_file_path=str(tmp_path / "missing.pickle"),
+    )
+    assert "ethereum.core.ez_nft_sales" in parser.get_metadata_by_table_long_names(
+        "ethereum.core.ez_nft_sales"
+    )
+
+
+def test_compact_catalog(tmp_path, metadata_files):
+    context_file_path, annotation_file_path = metadata_files
+    snapshot_file_path = str(tmp_path / "snapshot.pickle")
+    with open(context_file_path) as f:
+        data = json.load(f)
+    data["root_schema_obj"]["databases"]["ethereum"]["schemas"]["core"]["tables"][
+        "ez_nft_sales"
+    ]["create_table_stmt"] = "CREATE TABLE ETHEREUM.CORE.EZ_NFT_SALES (\n)"
+    with open(context_file_path, "w") as f:
+        json.dump(data, f)
+
+    parser = MetadataParser(
+        file_path=context_file_path, annotation_file_path=annotation_file_path
+    )
+    compact_parser = MetadataParser(
+        file_path=context_file_path,
+        annotation_file_path=annotation_file_path,
+        compact=True,
+    )
+    table = (
+        compact_parser.root_schema_obj.databases["ethereum"]
+        .schemas["core"]
+        .tables["ez_nft_sales"]
+    )
+    assert (
+        parser.root_schema_obj.databases["ethereum"]
+        .schemas["core"]
+        .tables["ez_nft_sales"]
+        .create_table_stmt
+    )
+    assert all(getattr(table, name) is None for name in table.RAW_METADATA_ATTRIBUTES)
+    assert compact_parser.get_metadata_by_table_long_names(
+        "ethereum.core.ez_nft_sales"
+    ) == parser.get_metadata_by_table_long_names("ethereum.core.ez_nft_sales")
+
+    # a compact snapshot is not used by a parser that keeps the raw metadata
+    compact_parser.save_catalog_snapshot(snapshot_file_path)
+    source_file_paths = [context_file_path, annotation_file_path]
+    assert load_catalog_snapshot(snapshot_file_path, source_file_paths) is None
+    assert (
+        load_catalog_snapshot(snapshot_file_path, source_file_paths, compact=True)
+        is not None
+    )
@@ -0,0 +1,205 @@
+"""
+test_chain_registry.py
+This file contains the tests for the registry of the catalog shards of the chains.
+"""
+import json
+
+import pytest
+
+from benchmarks.synthetic_catalog import generate_catalog_dict
+from chatweb3.catalog.chain_registry import (
+    ChainCatalog,
+    ChainRegistry,
+    chain_catalog_from_config,
+)
+from chatweb3.snowflake_database import SnowflakeContainer
+from config.config import agent_config
+
+
+@pytest.fixture
+def chain_catalogs(tmp_path):
+    """A shard for each of the chains chain_0 and chain_1 of a synthetic catalog, with 4 tables each."""
+    catalog = generate_catalog_dict(
+        num_tables=8, num_columns=4, num_databases=2, num_schemas=1
+    )
+    chain_catalogs = []
+    for chain, database in catalog["root_schema_obj"]["databases"].items():
+        context_file_path = str(tmp_path / f"context_{chain}.json")
+        with open(context_file_path, "w") as f:
+            json.dump({"root_schema_obj": {"databases": {chain: database}}}, f)
+        table_long_names = sorted(
+            table["long_name"]
+            for table in database["schemas"]["schema_0"]["tables"].values()
+        )
+        chain_catalogs.append(
+            ChainCatalog(
+                chain=chain,
+                context_file=context_file_path,
+                enabled_list=table_long_names[:1],
+                full_list=table_long_names,
+            )
+        )
+    return chain_catalogs
+
+
+def test_shards_are_loaded_on_first_reference(chain_catalogs):
+    chain_registry = ChainRegistry(chain_catalogs, default_chain="chain_0")
+    assert chain_registry.chains == ["chain_0", "chain_1"]
+    assert chain_registry.loaded_chains == []
+
+    result = chain_registry.get_metadata_by_table_long_names("chain_0.schema_0.table_0")
+    assert "chain_0.schema_0.table_0" in result
+    assert chain_registry.loaded_chains == ["chain_0"]
+
+    result = chain_registry.get_metadata_by_table_long_names(
+        "chain_0.schema_0.table_0, chain_1.schema_0.table_1"
+    )
+    assert "chain_0.schema_0.table_0" in result
+    assert "chain_1.schema_0.table_1" in result
+    assert chain_registry.loaded_chains == ["chain_0", "chain_1"]
+    assert chain_registry.get_metadata_parser("chain_1") is (
+        chain_registry.get_metadata_parser("chain_1")
+    )
+    with pytest.raises(ValueError, match="Unknown chain"):
+        chain_registry.get_metadata_parser("polygon")
+
+
+def test_table_long_names_are_routed_by_chain(chain_catalogs):
+    chain_registry = ChainRegistry(chain_catalogs, default_chain="chain_0")
+    # names of an unknown database go to the default chain
+    assert chain_registry.group_table_long_names(
+        "chain_1.schema_0.table_1, chain_0.schema_0.table_0, polygon.core.fact_blocks"
+    ) == {
+        "chain_1": "chain_1.schema_0.table_1",
+        "chain_0": "chain_0.schema_0.table_0, polygon.core.fact_blocks",
+    }
+    assert chain_registry.table_long_names() == [
+        "chain_0.schema_0.table_0",
+        "chain_1.schema_0.table_1",
+    ]
+    assert len(chain_registry.table_long_names(full=True, chains=["chain_1"])) == 4
+
+    resolutions = chain_registry.resolve_table_long_names(
+        "chain_0.schema_0.table_0, chain_1.schema_0.tabl_1"
+    )
+    assert [resolution.long_name for resolution in resolutions] == [
+        "chain_0.schema_0.table_0",
+        "chain_1.schema_0.table_1",
+    ]
+
+
+def test_search_loads_the_chains_named_in_the_question(chain_catalogs):
+    chain_registry = ChainRegistry(chain_catalogs, default_chain="chain_0")
+    assert chain_registry.chains_mentioned("How many table_5 rows on chain_1?") == [
+        "chain_1"
+    ]
+
+    result = chain_registry.search_tables("table_4 data", top_k=1)
+    assert "chain_0.schema_0.table_4" in result
+    assert chain_registry.loaded_chains == ["chain_0"]
+
+    result = chain_registry.search_tables("table_5 data on chain_1", top_k=1)
+    assert "chain_1.schema_0.table_5" in result
+    assert chain_registry.loaded_chains == ["chain_0", "chain_1"]
+
+
+def test_chain_catalog_from_config():
+    chain_catalog = chain_catalog_from_config(agent_config, "ethereum")
+    assert chain_catalog.context_file.endswith(
+        "data/metadata/context_ethereum_core_defi_nft_price.json"
+    )
+    assert chain_catalog.enabled_list == (
+        agent_config.get("ethereum_core_table_long_name.enabled_list")
+        + agent_config.get("ethereum_defi_table_long_name.enabled_list")
+        + agent_config.get("ethereum_nft_table_long_name.enabled_list")
+        + agent_config.get("ethereum_price_table_long_name.enabled_list")
+    )
+    with pytest.raises(ValueError, match="not configured"):
+        chain_catalog_from_config(agent_config, "not_a_chain")
+
+
+def test_reload_metadata_reloads_the_loaded_chains(snowflake_params, chain_catalogs):
+    container = SnowflakeContainer(
+        **snowflake_params, chain_catalogs=chain_catalogs, default_chain="chain_0"
+    )
+    # only the default chain is loaded at startup
+    assert container.chain_registry.loaded_chains == ["chain_0"]
+    metadata_parser = container.metadata_parser
+
+    result = container.reload_metadata()
+    assert result["chains"] == ["chain_0"]
+    assert result["num_tables"] == 4
+    assert container.metadata_parser is not metadata_parser
+    assert container.chain_registry.loaded_chains == ["chain_0"]
+
+
+def test_table_listings_are_precomputed_and_served_from_memory(
+    snowflake_params, chain_catalogs, monkeypatch
+):
+    single_chain_catalogs = chain_catalogs[:1]
+    container = SnowflakeContainer(
+        **snowflake_params,
+        chain_catalogs=single_chain_catalogs,
+        default_chain="chain_0",
+    )
+    chain_registry = container.chain_registry
+    assert set(chain_registry._table_listings) == {False, True}
+    listing = chain_registry.table_listing()
+    assert listing == chain_registry.get_metadata_by_table_long_names(
+        "chain_0.schema_0.table_0",
+        include_column_names=False,
+        include_column_info=False,
+    )
+    with monkeypatch.context() as m:
+        m.setattr(chain_registry, "get_metadata_by_table_long_names", None)
+        assert chain_registry.table_listing() is listing
+        assert chain_registry.table_listing(full=True).count("chain_0.schema_0.") == 4
+
+    # a new summary changes the content hash of the shard, and the listing
+    container.metadata_parser.add_table_summary(
+        table_summary_json={"chain_0.schema_0.table_0": "Updated summary."}
+    )
+    assert "Updated summary." in chain_registry.table_listing()
+    container.reload_metadata()
+    assert chain_registry.table_listing() == listing
+
+
+def test_table_listings_of_unloaded_chains_are_not_precomputed(chain_catalogs):
+    chain_registry = ChainRegistry(chain_catalogs, default_chain="chain_0")
+    chain_registry.get_metadata_parser()
+    chain_registry.precompute_table_listings()
+    assert chain_registry._table_listings == {}
+    assert chain_registry.loaded_chains == ["chain_0"]
+
+    assert "chain_1.schema_0.table_1" in chain_registry.table_listing()
+    assert chain_registry.loaded_chains == ["chain_0", "chain_1"]
+
+
+def test_metadata_content_hash_does_not_load_shards(snowflake_params, chain_catalogs):
+    container = SnowflakeContainer(
+        **snowflake_params, chain_catalogs=chain_catalogs, default_chain="chain_0"
+    )
+    content_hash = container.metadata_content_hash()
+    assert container.metadata_content_hash("chain_1.schema_0.table_1") is None
+    assert container.chain_registry.loaded_chains == ["chain_0"]
+    assert container.metadata_content_hash("chain_0.schema_0.table_0") is not None
+
+    # the hash changes once the shard is loaded, and is then the hash of the loaded catalogs
+    container.chain_registry.get_metadata_parser("chain_1")
+    assert container.metadata_content_hash() != content_hash
+    assert container.metadata_content_hash() == (
+        container.chain_registry.content_hash()
+    )
+    assert container.metadata_content_hash("chain_1.schema_0.table_1") is not None
+
+
+def test_join_paths_across_chains(chain_catalogs):
+    chain_registry = ChainRegistry(chain_catalogs, default_chain="chain_0")
+    assert chain_registry.find_join_paths(
+        "chain_0.schema_0.table_0, chain_1.schema_0.table_1"
+    ) == (
+        "No join path found between chain_0.schema_0.table_0 and chain_1.schema_0.table_1."
+    )
+    assert chain_registry.find_join_paths("chain_0.schema_0.table_0").startswith(
+        "At least two tables are needed"
+    )
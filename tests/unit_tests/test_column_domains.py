@@ -0,0 +1,98 @@
+"""
+test_column_domains.py
+This file contains the tests for the value domains of the columns.
+"""
+import pytest
+
+from chatweb3.catalog.chain_registry import ChainRegistry
+from chatweb3.catalog.column_domains import build_column_domains, describe_domain
+from chatweb3.catalog.token_budget import degraded_column_info_formats
+from chatweb3.tools.snowflake_database.tool_custom import CheckTableMetadataTool
+
+
+def test_build_column_domains():
+    statements = []
+
+    def fetch_rows(statement):
+        statements.append(statement)
+        if len(statements) == 1:
+            return (
+                ["ROW_COUNT", "C0_NON_NULL", "C0_DISTINCT", "C1_NON_NULL"]
+                + ["C1_DISTINCT", "C1_MIN", "C1_MAX", "C2_NON_NULL"],
+                [[4, 3, 2, 4, 4, 10, 40, 1]],
+            )
+        return ["COLUMN_NAME", "VALUE", "VALUE_COUNT"], [
+            ["event_type", "sale", 1],
+            ["event_type", "bid_won", 2],
+        ]
+
+    _, domains = build_column_domains(
+        fetch_rows,
+        "select * from sales limit 4",
+        [("event_type", "VARCHAR"), ("price", "FLOAT"), ("data", "VARIANT")],
+        max_values=3,
+    )
+    assert "count(distinct data)" not in statements[0]
+    assert "min(price)" in statements[0] and "min(event_type)" not in statements[0]
+    assert "'event_type' as column_name" in statements[1]
+    assert "'price' as column_name" not in statements[1]
+    assert domains == {
+        "event_type": {
+            "null_ratio": 0.25,
+            "distinct_count": 2,
+            "values": ["bid_won", "sale"],
+        },
+        "price": {"null_ratio": 0.0, "distinct_count": 4, "min": 10, "max": 40},
+        "data": {"null_ratio": 0.75},
+    }
+
+
+def test_describe_domain():
+    assert describe_domain(None) == ""
+    assert describe_domain({"null_ratio": 0.0, "distinct_count": 900}) == ""
+    assert (
+        describe_domain({"null_ratio": 0.25, "values": ["bid_won", "sale"]})
+        == "values: bid_won, sale; nulls: 25%"
+    )
+    assert (
+        describe_domain({"null_ratio": 0.001, "min": 1, "max": 17000000})
+        == "range: 1 to 17000000; nulls: <1%"
+    )
+
+
+def test_degraded_column_info_formats_with_domains():
+    assert degraded_column_info_formats(
+        ["name", "comment", "sample_values_list", "domain"]
+    ) == [
+        ["name", "comment", "sample_values_list", "domain"],
+        ["name", "comment", "domain"],
+        ["name", "comment"],
+        ["name"],
+    ]
+
+
+@pytest.mark.parametrize(
+    "include_column_domains, rendered", [(False, False), (True, True)]
+)
+def test_check_table_metadata_tool_renders_domains(
+    metadata_parser_with_sample_data, include_column_domains, rendered
+):
+    table = metadata_parser_with_sample_data._get_table(
+        "ethereum", "core", "ez_nft_sales"
+    )
+    table.columns["event_type"].domain = {
+        "null_ratio": 0.0,
+        "values": ["sale", "bid_won", "redeem", "mint"],
+    }
+
+    class Container:
+        chain_registry = ChainRegistry.from_metadata_parser(
+            metadata_parser_with_sample_data
+        )
+
+    tool = CheckTableMetadataTool.construct(
+        db=Container(), include_column_domains=include_column_domains
+    )
+    result = tool._run("ethereum.core.ez_nft_sales", mode="local")
+    assert ("values: sale, bid_won, redeem, mint" in result) == rendered
+    assert ("Value domain" in result) == rendered
@@ -0,0 +1,85 @@
+"""
+test_column_pruning.py
+This file contains the tests for the column pruning of wide tables.
+"""
+import pytest
+
+from chatweb3.catalog.column_pruning import is_key_column, select_relevant_columns
+from chatweb3.metadata_parser import Column
+
+
+@pytest.fixture
+def wide_table(metadata_parser_with_sample_data):
+    table = (
+        metadata_parser_with_sample_data.root_schema_obj.databases["ethereum"]
+        .schemas["core"]
+        .tables["ez_nft_sales"]
+    )
+    columns = dict(table.columns)
+    for name, data_type, comment in [
+        ("block_timestamp", "TIMESTAMP_NTZ(9)", "The time of the block."),
+        ("tx_hash", "VARCHAR(16777216)", "The transaction hash."),
+        ("seller_address", "VARCHAR(16777216)", "The address of the seller."),
+        ("price_usd", "FLOAT", "The price of the NFT in US dollars."),
+        ("platform_name", "VARCHAR(16777216)", "The marketplace, e.g. opensea."),
+        ("creator_fee", "FLOAT", "The royalty paid to the creator."),
+        ("tokenid", "VARCHAR(16777216)", "The token ID of the NFT."),
+    ]:
+        columns[name] = Column(name, "ez_nft_sales", "core", "ethereum", data_type)
+        columns[name].comment = comment
+        columns[name].sample_values_list = ["x"]
+    table.columns = columns
+    table.column_names = list(columns)
+    return table
+
+
+def test_is_key_column():
+    assert is_key_column(Column("block_timestamp"))
+    assert is_key_column(Column("tx_hash"))
+    assert is_key_column(Column("nft_address"))
+    assert is_key_column(Column("day", data_type="DATE"))
+    assert not is_key_column(Column("price_usd", data_type="FLOAT"))
+    assert not is_key_column(Column("hashrate"))
+
+
+def test_select_relevant_columns(wide_table):
+    assert select_relevant_columns(wide_table, "price", max_columns=9) is None
+    assert select_relevant_columns(
+        wide_table, "top sales by price in dollars on opensea", max_columns=2
+    ) == [
+        "block_timestamp",
+        "tx_hash",
+        "seller_address",
+        "price_usd",
+        "platform_name",
+    ]
+    # only the key columns if nothing matches
+    assert select_relevant_columns(wide_table, "unrelated", max_columns=2) == [
+        "block_timestamp",
+        "tx_hash",
+        "seller_address",
+    ]
+
+
+def test_get_metadata_prunes_wide_tables(metadata_parser_with_sample_data, wide_table):
+    parser = metadata_parser_with_sample_data
+    full = parser.get_metadata_by_table_long_names("ethereum.core.ez_nft_sales")
+    pruned = parser.get_metadata_by_table_long_names(
+        "ethereum.core.ez_nft_sales", question="royalty paid", max_columns=2
+    )
+    assert "creator_fee | The royalty paid to the creator." in pruned
+    assert "price_usd" in full and "price_usd |" not in pruned
+    assert pruned.endswith(
+        "Note: 5 of the 9 columns are omitted as less relevant to the question: "
+        "block_number, event_type, price_usd, platform_name, tokenid"
+    )
+    # narrow tables and renders without a question are not pruned
+    assert (
+        parser.get_metadata_by_table_long_names(
+            "ethereum.core.ez_nft_sales", question="royalty paid", max_columns=20
+        )
+        == full
+    )
+    assert parser.get_metadata_by_table_long_names(
+        "polygon.core.fact_blocks", question="royalty paid", max_columns=0
+    ) == parser.get_metadata_by_table_long_names("polygon.core.fact_blocks")
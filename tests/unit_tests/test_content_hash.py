@@ -0,0 +1,118 @@
+"""
+test_content_hash.py
+This file contains the tests for the content hashes of the catalog.
+"""
+import pytest
+
+from benchmarks.synthetic_catalog import write_synthetic_catalog_files
+from chatweb3.catalog.chain_registry import ChainCatalog, ChainRegistry
+from chatweb3.catalog.indexed_catalog import write_indexed_catalog
+from chatweb3.catalog.sqlite_catalog import SqliteCatalog, write_sqlite_catalog
+from chatweb3.metadata_parser import MetadataParser
+
+
+@pytest.fixture
+def catalog_files(tmp_path):
+    """The context and annotation files of a synthetic catalog."""
+    return write_synthetic_catalog_files(
+        str(tmp_path / "context.json"),
+        str(tmp_path / "annotation.json"),
+        num_tables=8,
+        num_columns=6,
+        num_databases=2,
+        num_schemas=2,
+    )
+
+
+def test_content_hash_is_the_same_for_every_catalog_format(tmp_path, catalog_files):
+    context_file_path, annotation_file_path = catalog_files
+    parser = MetadataParser(
+        file_path=context_file_path, annotation_file_path=annotation_file_path
+    )
+    snapshot_file_path = str(tmp_path / "catalog.pickle")
+    parser.save_catalog_snapshot(snapshot_file_path)
+    indexed_catalog_file_path = str(tmp_path / "catalog.idx")
+    write_indexed_catalog(
+        parser.root_schema_obj, indexed_catalog_file_path, [context_file_path]
+    )
+    sqlite_catalog_file_path = str(tmp_path / "catalog.sqlite")
+    write_sqlite_catalog(parser, sqlite_catalog_file_path)
+
+    snapshot_parser = MetadataParser(
+        file_path=context_file_path,
+        annotation_file_path=annotation_file_path,
+        snapshot_file_path=snapshot_file_path,
+    )
+    indexed_parser = MetadataParser(
+        file_path=context_file_path,
+        annotation_file_path=annotation_file_path,
+        indexed_catalog_file_path=indexed_catalog_file_path,
+    )
+    sqlite_catalog = SqliteCatalog(sqlite_catalog_file_path)
+    for other_parser in [snapshot_parser, indexed_parser, sqlite_catalog]:
+        assert other_parser.content_hash == parser.content_hash
+        assert other_parser.table_content_hash(
+            "chain_0.schema_0.table_0"
+        ) == parser.table_content_hash("chain_0.schema_0.table_0")
+    # the hashes of the lazily loaded tables are read from the catalog files
+    assert all(
+        table._loader is not None
+        for catalog in [indexed_parser, sqlite_catalog]
+        for table in catalog._table_index.values()
+    )
+    assert parser.table_content_hash("chain_0.schema_0.missing") is None
+    assert parser.table_content_hash("not a table name") is None
+
+
+def test_add_table_summary_only_renders_the_changed_tables_again(catalog_files):
+    context_file_path, annotation_file_path = catalog_files
+    parser = MetadataParser(
+        file_path=context_file_path, annotation_file_path=annotation_file_path
+    )
+    content_hash = parser.content_hash
+    table_hash = parser.table_content_hash("chain_0.schema_0.table_0")
+    other_table_hash = parser.table_content_hash("chain_1.schema_1.table_7")
+    parser.get_metadata_by_table_long_names(
+        "chain_0.schema_0.table_0, chain_1.schema_1.table_7"
+    )
+
+    parser.add_table_summary(
+        table_summary_json={"chain_0.schema_0.table_0": "Updated summary."}
+    )
+    assert parser.content_hash != content_hash
+    assert parser.table_content_hash("chain_0.schema_0.table_0") != table_hash
+    assert parser.table_content_hash("chain_1.schema_1.table_7") == other_table_hash
+    assert {key[0] for key in parser._render_cache} == {"chain_1.schema_1.table_7"}
+    assert "Updated summary." in parser.get_metadata_by_table_long_names(
+        "chain_0.schema_0.table_0", include_column_info=False
+    )
+
+    # the same summary again changes nothing
+    parser.add_table_summary(
+        table_summary_json={"chain_0.schema_0.table_0": "Updated summary."}
+    )
+    assert len(parser._render_cache) == 2
+
+
+def test_chain_registry_content_hashes(catalog_files):
+    context_file_path, annotation_file_path = catalog_files
+    chain_registry = ChainRegistry(
+        [
+            ChainCatalog(
+                chain="chain_0",
+                context_file=context_file_path,
+                annotation_file=annotation_file_path,
+            )
+        ],
+        default_chain="chain_0",
+    )
+    metadata_parser = chain_registry.get_metadata_parser()
+    assert chain_registry.content_hash() == chain_registry.content_hash(["chain_0"])
+    assert chain_registry.table_content_hashes(
+        "chain_0.schema_0.table_0, chain_0.schema_0.missing"
+    ) == {
+        "chain_0.schema_0.table_0": metadata_parser.table_content_hash(
+            "chain_0.schema_0.table_0"
+        ),
+        "chain_0.schema_0.missing": None,
+    }
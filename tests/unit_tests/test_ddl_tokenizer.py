@@ -0,0 +1,54 @@
+"""
+test_ddl_tokenizer.py
+This file contains the tests for the DDL tokenizer.
+"""
+from chatweb3.catalog.ddl_tokenizer import parse_column_definitions
+
+
+def test_parse_create_table_stmt():
+    create_table_stmt = (
+        "\nCREATE TABLE ETHEREUM.CORE.FACT_BLOCKS (\n"
+        "\tBLOCK_NUMBER_HASH\n\tVARCHAR(16777216)\n\tCOMMENT 'The hash of the block.', "
+        "BLOCK_NUMBER\n\tNUMBER(38,0)\n\tCOMMENT 'Also known as block height.', "
+        "SIZE\n\tNUMBER(38,0)\n\tCOMMENT 'Determined by a given block's gas limit.', "
+        "TX_JSON\n\tOBJECT\n)\n\n"
+    )
+    assert parse_column_definitions(create_table_stmt) == {
+        "block_number_hash": ("VARCHAR(16777216)", "The hash of the block."),
+        "block_number": ("NUMBER(38,0)", "Also known as block height."),
+        "size": ("NUMBER(38,0)", "Determined by a given block's gas limit."),
+        "tx_json": ("OBJECT", None),
+    }
+
+
+def test_parse_get_ddl_view():
+    get_ddl_create_table = (
+        "create or replace view ETHEREUM.CORE.EZ_NFT_SALES(\n"
+        "\tBLOCK_NUMBER COMMENT 'Also known as block height.',\n"
+        "\tNFT_ADDRESS COMMENT 'The contract''s address, e.g. ''0x...''.',\n"
+        "\tTOKENID\n"
+        ") COMMENT='''Sales of NFTs.'''\n as (\n  SELECT block_number, nft_address, tokenid FROM x\n);"
+    )
+    assert parse_column_definitions(get_ddl_create_table) == {
+        "block_number": (None, "Also known as block height."),
+        "nft_address": (None, "The contract's address, e.g. '0x...'."),
+        "tokenid": (None, None),
+    }
+
+
+def test_parse_get_ddl_table_with_cluster_by():
+    get_ddl_create_table = (
+        "create or replace TRANSIENT TABLE ETHEREUM.CORE.EZ_ETH_TRANSFERS "
+        "cluster by (block_timestamp::DATE)(\n"
+        "\tTX_HASH VARCHAR(16777216) COMMENT 'Transaction hash.',\n"
+        "\tAMOUNT FLOAT\n);"
+    )
+    assert parse_column_definitions(get_ddl_create_table) == {
+        "tx_hash": ("VARCHAR(16777216)", "Transaction hash."),
+        "amount": ("FLOAT", None),
+    }
+
+
+def test_parse_without_column_list():
+    assert parse_column_definitions(None) == {}
+    assert parse_column_definitions("create view X as (select 1 as a)") == {}
@@ -8,10 +8,14 @@ from fastapi.testclient import TestClient
 # from api.services.blockchain_data import query_blockchain_data_from_flipside
 from api.api_endpoints import (
     app,
+    db,
     CheckTableSummaryTool,
     CheckTableMetadataTool,
+    FindJoinPathsTool,
     QueryDatabaseTool,
+    SearchTableSummaryTool,
 )
+from config.config import agent_config
 
 client = TestClient(app)
 
@@ -26,6 +30,19 @@ def test_get_list_of_available_tables():
         mock_method.assert_called_once()
 
 
+def test_search_relevant_tables():
+    with patch.object(
+        SearchTableSummaryTool, "run", return_value="mocked_search_value"
+    ) as mock_method:
+        response = client.get(
+            "/search_relevant_tables",
+            params={"question": "top NFT sales", "top_k": 3},
+        )
+        assert response.status_code == 200
+        assert response.json() == {"result": "mocked_search_value"}
+        mock_method.assert_called_once_with({"tool_input": "top NFT sales", "top_k": 3})
+
+
 def test_get_detailed_metadata_for_tables():
     with patch.object(
         CheckTableMetadataTool, "run", return_value="mocked_metadata_value"
@@ -38,6 +55,54 @@ def test_get_detailed_metadata_for_tables():
         mock_method.assert_called_once_with("test_table")
 
 
+def test_get_detailed_metadata_for_tables_render_format():
+    response = client.get(
+        "/get_detailed_metadata_for_tables",
+        params={"table_names": "ethereum.core.fact_blocks", "render_format": "ddl"},
+    )
+    assert response.status_code == 200
+    assert "CREATE TABLE ethereum.core.fact_blocks (\n" in response.json()["result"]
+
+    response = client.get(
+        "/get_detailed_metadata_for_tables",
+        params={"table_names": "ethereum.core.fact_blocks", "render_format": "xml"},
+    )
+    assert response.status_code == 400
+
+
+def test_get_detailed_metadata_for_tables_etag():
+    params = {"table_names": "ethereum.core.fact_blocks"}
+    with patch.object(
+        CheckTableMetadataTool, "run", return_value="mocked_metadata_value"
+    ) as mock_method:
+        response = client.get("/get_detailed_metadata_for_tables", params=params)
+        etag = response.headers["ETag"]
+
+        response = client.get(
+            "/get_detailed_metadata_for_tables",
+            params=params,
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        mock_method.assert_called_once()
+
+        response = client.get(
+            "/get_detailed_metadata_for_tables",
+            params={**params, "render_format": "ddl"},
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+        # the metadata of tables missing from the catalog comes from Snowflake
+        response = client.get(
+            "/get_detailed_metadata_for_tables", params={"table_names": "test_table"}
+        )
+        assert response.status_code == 200
+        assert "ETag" not in response.headers
+
+
 def test_query_snowflake_sql_database():
     with patch.object(
         QueryDatabaseTool, "run", return_value="mocked_query_result"
@@ -50,6 +115,31 @@ def test_query_snowflake_sql_database():
         mock_method.assert_called_once_with(tool_input="SELECT * FROM test_table")
 
 
+def test_reload_metadata(monkeypatch):
+    with patch.object(
+        db, "reload_metadata", return_value={"num_tables": 1, "duration_ms": 1.0}
+    ) as mock_method:
+        monkeypatch.setitem(agent_config.config["admin_params"], "admin_token", None)
+        response = client.post("/admin/reload_metadata")
+        assert response.status_code == 404
+
+        monkeypatch.setitem(
+            agent_config.config["admin_params"], "admin_token", "secret"
+        )
+        response = client.post(
+            "/admin/reload_metadata", headers={"X-Admin-Token": "wrong"}
+        )
+        assert response.status_code == 403
+        mock_method.assert_not_called()
+
+        response = client.post(
+            "/admin/reload_metadata", headers={"X-Admin-Token": "secret"}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"result": {"num_tables": 1, "duration_ms": 1.0}}
+        mock_method.assert_called_once_with()
+
+
 @pytest.mark.skip(reason="No longer in use")
 @patch("api.api_endpoints.query_blockchain_data_from_flipside")
 def test_query_chatweb3_success(mock_query):
@@ -75,3 +165,39 @@ def test_query_chatweb3_internal_error(mock_query):
     response = client.post("/query_blockchain_data", json={"query": "Some Input"})
     assert response.status_code == 500
     assert "error" in response.json()
+
+
+def test_find_join_paths_between_tables():
+    with patch.object(
+        FindJoinPathsTool, "run", return_value="mocked_join_paths"
+    ) as mock_method:
+        response = client.get(
+            "/find_join_paths_between_tables",
+            params={
+                "table_names": "ethereum.core.fact_blocks, ethereum.core.fact_transactions"
+            },
+        )
+        assert response.status_code == 200
+        assert response.json() == {"result": "mocked_join_paths"}
+        mock_method.assert_called_once_with(
+            "ethereum.core.fact_blocks, ethereum.core.fact_transactions"
+        )
+
+
+def test_metadata_miss_cache_info(monkeypatch):
+    monkeypatch.setitem(agent_config.config["admin_params"], "admin_token", "secret")
+    response = client.get("/admin/metadata_miss_cache")
+    assert response.status_code == 403
+
+    response = client.get(
+        "/admin/metadata_miss_cache", headers={"X-Admin-Token": "secret"}
+    )
+    assert response.status_code == 200
+    assert set(response.json()["result"]) == {
+        "hits",
+        "misses",
+        "stores",
+        "expirations",
+        "entries",
+        "hit_rate",
+    }
@@ -0,0 +1,98 @@
+"""
+test_indexed_catalog.py
+This file contains the tests for the indexed catalog module.
+"""
+import json
+import os
+
+import pytest
+
+from chatweb3.catalog.indexed_catalog import load_indexed_catalog, write_indexed_catalog
+from chatweb3.metadata_parser import MetadataParser
+
+
+@pytest.fixture
+def context_file_path(metadata_files):
+    context_file_path, _ = metadata_files
+    with open(context_file_path) as f:
+        data = json.load(f)
+    ez_nft_sales = data["root_schema_obj"]["databases"]["ethereum"]["schemas"]["core"][
+        "tables"
+    ]["ez_nft_sales"]
+    ez_nft_sales["create_table_stmt"] = (
+        "CREATE TABLE ETHEREUM.CORE.EZ_NFT_SALES (\n\tBLOCK_NUMBER\n\tNUMBER(38,0)\n\t"
+        "COMMENT 'Also known as block height.', EVENT_TYPE\n\tVARCHAR(16777216)\n)"
+    )
+    ez_nft_sales["sample_row_column_names"] = ["block_number", "event_type"]
+    ez_nft_sales["sample_rows"] = [[1, "sale"], [2, "bid_won"]]
+    with open(context_file_path, "w") as f:
+        json.dump(data, f)
+    return context_file_path
+
+
+def test_metadata_parser_loads_tables_lazily(
+    tmp_path, context_file_path, metadata_files
+):
+    _, annotation_file_path = metadata_files
+    catalog_file_path = str(tmp_path / "catalog.idx")
+    parser = MetadataParser(
+        file_path=context_file_path, annotation_file_path=annotation_file_path
+    )
+    write_indexed_catalog(
+        parser.root_schema_obj, catalog_file_path, [context_file_path]
+    )
+
+    lazy_parser = MetadataParser(
+        file_path=context_file_path,
+        annotation_file_path=annotation_file_path,
+        indexed_catalog_file_path=catalog_file_path,
+    )
+    databases = lazy_parser.root_schema_obj.databases
+    ez_nft_sales = databases["ethereum"].schemas["core"].tables["ez_nft_sales"]
+    fact_blocks = databases["polygon"].schemas["core"].tables["fact_blocks"]
+    assert ez_nft_sales._loader is not None and fact_blocks._loader is not None
+    # names, comments and summaries do not load the table
+    assert ez_nft_sales.column_names == ["block_number", "event_type"]
+    assert ez_nft_sales.summary == "NFT sales summary."
+    assert lazy_parser.get_metadata_by_table_long_names(
+        "ethereum.core.ez_nft_sales", include_column_info=False
+    ) == parser.get_metadata_by_table_long_names(
+        "ethereum.core.ez_nft_sales", include_column_info=False
+    )
+    assert ez_nft_sales._loader is not None
+
+    assert lazy_parser.get_metadata_by_table_long_names(
+        "ethereum.core.ez_nft_sales"
+    ) == parser.get_metadata_by_table_long_names("ethereum.core.ez_nft_sales")
+    assert ez_nft_sales._loader is None
+    assert ez_nft_sales.columns["block_number"].data_type == "NUMBER(38,0)"
+    assert ez_nft_sales.columns["event_type"].sample_values_list == ["sale", "bid_won"]
+    assert fact_blocks._loader is not None
+
+    assert lazy_parser.root_schema_obj == parser.root_schema_obj
+
+
+def test_stale_indexed_catalog_is_ignored(tmp_path, context_file_path):
+    catalog_file_path = str(tmp_path / "catalog.idx")
+    parser = MetadataParser(file_path=context_file_path)
+    write_indexed_catalog(
+        parser.root_schema_obj, catalog_file_path, [context_file_path]
+    )
+    assert load_indexed_catalog(catalog_file_path, [context_file_path]) is not None
+
+    # the fingerprint is checked on the size and modification time of the context file
+    stat = os.stat(context_file_path)
+    os.utime(context_file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert load_indexed_catalog(catalog_file_path, [context_file_path]) is None
+    os.utime(context_file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert load_indexed_catalog(catalog_file_path, [context_file_path]) is not None
+    with open(context_file_path, "a") as f:
+        f.write("\n")
+    assert load_indexed_catalog(catalog_file_path, [context_file_path]) is None
+    assert load_indexed_catalog(str(tmp_path / "missing.idx")) is None
+
+    fallback_parser = MetadataParser(
+        file_path=context_file_path, indexed_catalog_file_path=catalog_file_path
+    )
+    assert fallback_parser._indexed_catalog is None
+    assert fallback_parser.root_schema_obj == parser.root_schema_obj
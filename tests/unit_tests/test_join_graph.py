@@ -0,0 +1,200 @@
+"""
+test_join_graph.py
+This file contains the tests for the join graph of the tables of the catalog.
+"""
+from chatweb3.catalog.join_graph import JoinGraph, JoinKey, is_join_key
+from chatweb3.metadata_parser import Column, Table
+from chatweb3.tools.snowflake_database.tool_custom import FindJoinPathsTool
+
+TRANSFERS = "ethereum.core.ez_token_transfers"
+SWAPS = "ethereum.defi.ez_dex_swaps"
+PRICES = "ethereum.price.ez_hourly_token_prices"
+BLOCKS = "ethereum.core.fact_blocks"
+LABELS = "ethereum.core.dim_labels"
+
+
+def _table(table_long_name, data_types):
+    database_name, schema_name, table_name = table_long_name.split(".")
+    table = Table(table_name, schema_name, database_name)
+    table.columns = {
+        name: Column(name, table_name, schema_name, database_name, data_type)
+        for name, data_type in data_types.items()
+    }
+    table.column_names = list(data_types)
+    return table
+
+
+def _join_graph():
+    return JoinGraph(
+        [
+            _table(
+                TRANSFERS,
+                {
+                    "tx_hash": "VARCHAR(16777216)",
+                    "block_number": "NUMBER(38,0)",
+                    "block_timestamp": "TIMESTAMP_NTZ(9)",
+                    "contract_address": "VARCHAR(16777216)",
+                    "origin_from_address": "VARCHAR(16777216)",
+                    "amount": "FLOAT",
+                },
+            ),
+            _table(
+                SWAPS,
+                {
+                    "tx_hash": "VARCHAR(16777216)",
+                    "block_number": "NUMBER(38,0)",
+                    "contract_address": "VARCHAR(16777216)",
+                    "origin_from_address": "VARCHAR(16777216)",
+                    "amount": "FLOAT",
+                },
+            ),
+            _table(
+                PRICES,
+                {
+                    "hour": "TIMESTAMP_NTZ(9)",
+                    "token_address": "VARCHAR(16777216)",
+                    "price": "FLOAT",
+                },
+            ),
+            _table(BLOCKS, {"block_number": "NUMBER(38,0)", "hash": "VARCHAR(66)"}),
+            _table(LABELS, {"address": "VARCHAR(16777216)", "label": "VARCHAR"}),
+        ]
+    )
+
+
+def test_is_join_key():
+    assert is_join_key("tx_hash")
+    assert is_join_key("block_number")
+    assert is_join_key("tokenid")
+    assert not is_join_key("origin_from_address")
+    assert not is_join_key("_log_id")
+    assert not is_join_key("id")
+    assert not is_join_key("amount")
+
+
+def test_join_keys():
+    join_graph = _join_graph()
+    assert join_graph.join_keys(TRANSFERS, SWAPS) == [
+        JoinKey("tx_hash", "tx_hash"),
+        JoinKey("contract_address", "contract_address"),
+        JoinKey("block_number", "block_number"),
+    ]
+    assert join_graph.join_keys(PRICES, TRANSFERS) == [
+        JoinKey("token_address", "contract_address"),
+        JoinKey("hour", "block_timestamp", "{}", "date_trunc('hour', {})"),
+    ]
+    assert join_graph.join_keys(BLOCKS, PRICES) == []
+
+
+def test_join_keys_cache_is_bounded():
+    join_graph = _join_graph()
+    join_graph.max_cached_pairs = 2
+    keys = join_graph.join_keys(TRANSFERS, SWAPS)
+    assert join_graph.join_keys(TRANSFERS, SWAPS) is keys
+    join_graph.join_keys(PRICES, TRANSFERS)
+    join_graph.join_keys(SWAPS, BLOCKS)
+    assert len(join_graph._join_keys_cache) == 2
+    assert (TRANSFERS, SWAPS) not in join_graph._join_keys_cache
+    assert join_graph.join_keys(TRANSFERS, SWAPS) == keys
+
+
+def test_join_keys_of_incompatible_data_types():
+    join_graph = JoinGraph(
+        [
+            _table(BLOCKS, {"block_number": "NUMBER(38,0)"}),
+            _table(TRANSFERS, {"block_number": "VARCHAR(16777216)"}),
+        ]
+    )
+    assert join_graph.join_keys(BLOCKS, TRANSFERS) == []
+    assert join_graph.find_paths(BLOCKS, TRANSFERS) == []
+
+
+def test_find_paths():
+    join_graph = _join_graph()
+    assert join_graph.find_paths(TRANSFERS, SWAPS) == [[TRANSFERS, SWAPS]]
+    # the shortest paths, the ones linked by the most selective keys first
+    assert join_graph.find_paths(LABELS, BLOCKS) == [
+        [LABELS, TRANSFERS, BLOCKS],
+        [LABELS, SWAPS, BLOCKS],
+    ]
+    assert join_graph.find_paths(LABELS, BLOCKS, max_paths=1) == [
+        [LABELS, TRANSFERS, BLOCKS]
+    ]
+    assert join_graph.find_paths(LABELS, BLOCKS, table_long_names=[SWAPS]) == [
+        [LABELS, SWAPS, BLOCKS]
+    ]
+    assert join_graph.find_paths(LABELS, BLOCKS, max_hops=1) == []
+
+
+def test_describe_path():
+    join_graph = _join_graph()
+    assert join_graph.describe_path([TRANSFERS, PRICES]) == (
+        f"{TRANSFERS}\n\tJOIN {PRICES} ON ez_token_transfers.contract_address = ez_hourly_token_prices.token_address "
+        "AND date_trunc('hour', ez_token_transfers.block_timestamp) = ez_hourly_token_prices.hour"
+    )
+    assert join_graph.describe_path([SWAPS, BLOCKS]) == (
+        f"{SWAPS}\n\tJOIN {BLOCKS} ON ez_dex_swaps.block_number = fact_blocks.block_number"
+    )
+    assert join_graph.describe_path([TRANSFERS, SWAPS]) == (
+        f"{TRANSFERS}\n\tJOIN {SWAPS} ON ez_token_transfers.tx_hash = ez_dex_swaps.tx_hash "
+        "(other keys: ez_token_transfers.contract_address = ez_dex_swaps.contract_address, "
+        "ez_token_transfers.block_number = ez_dex_swaps.block_number)"
+    )
+
+
+def test_token_address_joins_of_the_sample_catalog(snowflake_container_eth_core):
+    join_graph = snowflake_container_eth_core.metadata_parser.join_graph
+    swaps = "ethereum.defi.ez_dex_swaps"
+    prices = "ethereum.price.fact_hourly_token_prices"
+    # the contract_address of a swap is its pool, the tokens are token_in and token_out
+    assert join_graph.describe_path([swaps, prices]) == (
+        f"{swaps}\n\tJOIN {prices} ON ez_dex_swaps.token_in = fact_hourly_token_prices.token_address "
+        "AND date_trunc('hour', ez_dex_swaps.block_timestamp) = fact_hourly_token_prices.hour "
+        "(other keys: ez_dex_swaps.token_out = fact_hourly_token_prices.token_address)"
+    )
+    assert JoinKey("token_address", "contract_address") not in join_graph.join_keys(
+        prices, "ethereum.defi.ez_lending_deposits"
+    )
+    assert join_graph.join_keys(prices, "ethereum.core.ez_token_transfers")[0] == (
+        JoinKey("token_address", "contract_address")
+    )
+
+
+def test_find_join_paths_tool(snowflake_container_eth_core):
+    tool = FindJoinPathsTool(db=snowflake_container_eth_core)
+    result = tool._run(
+        "ethereum.core.ez_token_transfer, ethereum.prices.ez_hourly_token_prices"
+    )
+    assert result.startswith(
+        "Note: table 'ethereum.core.ez_token_transfer' does not exist, "
+        "showing 'ethereum.core.ez_token_transfers' instead.\n"
+        "Note: table 'ethereum.prices.ez_hourly_token_prices' does not exist, "
+        "showing 'ethereum.price.ez_hourly_token_prices' instead.\n\n"
+        "Join paths between ethereum.core.ez_token_transfers and ethereum.price.ez_hourly_token_prices:"
+    )
+    assert tool._run("ethereum.core.ez_token_transfers") == (
+        "At least two tables are needed to find the join paths between them, "
+        "got: ethereum.core.ez_token_transfers."
+    )
+
+
+def test_find_join_paths(metadata_parser_with_sample_data):
+    parser = metadata_parser_with_sample_data
+    assert parser.find_join_paths(
+        "ethereum.core.ez_nft_sales, ethereum.aave.ez_proposals, polygon.core.fact_blocks"
+    ) == (
+        "Join paths between ethereum.core.ez_nft_sales and ethereum.aave.ez_proposals:\n"
+        "1. ethereum.core.ez_nft_sales\n"
+        "\tJOIN ethereum.aave.ez_proposals ON ez_nft_sales.block_number = ez_proposals.block_number\n\n"
+        "No join path found between ethereum.core.ez_nft_sales and polygon.core.fact_blocks.\n\n"
+        "No join path found between ethereum.aave.ez_proposals and polygon.core.fact_blocks."
+    )
+    assert parser.find_join_paths(
+        "ethereum.core.ez_nft_sales, ethereum.aave.ez_proposals",
+        allowed_table_long_names="ethereum.core.ez_nft_sales",
+    ).startswith("Join paths between")
+
+    # the graph is rebuilt with the catalog
+    join_graph = parser.join_graph
+    parser.root_schema_obj = parser.root_schema_obj
+    assert parser.join_graph is not join_graph
@@ -0,0 +1,147 @@
+"""
+test_metadata_miss_cache.py
+This file contains the tests for the negative cache of the Snowflake metadata lookups.
+"""
+import pytest
+
+from chatweb3.snowflake_database import (
+    NegativeCache,
+    SnowflakeObjectNotFoundError,
+    is_object_not_found_error,
+)
+from chatweb3.tools.snowflake_database.tool_custom import CheckTableMetadataTool
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("chatweb3.snowflake_database.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_negative_cache(clock):
+    cache = NegativeCache(ttl=60, max_entries=2)
+    assert cache.get("ethereum.core.fact_foo") is None
+    cache.put("ethereum.core.fact_foo", "not found")
+    assert cache.get("ethereum.core.fact_foo") == "not found"
+
+    clock[0] += 61
+    assert cache.get("ethereum.core.fact_foo") is None
+    assert len(cache) == 0
+
+    # the oldest entry is evicted
+    for key in ["a", "b", "c"]:
+        cache.put(key, f"{key} not found")
+    assert cache.get("a") is None
+    assert cache.get("c") == "c not found"
+    assert cache.info() == {
+        "hits": 2,
+        "misses": 3,
+        "stores": 4,
+        "expirations": 1,
+        "entries": 2,
+        "hit_rate": 0.4,
+    }
+
+
+def test_negative_cache_disabled():
+    cache = NegativeCache(ttl=0)
+    cache.put("ethereum.core.fact_foo", "not found")
+    assert cache.get("ethereum.core.fact_foo") is None
+    assert cache.info()["stores"] == 0
+
+
+class FakeSnowflakeDatabase:
+    def __init__(self):
+        self.lookups = 0
+
+    def get_usable_table_names(self):
+        return ["fact_blocks"]
+
+    def get_table_info_no_throw(self, table_names, as_dict=False):
+        self.lookups += 1
+        missing_tables = set(table_names).difference(self.get_usable_table_names())
+        if missing_tables:
+            return {
+                table_name: f"table_names {missing_tables} not found in database"
+                for table_name in table_names
+            }
+        return {table_name: "CREATE TABLE ..." for table_name in table_names}
+
+
+class FakeSnowflakeContainer:
+    def __init__(self):
+        self.metadata_miss_cache = NegativeCache(ttl=60)
+        self.database = FakeSnowflakeDatabase()
+        self.database_lookups = 0
+
+    def get_database(self, database, schema):
+        self.database_lookups += 1
+        if schema == "uniswapv3":
+            raise SnowflakeObjectNotFoundError(
+                f"Error getting snowflake database for {database}.{schema}"
+            )
+        if schema == "defi":
+            raise ValueError(
+                f"Error getting snowflake database for {database}.{schema}"
+            )
+        return self.database
+
+
+def test_metadata_misses_are_not_looked_up_again():
+    container = FakeSnowflakeContainer()
+    tool = CheckTableMetadataTool.construct(db=container)
+
+    result = tool._get_metadata_from_snowflake("ethereum.core.fact_foo")
+    assert (
+        result
+        == "ethereum.core.fact_foo: table_names {'fact_foo'} not found in database"
+    )
+    assert tool._get_metadata_from_snowflake("ethereum.core.fact_foo") == result
+    assert container.database.lookups == 1
+
+    # only the tables that are not cached are looked up
+    result = tool._get_metadata_from_snowflake(
+        "ethereum.core.fact_foo, ethereum.core.fact_blocks"
+    )
+    assert result == (
+        "ethereum.core.fact_foo: table_names {'fact_foo'} not found in database;\n\n\n"
+        "ethereum.core.fact_blocks: CREATE TABLE ..."
+    )
+    assert container.database.lookups == 2
+    tool._get_metadata_from_snowflake("ethereum.core.fact_blocks")
+    assert container.database.lookups == 3
+
+    # schemas that could not be reflected
+    for _ in range(2):
+        with pytest.raises(ValueError, match="ethereum.uniswapv3"):
+            tool._get_metadata_from_snowflake("ethereum.uniswapv3.ez_swaps")
+    assert container.database_lookups == 4
+    assert container.metadata_miss_cache.info()["hits"] == 3
+
+    # other errors, e.g. of the connection, are raised again without being cached
+    for _ in range(2):
+        with pytest.raises(ValueError, match="ethereum.defi"):
+            tool._get_metadata_from_snowflake("ethereum.defi.ez_dex_swaps")
+    assert container.database_lookups == 6
+    assert container.metadata_miss_cache.get("ethereum.defi") is None
+
+
+class FakeDriverError(Exception):
+    def __init__(self, errno):
+        self.errno = errno
+
+
+class FakeSqlalchemyError(Exception):
+    def __init__(self, orig):
+        self.orig = orig
+
+
+def test_object_not_found_errors():
+    assert is_object_not_found_error(FakeSqlalchemyError(FakeDriverError(2003)))
+    assert not is_object_not_found_error(FakeSqlalchemyError(FakeDriverError(250001)))
+    assert not is_object_not_found_error(ConnectionError("connection reset"))
+    try:
+        raise ValueError("reflection failed") from FakeDriverError(2003)
+    except ValueError as e:
+        assert is_object_not_found_error(e)
@@ -0,0 +1,107 @@
+"""
+test_name_resolver.py
+This file contains the tests for the resolver of the requested table names.
+"""
+from unittest.mock import patch
+
+from chatweb3.catalog.chain_registry import ChainRegistry
+from chatweb3.catalog.name_resolver import TableNameResolution, TableNameResolver
+from chatweb3.tools.snowflake_database.tool_custom import CheckTableMetadataTool
+
+TABLE_LONG_NAMES = [
+    "ethereum.core.fact_blocks",
+    "ethereum.core.fact_transactions",
+    "ethereum.core.ez_token_transfers",
+    "ethereum.core.fact_token_transfers",
+    "ethereum.defi.ez_dex_swaps",
+    "ethereum.nft.ez_nft_sales",
+    "ethereum.nft.ez_nft_mints",
+    "polygon.core.fact_blocks",
+]
+
+
+def test_resolve():
+    resolver = TableNameResolver(TABLE_LONG_NAMES)
+    assert resolver.resolve(" ETHEREUM.CORE.FACT_BLOCKS") == TableNameResolution(
+        "ethereum.core.fact_blocks", "ethereum.core.fact_blocks", []
+    )
+    # typos
+    assert (
+        resolver.resolve("ethereum.core.fact_transaction").long_name
+        == "ethereum.core.fact_transactions"
+    )
+    assert resolver.resolve("etherem.nft.ez_nft_sale").long_name == (
+        "ethereum.nft.ez_nft_sales"
+    )
+    # wrong or no schema
+    assert resolver.resolve("ethereum.core.ez_dex_swap").long_name == (
+        "ethereum.defi.ez_dex_swaps"
+    )
+    assert resolver.resolve("'ez_dex_swaps'").long_name == "ethereum.defi.ez_dex_swaps"
+
+
+def test_resolve_ambiguous_or_unknown_names():
+    resolver = TableNameResolver(TABLE_LONG_NAMES)
+    # in the core schema of both databases
+    resolution = resolver.resolve("core.fact_block")
+    assert resolution.long_name is None
+    assert resolution.suggestions == [
+        "ethereum.core.fact_blocks",
+        "polygon.core.fact_blocks",
+    ]
+    assert resolution.describe() == (
+        "Note: table 'core.fact_block' does not exist, did you mean one of: "
+        "ethereum.core.fact_blocks, polygon.core.fact_blocks?"
+    )
+    resolution = resolver.resolve("ethereum.uniswapv3.ez_swaps")
+    assert resolution == TableNameResolution("ethereum.uniswapv3.ez_swaps", None, [])
+    assert resolution.describe() == (
+        "Note: table 'ethereum.uniswapv3.ez_swaps' does not exist."
+    )
+    # short names get fewer edits
+    assert resolver.resolve("blocks").long_name is None
+
+
+def _metadata_tool(metadata_parser):
+    class Container:
+        pass
+
+    container = Container()
+    container.chain_registry = ChainRegistry.from_metadata_parser(metadata_parser)
+    return CheckTableMetadataTool.construct(db=container)
+
+
+def test_metadata_tool_corrects_table_names(metadata_parser_with_sample_data):
+    tool = _metadata_tool(metadata_parser_with_sample_data)
+    result = tool._run("ethereum.core.ez_nft_sale, ethereum.aave.ez_proposals")
+    assert result.startswith(
+        "Note: table 'ethereum.core.ez_nft_sale' does not exist, showing 'ethereum.core.ez_nft_sales' instead.\n\n"
+    )
+    assert "'ethereum.core.ez_nft_sales'" in result
+    assert "'ethereum.aave.ez_proposals'" in result
+
+
+def test_metadata_tool_falls_back_to_snowflake_for_unknown_names(
+    metadata_parser_with_sample_data,
+):
+    tool = _metadata_tool(metadata_parser_with_sample_data)
+    with patch.object(
+        CheckTableMetadataTool,
+        "_get_metadata_from_snowflake",
+        return_value="ethereum.uniswapv3.ez_swaps: snowflake metadata",
+    ) as mock_method:
+        result = tool._run(
+            "ethereum.core.ez_nft_sale, ethereum.uniswapv3.ez_swaps", mode="default"
+        )
+    mock_method.assert_called_once_with("ethereum.uniswapv3.ez_swaps")
+    assert result.startswith(
+        "Note: table 'ethereum.core.ez_nft_sale' does not exist, showing 'ethereum.core.ez_nft_sales' instead.\n\n"
+    )
+    assert result.endswith("ethereum.uniswapv3.ez_swaps: snowflake metadata")
+
+    # typos are resolved without a snowflake lookup
+    with patch.object(
+        CheckTableMetadataTool, "_get_metadata_from_snowflake"
+    ) as mock_method:
+        tool._run("ethereum.core.ez_nft_sale", mode="default")
+    mock_method.assert_not_called()
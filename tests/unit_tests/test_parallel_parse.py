@@ -0,0 +1,34 @@
+"""
+test_parallel_parse.py
+This file contains the tests for the parsing of the tables by a pool of processes.
+"""
+import pytest
+
+import chatweb3.metadata_parser
+from chatweb3.metadata_parser import MetadataParser
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_parallel_parse_matches_the_sequential_parse(
+    metadata_files, monkeypatch, compact
+):
+    context_file_path, annotation_file_path = metadata_files
+    parser = MetadataParser(
+        file_path=context_file_path,
+        annotation_file_path=annotation_file_path,
+        compact=compact,
+    )
+
+    monkeypatch.setattr(chatweb3.metadata_parser, "PARALLEL_PARSE_MIN_TABLES", 1)
+    parallel_parser = MetadataParser(
+        file_path=context_file_path,
+        annotation_file_path=annotation_file_path,
+        compact=compact,
+        parse_workers=2,
+    )
+
+    assert parallel_parser.root_schema_obj == parser.root_schema_obj
+    table_long_names = "ethereum.core.ez_nft_sales, ethereum.core.fact_transactions"
+    assert parallel_parser.get_metadata_by_table_long_names(
+        table_long_names
+    ) == parser.get_metadata_by_table_long_names(table_long_names)
@@ -0,0 +1,114 @@
+"""
+test_render_formats.py
+This file contains the tests for the render formats of the table metadata.
+"""
+import json
+
+import pytest
+
+from chatweb3.catalog.render_formats import RENDER_FORMATS, get_render_format
+from chatweb3.catalog.token_budget import estimate_tokens
+
+TABLE_LONG_NAME = "ethereum.core.ez_nft_sales"
+
+
+@pytest.fixture
+def parser(metadata_parser_with_sample_data):
+    table = (
+        metadata_parser_with_sample_data.root_schema_obj.databases["ethereum"]
+        .schemas["core"]
+        .tables["ez_nft_sales"]
+    )
+    table.comment = "NFT sales,\nby event."
+    table.columns["event_type"].comment = "The type of the event, e.g. sale."
+    table.columns["event_type"].data_type = "VARCHAR(16777216)"
+    table.columns["block_number"].data_type = "NUMBER(38,0)"
+    return metadata_parser_with_sample_data
+
+
+def test_get_render_format():
+    assert list(RENDER_FORMATS) == ["markdown", "csv", "jsonl", "ddl"]
+    with pytest.raises(ValueError, match="Unknown render format 'xml'"):
+        get_render_format("xml")
+
+
+def test_render_formats(parser):
+    markdown = parser.get_metadata_by_table_long_names(TABLE_LONG_NAME)
+    assert (
+        parser.get_metadata_by_table_long_names(
+            TABLE_LONG_NAME, render_format="markdown"
+        )
+        == markdown
+    )
+
+    assert parser.get_metadata_by_table_long_names(
+        TABLE_LONG_NAME, render_format="csv"
+    ) == (
+        "Table ethereum.core.ez_nft_sales: NFT sales, by event.\n"
+        "name,comment,type,samples\n"
+        'block_number,,"NUMBER(38,0)",1; 2; 3\n'
+        'event_type,"The type of the event, e.g. sale.",VARCHAR(16777216),sale; bid_won; redeem'
+    )
+
+    lines = parser.get_metadata_by_table_long_names(
+        TABLE_LONG_NAME, render_format="jsonl"
+    ).split("\n")
+    assert [json.loads(line) for line in lines] == [
+        {"table": TABLE_LONG_NAME, "comment": "NFT sales, by event."},
+        {"name": "block_number", "type": "NUMBER(38,0)", "samples": [1, 2, 3]},
+        {
+            "name": "event_type",
+            "comment": "The type of the event, e.g. sale.",
+            "type": "VARCHAR(16777216)",
+            "samples": ["sale", "bid_won", "redeem"],
+        },
+    ]
+
+    assert parser.get_metadata_by_table_long_names(
+        TABLE_LONG_NAME, render_format="ddl"
+    ) == (
+        "-- NFT sales, by event.\n"
+        "CREATE TABLE ethereum.core.ez_nft_sales (\n"
+        "  block_number NUMBER(38,0), -- e.g. 1, 2, 3\n"
+        "  event_type VARCHAR(16777216), -- The type of the event, e.g. sale. e.g. sale, bid_won, redeem\n"
+        ");"
+    )
+
+
+@pytest.mark.parametrize("render_format", list(RENDER_FORMATS))
+def test_render_formats_within_token_budget(parser, render_format):
+    table = parser._get_table("ethereum", "core", "ez_nft_sales")
+    header_tokens, column_tokens = table.token_counts(render_format=render_format)
+    full = parser.get_metadata_by_table_long_names(
+        TABLE_LONG_NAME, render_format=render_format
+    )
+    assert header_tokens + sum(column_tokens.values()) == estimate_tokens(full)
+
+    budgeted = parser.get_metadata_by_table_long_names(
+        TABLE_LONG_NAME,
+        render_format=render_format,
+        max_tokens=1,
+        question="what type of event",
+    )
+    assert "event_type" in budgeted and "block_number" in budgeted
+    assert "1 of the 2 columns are omitted to fit the token budget: block_number" in (
+        budgeted
+    )
+    # the sample values and comments are dropped first
+    assert "bid_won" not in budgeted and "The type" not in budgeted
+
+
+def test_jsonl_renders_the_domain_description(parser):
+    table = parser._get_table("ethereum", "core", "ez_nft_sales")
+    table.columns["event_type"].domain = {
+        "null_ratio": 0.25,
+        "values": ["bid_won", "sale"],
+    }
+    lines = parser.get_metadata_by_table_long_names(
+        TABLE_LONG_NAME, column_info_format=["name", "domain"], render_format="jsonl"
+    ).split("\n")
+    # the domain is described as in the other formats, and omitted for the columns without one
+    assert [json.loads(line) for line in lines[1:]] == [
+        {"name": "block_number"},
+        {"name": "event_type", "domain": "values: bid_won, sale; nulls: 25%"},
+    ]
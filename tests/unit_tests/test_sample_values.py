@@ -0,0 +1,73 @@
+"""
+test_sample_values.py
+This file contains the tests for the normalization of the sample values of the columns.
+"""
+import json
+
+from chatweb3.catalog.sample_values import (
+    normalize_sample_value,
+    normalize_sample_values,
+)
+from chatweb3.metadata_parser import Column
+
+
+def test_normalize_sample_value():
+    # short values are kept as they are
+    for value in [None, True, 16400000, 1.5, "sale", {"token0": "0x1"}, [1, 2]]:
+        assert normalize_sample_value(value) == value
+    assert normalize_sample_value("a\nb" * 40, max_chars=10) == (
+        "a\nba\nba\nba...(120 chars)"
+    )
+    assert normalize_sample_value("0x" + "0" * 200) == "0x0000000000...(202 chars)"
+
+
+def test_normalize_json_sample_values():
+    block_header = {f"key_{i}": "0x" + "0" * 40 for i in range(10)}
+    assert normalize_sample_value(block_header) == (
+        "JSON object with keys key_0,key_1,key_2,key_3,key_4,key_5,key_6,key_7,"
+        "...(10 keys)"
+    )
+    abi = [
+        {"inputs": [], "name": "name", "outputs": [{"name": "", "type": "string"}]},
+        {"inputs": [], "name": "symbol", "type": "function"},
+    ]
+    assert normalize_sample_value(abi, max_chars=20) == (
+        "JSON array of 2 objects with keys inputs,name,outputs,type"
+    )
+    # JSON documents stored as strings are summarized the same way
+    assert normalize_sample_value(json.dumps(abi), max_chars=20) == (
+        normalize_sample_value(abi, max_chars=20)
+    )
+    assert normalize_sample_value(["0x" + "0" * 64] * 3) == ("JSON array of 3 strings")
+    assert normalize_sample_value("[not json" + " " * 100) == "[not json" + " " * 91 + (
+        "...(109 chars)"
+    )
+
+
+def test_normalize_sample_values():
+    assert normalize_sample_values([None, None, None]) == [None]
+    assert normalize_sample_values([1, True, 1.0, "1"]) == [1, True, 1.0]
+    assert normalize_sample_values(["a", "b", "a", "c", "d"], max_values=3) == [
+        "a",
+        "b",
+        "c",
+    ]
+    # the summaries of different documents of the same shape are kept once
+    assert normalize_sample_values(
+        [{"from": "0x" + "1" * 200}, {"from": "0x" + "2" * 200}]
+    ) == ["JSON object with keys from"]
+
+
+def test_column_sample_values_are_normalized():
+    column = Column("abi", "dim_contract_abis", "core", "ethereum")
+    sample_rows = [
+        ["0x1", [{"name": f"function_{i}", "inputs": []} for i in range(50)]],
+        ["0x2", "x" * 1000],
+        ["0x3", "x" * 1000],
+    ]
+    assert column._parse_value_from_sample_rows(
+        ["contract_address", "abi"], sample_rows
+    ) == [
+        "JSON array of 50 objects with keys name,inputs",
+        "x" * 100 + "...(1000 chars)",
+    ]
@@ -0,0 +1,85 @@
+"""
+test_search_index.py
+This file contains the tests for the table search index.
+"""
+from chatweb3.catalog.indexed_catalog import write_indexed_catalog
+from chatweb3.catalog.search_index import TableSearchIndex, tokenize
+from chatweb3.metadata_parser import MetadataParser
+
+
+def test_tokenize():
+    assert tokenize("Top NFT sales in ethereum.core.ez_nft_sales") == [
+        "top",
+        "nft",
+        "sale",
+        "ethereum",
+        "core",
+        "ez",
+        "nft",
+        "sale",
+    ]
+    assert tokenize("the address of the") == ["address"]
+    assert tokenize(None) == []
+
+
+def test_search_tables(metadata_parser_with_sample_data):
+    parser = metadata_parser_with_sample_data
+    search_index = parser.search_index
+    assert len(search_index) == 3
+
+    results = search_index.search("What were the largest NFT sales?")
+    assert results[0][0] == "ethereum.core.ez_nft_sales"
+    results = search_index.search("aave governance proposals", top_k=1)
+    assert [name for name, _ in results] == ["ethereum.aave.ez_proposals"]
+    # column comments are indexed too
+    assert search_index.search("mining difficulty")[0][0] == "polygon.core.fact_blocks"
+    assert search_index.search("unrelated words") == []
+    assert [
+        name
+        for name, _ in search_index.search(
+            "block number", table_long_names=["polygon.core.fact_blocks"]
+        )
+    ] == ["polygon.core.fact_blocks"]
+
+    assert parser.search_tables("NFT sales", top_k=1) == (
+        "'ethereum.core.ez_nft_sales': the 'ez_nft_sales' table in 'core' schema of 'ethereum' database. "
+        "Summary: This table contains the sales of NFTs."
+    )
+    assert parser.search_tables("unrelated words") == ""
+
+    # the index is rebuilt with the new summaries
+    parser.add_table_summary({"polygon.core.fact_blocks": "Blocks and their gas."})
+    assert parser.search_index is not search_index
+    assert parser.search_index.search("gas")[0][0] == "polygon.core.fact_blocks"
+
+
+def test_search_does_not_load_lazy_tables(tmp_path, metadata_files):
+    context_file_path, annotation_file_path = metadata_files
+    catalog_file_path = str(tmp_path / "catalog.idx")
+    parser = MetadataParser(
+        file_path=context_file_path, annotation_file_path=annotation_file_path
+    )
+    write_indexed_catalog(
+        parser.root_schema_obj, catalog_file_path, [context_file_path]
+    )
+    lazy_parser = MetadataParser(
+        file_path=context_file_path,
+        annotation_file_path=annotation_file_path,
+        indexed_catalog_file_path=catalog_file_path,
+    )
+    assert lazy_parser.search_index.search("nft sales")[0][0] == (
+        "ethereum.core.ez_nft_sales"
+    )
+    assert lazy_parser.search_tables("nft sales", top_k=1) == parser.search_tables(
+        "nft sales", top_k=1
+    )
+    assert all(
+        table._loader is not None
+        for database in lazy_parser.root_schema_obj.databases.values()
+        for schema in database.schemas.values()
+        for table in schema.tables.values()
+    )
+
+
+def test_search_index_of_empty_catalog():
+    assert TableSearchIndex([]).search("nft sales") == []
@@ -0,0 +1,142 @@
+"""
+test_sqlite_catalog.py
+This file contains the tests for the SQLite catalog module.
+"""
+import json
+import os
+
+import pytest
+
+from benchmarks.synthetic_catalog import write_synthetic_catalog_files
+from chatweb3.catalog.chain_registry import ChainCatalog, ChainRegistry
+from chatweb3.catalog.sqlite_catalog import (
+    SqliteCatalog,
+    load_sqlite_catalog,
+    write_sqlite_catalog,
+)
+from chatweb3.metadata_parser import MetadataParser
+
+
+@pytest.fixture
+def catalog_files(tmp_path):
+    """The context and annotation files of a synthetic catalog with 30 columns per table, and its SQLite catalog."""
+    context_file_path, annotation_file_path = write_synthetic_catalog_files(
+        str(tmp_path / "context.json"),
+        str(tmp_path / "annotation.json"),
+        num_tables=12,
+        num_columns=30,
+        num_databases=2,
+        num_schemas=2,
+    )
+    metadata_parser = MetadataParser(
+        file_path=context_file_path, annotation_file_path=annotation_file_path
+    )
+    sqlite_catalog_file_path = str(tmp_path / "catalog.sqlite")
+    write_sqlite_catalog(
+        metadata_parser,
+        sqlite_catalog_file_path,
+        [context_file_path, annotation_file_path],
+    )
+    return context_file_path, annotation_file_path, sqlite_catalog_file_path
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"include_column_info": False},
+        {"include_column_info": False, "include_column_names": True},
+        {"render_format": "ddl"},
+        {"column_info_format": ["name", "data_type"]},
+        {"question": "the amount of the transfers", "max_columns": 10},
+        {"max_tokens": 100000},
+        {"max_tokens": 500},
+    ],
+)
+def test_metadata_matches_the_metadata_parser(catalog_files, kwargs):
+    context_file_path, annotation_file_path, sqlite_catalog_file_path = catalog_files
+    metadata_parser = MetadataParser(
+        file_path=context_file_path, annotation_file_path=annotation_file_path
+    )
+    sqlite_catalog = SqliteCatalog(sqlite_catalog_file_path)
+    table_long_names = (
+        "chain_1.schema_1.table_7, chain_0.schema_0.table_0, chain_0.schema_0.missing"
+    )
+    assert sqlite_catalog.get_metadata_by_table_long_names(
+        table_long_names, **kwargs
+    ) == metadata_parser.get_metadata_by_table_long_names(table_long_names, **kwargs)
+    if "max_tokens" not in kwargs:
+        assert sqlite_catalog.get_table_metadata(
+            "chain_0", "schema_0", **kwargs
+        ) == metadata_parser.get_table_metadata("chain_0", "schema_0", **kwargs)
+    # the columns are only read into the MetadataParser of the request, not into the catalog
+    assert all(
+        table._loader is not None for table in sqlite_catalog._table_index.values()
+    )
+
+
+def test_search_and_join_paths_match_the_metadata_parser(catalog_files):
+    context_file_path, annotation_file_path, sqlite_catalog_file_path = catalog_files
+    metadata_parser = MetadataParser(
+        file_path=context_file_path, annotation_file_path=annotation_file_path
+    )
+    sqlite_catalog = SqliteCatalog(sqlite_catalog_file_path)
+    query = "table_3 data"
+    assert sqlite_catalog.search_tables(query) == metadata_parser.search_tables(query)
+    table_long_names = "chain_0.schema_0.table_0, chain_0.schema_0.table_4"
+    assert sqlite_catalog.find_join_paths(
+        table_long_names
+    ) == metadata_parser.find_join_paths(table_long_names)
+    resolutions = sqlite_catalog.resolve_table_long_names("chain_0.schema_0.tabl_4")
+    assert resolutions[0].long_name == "chain_0.schema_0.table_4"
+
+
+def test_stale_or_missing_catalog_is_ignored(tmp_path, catalog_files):
+    context_file_path, annotation_file_path, sqlite_catalog_file_path = catalog_files
+    assert (
+        load_sqlite_catalog(
+            sqlite_catalog_file_path, [context_file_path, annotation_file_path]
+        )
+        is not None
+    )
+    assert load_sqlite_catalog(str(tmp_path / "missing.sqlite")) is None
+
+    # the fingerprint is checked on the size and modification time of the source files
+    stat = os.stat(context_file_path)
+    os.utime(context_file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert (
+        load_sqlite_catalog(
+            sqlite_catalog_file_path, [context_file_path, annotation_file_path]
+        )
+        is None
+    )
+    os.utime(context_file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    with open(annotation_file_path) as f:
+        annotation = json.load(f)
+    annotation["table_summary"]["chain_0.schema_0.table_0"] = "Updated summary."
+    with open(annotation_file_path, "w") as f:
+        json.dump(annotation, f)
+    assert (
+        load_sqlite_catalog(
+            sqlite_catalog_file_path, [context_file_path, annotation_file_path]
+        )
+        is None
+    )
+
+
+def test_chain_registry_opens_the_sqlite_catalog(catalog_files):
+    context_file_path, annotation_file_path, sqlite_catalog_file_path = catalog_files
+    chain_catalog = ChainCatalog(
+        chain="chain_0",
+        context_file=context_file_path,
+        annotation_file=annotation_file_path,
+        sqlite_catalog_file=sqlite_catalog_file_path,
+    )
+    chain_registry = ChainRegistry([chain_catalog], default_chain="chain_0")
+    assert isinstance(chain_registry.get_metadata_parser(), SqliteCatalog)
+
+    chain_registry = ChainRegistry(
+        [chain_catalog._replace(sqlite_catalog_file=None)], default_chain="chain_0"
+    )
+    assert not isinstance(chain_registry.get_metadata_parser(), SqliteCatalog)
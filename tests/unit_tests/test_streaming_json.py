@@ -0,0 +1,73 @@
+"""
+test_streaming_json.py
+This file contains the tests for the incremental JSON reader and the streaming load of the context files.
+"""
+import io
+import json
+
+import pytest
+
+from chatweb3.catalog.streaming_json import load_json_streaming
+from chatweb3.metadata_parser import MetadataParser
+
+DOCUMENT = {
+    "version": 12345,
+    "root": {
+        "a": {"name": 'A "quoted" é \\ name', "items": {"x": [1, 2.5e3, None]}},
+        "b": {"name": "B", "items": {"y": {"z": True}, "w": -0.125}},
+        "c": {"name": "C", "items": {}},
+    },
+    "tail": [False, "end"],
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1 << 16])
+def test_streamed_values_and_rest_of_the_document(chunk_size):
+    streamed = []
+    document = load_json_streaming(
+        io.StringIO(json.dumps(DOCUMENT, indent=2)),
+        ("root", None, "items", None),
+        lambda keys, value: streamed.append((keys, value)),
+        chunk_size=chunk_size,
+    )
+    assert streamed == [
+        (["root", "a", "items", "x"], [1, 2.5e3, None]),
+        (["root", "b", "items", "y"], {"z": True}),
+        (["root", "b", "items", "w"], -0.125),
+    ]
+    assert document == {
+        "version": 12345,
+        "root": {
+            "a": {"name": DOCUMENT["root"]["a"]["name"], "items": {}},
+            "b": {"name": "B", "items": {}},
+            "c": {"name": "C", "items": {}},
+        },
+        "tail": [False, "end"],
+    }
+
+
+@pytest.mark.parametrize("text", ['{"a": 1', '{"a" 1}', '{"a": 1} 2', '{"a": [1,}'])
+def test_malformed_json_raises(text):
+    with pytest.raises(json.JSONDecodeError):
+        load_json_streaming(
+            io.StringIO(text), ("a",), lambda keys, value: None, chunk_size=2
+        )
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_streaming_load_matches_the_json_load(metadata_files, compact):
+    context_file_path, annotation_file_path = metadata_files
+    parser = MetadataParser(
+        file_path=context_file_path,
+        annotation_file_path=annotation_file_path,
+        compact=compact,
+    )
+    streaming_parser = MetadataParser(
+        file_path=context_file_path,
+        annotation_file_path=annotation_file_path,
+        compact=compact,
+        streaming_load=True,
+    )
+    assert streaming_parser.root_schema_obj == parser.root_schema_obj
+    assert list(streaming_parser._table_index) == list(parser._table_index)
+    assert streaming_parser.content_hash == parser.content_hash
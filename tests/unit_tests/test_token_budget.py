@@ -0,0 +1,118 @@
+"""
+test_token_budget.py
+This file contains the tests for the token budget of the rendered table metadata.
+"""
+from chatweb3.catalog.snapshot import load_catalog_snapshot
+from chatweb3.catalog.token_budget import (
+    degraded_column_info_formats,
+    estimate_tokens,
+    plan_columns_within_budget,
+)
+from chatweb3.metadata_parser import MetadataParser
+
+TABLE_LONG_NAMES = "ethereum.core.ez_nft_sales, polygon.core.fact_blocks"
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("The block number.") == 4
+    assert estimate_tokens("block_number") == 3
+    assert estimate_tokens("16400000") == 3
+    assert estimate_tokens("VARCHAR(16777216)") == 7
+
+
+def test_degraded_column_info_formats():
+    assert degraded_column_info_formats(
+        ["name", "comment", "data_type", "sample_values_list"]
+    ) == [
+        ["name", "comment", "data_type", "sample_values_list"],
+        ["name", "comment", "data_type"],
+        ["name", "data_type"],
+    ]
+    assert degraded_column_info_formats(["name"]) == [["name"]]
+
+
+def test_plan_columns_within_budget():
+    token_counts = [(10, {"a": 10, "b": 10, "c": 10}), (10, {"d": 10})]
+    priorities = [["a", "b", "c"], ["d"]]
+    assert plan_columns_within_budget(token_counts, priorities, 100) == priorities
+    # each dropped column costs its name and the omission note once per table
+    assert plan_columns_within_budget(token_counts, priorities, 40) == [["a"], ["d"]]
+    assert plan_columns_within_budget(token_counts, priorities, 0) == [["a"], ["d"]]
+
+
+def test_token_counts(metadata_parser_with_sample_data):
+    table = (
+        metadata_parser_with_sample_data.root_schema_obj.databases["ethereum"]
+        .schemas["core"]
+        .tables["ez_nft_sales"]
+    )
+    header_tokens, column_tokens = table.token_counts()
+    full = table._get_metadata(include_column_info=True)
+    assert set(column_tokens) == {"block_number", "event_type"}
+    assert header_tokens + sum(column_tokens.values()) == estimate_tokens(full)
+    assert table.token_counts() is table.token_counts()
+    assert table.token_counts(["name"])[1]["event_type"] < column_tokens["event_type"]
+
+
+def test_get_metadata_within_token_budget(metadata_parser_with_sample_data):
+    parser = metadata_parser_with_sample_data
+    full = parser.get_metadata_by_table_long_names(TABLE_LONG_NAMES)
+    assert (
+        parser.get_metadata_by_table_long_names(TABLE_LONG_NAMES, max_tokens=10000)
+        == full
+    )
+
+    # the sample values are dropped first
+    sizes = {
+        tuple(column_info_format): sum(
+            header_tokens + sum(column_tokens.values())
+            for header_tokens, column_tokens in (
+                table.token_counts(column_info_format)
+                for table in parser._find_target_tables()
+                if table.long_name in TABLE_LONG_NAMES
+            )
+        )
+        for column_info_format in degraded_column_info_formats(
+            ["name", "comment", "data_type", "sample_values_list"]
+        )
+    }
+    no_samples = parser.get_metadata_by_table_long_names(
+        TABLE_LONG_NAMES, max_tokens=sizes[("name", "comment", "data_type")]
+    )
+    assert "\tName | Comment | Data type\n" in no_samples
+
+    # then the column comments
+    no_comments = parser.get_metadata_by_table_long_names(
+        TABLE_LONG_NAMES, max_tokens=sizes[("name", "data_type")]
+    )
+    assert "\tName | Data type\n" in no_comments
+    assert "Note:" not in no_comments
+
+    # then the least relevant columns
+    no_columns = parser.get_metadata_by_table_long_names(
+        TABLE_LONG_NAMES, max_tokens=1, question="what type of event"
+    )
+    assert "\tevent_type | None\n" in no_columns
+    assert (
+        "Note: 1 of the 2 columns are omitted to fit the token budget: block_number"
+        in no_columns
+    )
+    assert no_columns.endswith("\tdifficulty | None")
+
+
+def test_snapshot_stores_token_counts(tmp_path, metadata_files):
+    context_file_path, annotation_file_path = metadata_files
+    snapshot_file_path = str(tmp_path / "catalog.pickle")
+    MetadataParser(
+        file_path=context_file_path, annotation_file_path=annotation_file_path
+    ).save_catalog_snapshot(snapshot_file_path)
+
+    root_schema_obj = load_catalog_snapshot(
+        snapshot_file_path, [context_file_path, annotation_file_path]
+    )
+    table = root_schema_obj.databases["ethereum"].schemas["core"].tables["ez_nft_sales"]
+    assert len(table._token_counts) == 3
+    assert table._token_counts[("name", "data_type")] == table.token_counts(
+        ["name", "data_type"]
+    )